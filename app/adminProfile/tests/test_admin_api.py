@@ -140,3 +140,5 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(adminProfile.firstName, update_payload["firstName"])
         self.assertTrue(user.check_password(update_payload["user"]["password"]))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
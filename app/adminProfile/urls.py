@@ -11,6 +11,8 @@ app_name = "adminProfile"
 urlpatterns = [
 	path('update-admin-active-status/<int:pk>/', views.UpdateAdminActiveStatusView.as_view(), name='update_admin_active_status'),
 	path('create/', views.AdminProfileCreateView.as_view(), name="create"),
+	path('bulk-create/', views.AdminProfileBulkCreateView.as_view(), name="bulk-create"),
 	path('get-all-admins/', views.AdminProfileGetView.as_view(), name="get-all-admins"),
+	path('export-admins/', views.AdminProfileExportView.as_view(), name='export'),
 	path('me/', views.ManageAdminProfileView.as_view(), name='me')
 ]
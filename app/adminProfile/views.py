@@ -2,9 +2,10 @@
 Views for the admin profile APIs.
 """
 
-from rest_framework import generics, permissions, authentication
+from rest_framework import generics, permissions, serializers
 
 from django.contrib.auth import get_user_model
+from django.shortcuts import get_object_or_404
 
 from adminProfile.serializers import (
 	AdminActiveStatusSerializer,
@@ -12,6 +13,23 @@ from adminProfile.serializers import (
 )
 
 from core.models import AdminProfile
+from core.authentication import CachedTokenAuthentication, SignedTokenAuthentication
+from core.bulk import BulkProfileCreateMixin
+from core.conditional import ConditionalProfileMixin
+from core.exports import ProfileExportMixin
+from core.fastpath import FastListMixin
+from core.filters import (
+	CREATED_ORDERING,
+	CREATED_RANGES,
+	PROFILE_FILTERS,
+	Filter,
+	IndexedFilterBackend,
+	IndexPlan,
+	profile_plans,
+)
+from core.fieldsets import SparseFieldsetsViewMixin
+from core.pagination import ProfileCursorPagination
+from core.profile_cache import CachedProfileMixin
 
 class UpdateAdminActiveStatusView(generics.UpdateAPIView):
     """API endpoint to update the is_active field of a admin."""
@@ -26,20 +44,46 @@ class UpdateAdminActiveStatusView(generics.UpdateAPIView):
 class AdminProfileCreateView(generics.CreateAPIView):
     serializer_class = AdminProfileSerializer
 
-class AdminProfileGetView(generics.ListAPIView):
+class AdminProfileBulkCreateView(BulkProfileCreateMixin, generics.GenericAPIView):
+    """Only admin can create profiles in bulk."""
+    serializer_class = AdminProfileSerializer
+
+class AdminProfileGetView(FastListMixin, SparseFieldsetsViewMixin, generics.ListAPIView):
     """Only admin can see the list of admins."""
-    queryset = AdminProfile.objects.all()
+    queryset = AdminProfile.objects.select_related('user', 'location')
     serializer_class = AdminProfileSerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = ProfileCursorPagination
+    filter_backends = [IndexedFilterBackend]
+    profile_filters = {
+        **PROFILE_FILTERS,
+        'gender': Filter('gender', serializers.ChoiceField(choices=AdminProfile.gender_choices)),
+    }
+    index_plans = profile_plans(
+        'adminprofile_created_id_idx', 'adminprofile_role_active_idx', 'adminprofile_country_city_idx'
+    ) + [
+        IndexPlan(
+            'adminprofile_gender_idx',
+            filters=['gender'],
+            ranges=CREATED_RANGES,
+            ordering=CREATED_ORDERING,
+        ),
+    ]
+
+class AdminProfileExportView(SparseFieldsetsViewMixin, ProfileExportMixin, generics.GenericAPIView):
+    """Only admin can export admin profiles."""
+    queryset = AdminProfile.objects.select_related('user', 'location')
+    serializer_class = AdminProfileSerializer
+    export_name = 'admin-profiles'
 
-class ManageAdminProfileView(generics.RetrieveUpdateDestroyAPIView):
+class ManageAdminProfileView(ConditionalProfileMixin, CachedProfileMixin, SparseFieldsetsViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """Manage the authenticated admin."""
 
-    queryset = AdminProfile.objects.all()
+    queryset = AdminProfile.objects.select_related('user', 'location')
     serializer_class = AdminProfileSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SignedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
         """Retrieve and return the authenticated admins"""
-        return self.request.user.admin_profile
\ No newline at end of file
+        return get_object_or_404(self.get_queryset(), user=self.request.user)
\ No newline at end of file
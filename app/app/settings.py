@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "storages",
     "core",
     "rest_framework",
@@ -46,6 +47,7 @@ INSTALLED_APPS = [
     "authentication",
     "userProfile",
     "adminProfile",
+    "location",
 ]
 
 MIDDLEWARE = [
@@ -92,6 +94,20 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Processes only share cached data (profiles, map tiles) through a shared
+# backend, e.g. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -139,18 +155,36 @@ AUTH_USER_MODEL = "core.User"
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "core.authentication.CachedTokenAuthentication",
+        "core.authentication.SignedTokenAuthentication",
     ],
+    # Sliding-window limits of core.throttling, per IP, account and overall.
+    "DEFAULT_THROTTLE_RATES": {
+        "login_ip": "20/min",
+        "login_account": "5/min",
+        "login_global": "600/min",
+        "password_reset_ip": "5/hour",
+        "password_reset_account": "3/hour",
+        "password_reset_global": "100/min",
+    },
 }
 
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = os.environ.get("EMAIL_BACKEND", 'django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = 'smtp.gmail.com'  # Your SMTP server hostname
 EMAIL_PORT = os.environ.get("EMAIL_PORT")  # SMTP port (typically 587 for TLS)
 EMAIL_USE_TLS = True  # Whether to use TLS/SSL for secure connections
 EMAIL_HOST_USER = os.environ.get("EMAIL_HOST_USER")  # SMTP username
 EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD")  # SMTP password
 DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL")  # Default sender email address
+EMAIL_TIMEOUT = 30  # Seconds a blocking SMTP call may take before failing
+EMAIL_FILE_PATH = os.environ.get("EMAIL_FILE_PATH")  # Directory used by the filebased backend
+
+# Email outbox (core.outbox), drained by the deliver_outbox command
+OUTBOX_MAX_ATTEMPTS = 8  # Failed sends before an email is dead-lettered
+OUTBOX_RETRY_DELAY = 60  # Seconds before the first retry, doubled after each failure
+OUTBOX_RETRY_MAX_DELAY = 6 * 60 * 60  # Longest wait between retries
+OUTBOX_CLAIM_TIMEOUT = 5 * 60  # Seconds before emails claimed by a worker that died are sent again
 
 STORAGES = {
     "default": {
@@ -174,3 +208,49 @@ AWS_S3_REGION_NAME = 'us-east-1'
 AWS_S3_FILE_OVERWRITE = False
 AWS_DEFAULT_ACL =  None
 AWS_S3_VERIFY = True
+
+# Geocoding cache
+GEOCODE_CACHE_SIZE = 10000  # Addresses kept in the per-process LRU
+GEOCODE_CACHE_TTL = 60 * 60  # Seconds a resolved address stays in memory
+GEOCODE_NEGATIVE_CACHE_TTL = 5 * 60  # Seconds an unresolved address stays in memory
+GEOCODE_NEGATIVE_TTL = 24 * 60 * 60  # Seconds before an unresolved address is retried
+GEOCODE_ASYNC = True  # Defer geocoding of new locations to the geocode_worker command; bulk creates always defer
+GEOCODE_MAX_ATTEMPTS = 5  # Geocoder failures before the worker marks a location failed
+GEOCODE_CLAIM_TIMEOUT = 5 * 60  # Seconds before a location claimed by a dead worker is retried
+
+# Geocoder backends, tried in order until one resolves the address.
+# Set GEOCODER_GAZETTEER_PATH to a GeoNames-style CSV to answer city-level
+# lookups offline; drop the Nominatim entry for air-gapped deployments.
+GEOCODER_GAZETTEER_PATH = os.environ.get("GEOCODER_GAZETTEER_PATH")
+GEOCODER_BACKENDS = [
+    {
+        "BACKEND": "core.geocoders.NominatimGeocoder",
+        "OPTIONS": {"user_agent": "geopy/1.0"},
+    },
+]
+if GEOCODER_GAZETTEER_PATH:
+    GEOCODER_BACKENDS.insert(0, {
+        "BACKEND": "core.geocoders.GazetteerGeocoder",
+        "OPTIONS": {"path": GEOCODER_GAZETTEER_PATH},
+    })
+
+NEARBY_MAX_RADIUS_KM = 100  # Largest radius accepted by the business nearby search
+CLUSTER_CACHE_TTL = 5 * 60  # Seconds a clustered map tile stays cached
+CLUSTER_MAX_TILES = 16  # Tiles read per cluster request; larger boxes use a lower tile zoom
+
+PROFILE_PAGE_SIZE = 50  # Default page size of the profile list endpoints
+PROFILE_MAX_PAGE_SIZE = 500  # Largest page size a client may request
+EXPORT_CHUNK_SIZE = 2000  # Rows fetched per keyset query in exports
+SEARCH_TRIGRAM = None  # Force pg_trgm fuzzy business search on/off; None detects the extension
+FAST_LIST_SERIALIZATION = True  # Serve list endpoints through core.fastpath
+BULK_CREATE_MAX_ITEMS = 1000  # Largest list accepted by the bulk-create endpoints
+PASSWORD_HASH_WORKERS = None  # Processes hashing bulk-created passwords, None for one per CPU
+PASSWORD_HASH_MIN_PER_WORKER = 8  # Passwords per extra process; smaller batches hash inline
+PROFILE_CACHE_TTL = 5 * 60  # Seconds a serialized me/ profile stays cached, 0 disables
+AUTH_TOKEN_CACHE_TTL = 5 * 60  # Seconds a token -> user snapshot stays in the shared cache
+
+# "db" issues rest_framework.authtoken tokens at login, "signed" issues
+# stateless access/refresh tokens (core.tokens). Both are always accepted.
+AUTH_TOKEN_MODE = os.environ.get("AUTH_TOKEN_MODE", "db")
+ACCESS_TOKEN_TTL = 5 * 60  # Seconds a signed access token is valid
+REFRESH_TOKEN_TTL = 7 * 24 * 60 * 60  # Seconds a signed refresh token is valid
@@ -35,5 +35,6 @@ urlpatterns = [
     path('api/authentication/', include("authentication.urls")),
     path("api/user-profile/", include("userProfile.urls")),
     path("api/admin-profile/", include("adminProfile.urls")),
-    path("api/business-profile/", include("businessProfile.urls"))
+    path("api/business-profile/", include("businessProfile.urls")),
+    path("api/location/", include("location.urls")),
 ]
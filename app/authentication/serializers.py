@@ -2,17 +2,20 @@
 Serializers for the auth APIs.
 """
 
-from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef, Q
 from django.utils.translation import gettext as _
 from django.utils.encoding import force_str
 from django.utils.http import urlsafe_base64_decode
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from rest_framework.exceptions import AuthenticationFailed
 
-from rest_framework.authtoken.models import Token
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from core import accounts, tokens
+from core.models import AdminProfile, BusinessProfile, UserProfile
+
 class AuthTokenSerializer(serializers.Serializer):
     """Serializer for the user auth token."""
 
@@ -26,31 +29,25 @@ class AuthTokenSerializer(serializers.Serializer):
         email = attrs.get("email")
         password = attrs.get("password")
 
-        UserModel = get_user_model()
-        try:
-            user = UserModel.objects.get(email=email)
-        except UserModel.DoesNotExist:
+        # One query for the user and its token; the password is checked
+        # here rather than by authenticate(), which would load it again.
+        user = (
+            get_user_model().objects.select_related("auth_token")
+            .filter(email=email)
+            .first()
+        )
+        if user is None:
             msg = _("User does not exist")
             raise serializers.ValidationError(msg, code="invalid")
 
-        user = authenticate(
-            request=self.context.get("request"),
-            username=email,
-            password=password,
-        )
-
-        if user:
-            if not user.is_active:
-                msg = _('User account is disabled.')
-                raise serializers.ValidationError(msg, code="authorization")
-        else:
+        if not user.check_password(password):
             msg = _("Unable to authenticate with provided credentials")
             raise serializers.ValidationError(msg, code="authorization")
-
-        token, created = Token.objects.get_or_create(user=user)
+        if not user.is_active:
+            msg = _('User account is disabled.')
+            raise serializers.ValidationError(msg, code="authorization")
 
         attrs["user"] = user
-        attrs["token"] = token
 
         return attrs
 
@@ -81,7 +78,9 @@ class ChangePasswordSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
 
         instance.set_password(validated_data['password'])
-        instance.save()
+        # Signed-token users only carry some fields; save just the password.
+        instance.save(update_fields=['password', 'updatedAt'])
+        accounts.end_sessions(instance.pk)
 
         return instance
 
@@ -101,3 +100,57 @@ class ResetPasswordSerializer(serializers.Serializer):
 
     class Meta:
         fields = ['password', 'token', 'uidb64']
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    refresh = serializers.CharField(write_only=True)
+
+    def validate(self, attrs):
+        try:
+            attrs["tokens"] = tokens.refresh(attrs["refresh"])
+        except tokens.InvalidToken:
+            msg = _("Invalid or expired refresh token.")
+            raise AuthenticationFailed(msg)
+        return attrs
+
+
+class BulkActiveStatusSerializer(serializers.Serializer):
+    """Serializer selecting the users of a bulk (de)activation."""
+    MAX_IDS = 50000
+
+    is_active = serializers.BooleanField()
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False, allow_empty=False, max_length=MAX_IDS,
+    )
+    role = serializers.ChoiceField(
+        choices=get_user_model().role_choices, required=False)
+    country = serializers.CharField(required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if set(attrs) == {"is_active"}:
+            msg = _("Select the users by ids or at least one filter.")
+            raise ValidationError({"non_field_errors": [msg]})
+        return attrs
+
+    def select(self, queryset):
+        """Filter queryset down to the users matching every selector."""
+        data = self.validated_data
+        if "ids" in data:
+            queryset = queryset.filter(pk__in=data["ids"])
+        if "role" in data:
+            queryset = queryset.filter(role=data["role"])
+        if "created_after" in data:
+            queryset = queryset.filter(createdAt__gte=data["created_after"])
+        if "created_before" in data:
+            queryset = queryset.filter(createdAt__lt=data["created_before"])
+        if "country" in data:
+            located = Q()
+            for model in (UserProfile, AdminProfile, BusinessProfile):
+                located |= Exists(model.objects.filter(
+                    user=OuterRef("pk"), location__country=data["country"]
+                ))
+            queryset = queryset.filter(located)
+        return queryset
@@ -2,17 +2,39 @@
 Test for the authentication APIs.
 """
 
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
 
 from rest_framework.test import APIClient
 from rest_framework.authtoken.models import Token
 from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+
+from core.authentication import (
+    CachedTokenAuthentication, SignedTokenAuthentication, token_cache_key, upsert_token,
+)
+from core import tokens
+from core.models import Location, OutboxEmail, UserProfile
+from core.cache import incr
+from core.throttling import rejection_counts
 
 LOGIN_URL = reverse('authentication:login')
 LOGOUT_URL = reverse('authentication:logout')
+REFRESH_URL = reverse('authentication:refresh')
 CHANGE_PASSWORD_URL = reverse('authentication:changePassword')
+RESET_PASSWORD_URL = reverse('authentication:resetPassword')
+FORGOT_PASSWORD_URL = reverse('authentication:forgotPassword')
+BULK_ACTIVE_STATUS_URL = reverse('authentication:bulkActiveStatus')
 def create_user(**params):
     """Create and return a new user"""
     return get_user_model().objects.create_user(**params)
@@ -20,7 +42,8 @@ def create_user(**params):
 class PublicAuthApiTests(TestCase):
     """Test the public features of the authentication API."""
 
-    def setup(self):
+    def setUp(self):
+        cache.clear()
         self.client = APIClient()
 
     def test_create_token_for_user(self):
@@ -66,6 +89,7 @@ class PrivateAuthApiTests(TestCase):
     """Test API requests that require authentication."""
 
     def setUp(self):
+        cache.clear()
         self.user = create_user(
             email="test@exmaple.com",
             password="test123",
@@ -94,3 +118,465 @@ class PrivateAuthApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertTrue(user.check_password('test12345'))
 
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test token lookups are cached and invalidated."""
+
+    def setUp(self):
+        self.user = create_user(
+            email="cached@example.com",
+            password="test123",
+            username="Cached User",
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def authenticate(self):
+        return CachedTokenAuthentication().authenticate_credentials(self.token.key)
+
+    def test_repeat_lookups_skip_database(self):
+        """Test the user is served from cache after the first lookup."""
+        self.authenticate()
+
+        with self.assertNumQueries(0):
+            user, token = self.authenticate()
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.email, self.user.email)
+        self.assertTrue(user.check_password("test123"))
+        self.assertEqual(token.key, self.token.key)
+
+    def test_snapshot_holds_only_authorization_fields(self):
+        """Test the password hash and superuser flag are never cached."""
+        user = self.authenticate()[0]
+
+        self.assertLessEqual({"password", "is_superuser"}, user.get_deferred_fields())
+        cached = cache.get(token_cache_key(self.token.key))
+        self.assertNotIn(self.user.password, cached)
+
+    def test_revoked_token_not_served_from_cache(self):
+        """Test a token deleted elsewhere is rejected on the next request."""
+        key = self.token.key
+        self.authenticate()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            CachedTokenAuthentication().authenticate_credentials(key)
+
+    def test_logout_invalidates_token(self):
+        self.authenticate()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(LOGOUT_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.post(LOGOUT_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_change_password_invalidates_snapshot(self):
+        self.authenticate()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.put(CHANGE_PASSWORD_URL, {"old_password": "test123", "password": "test12345", "password2": "test12345"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # The password change ended the session, as on me/.
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_reset_password_invalidates_snapshot(self):
+        self.authenticate()
+        token = PasswordResetTokenGenerator().make_token(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(RESET_PASSWORD_URL, {
+                "password": "reset12345",
+                "token": urlsafe_base64_encode(force_bytes(token)),
+                "uidb64": urlsafe_base64_encode(force_bytes(self.user.pk)),
+            })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # The password change ended the session, as on me/.
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_deactivation_rejects_cached_token(self):
+        """Test disabling a user through the admin endpoint takes effect."""
+        self.authenticate()
+        admin = create_user(email="admin@example.com", password="test123", username="admin", is_staff=True)
+        admin_client = APIClient()
+        admin_client.force_authenticate(user=admin)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = admin_client.patch(
+                reverse("userProfile:update_user_active_status", args=[self.user.pk]),
+                {"is_active": False},
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.post(LOGOUT_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(AUTH_TOKEN_MODE="signed")
+class SignedTokenAuthenticationTests(TestCase):
+    """Test the stateless signed token mode."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(
+            email="signed@example.com",
+            password="test123",
+            username="Signed User",
+        )
+        self.client = APIClient()
+        res = self.client.post(LOGIN_URL, {"email": "signed@example.com", "password": "test123"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.tokens = res.data
+
+    def use_access(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def test_login_issues_signed_tokens(self):
+        """Test login returns a token pair and creates no token row."""
+        self.assertEqual(self.tokens["token_type"], "Bearer")
+        self.assertIn("refresh", self.tokens)
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+
+    def test_access_token_verified_without_database(self):
+        authentication = SignedTokenAuthentication()
+        authentication.authenticate_credentials(self.tokens["access"])
+
+        with self.assertNumQueries(0):
+            user, payload = authentication.authenticate_credentials(self.tokens["access"])
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.role, "user")
+        self.assertTrue(user.is_authenticated)
+        self.assertEqual(user.email, "signed@example.com")
+
+    def test_logout_revokes_tokens(self):
+        """Test logout bumps the version so access and refresh stop working."""
+        self.use_access(self.tokens["access"])
+
+        res = self.client.post(LOGOUT_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.post(LOGOUT_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        res = self.client.post(REFRESH_URL, {"refresh": self.tokens["refresh"]})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_change_password_revokes_tokens(self):
+        self.use_access(self.tokens["access"])
+
+        res = self.client.put(CHANGE_PASSWORD_URL, {"old_password": "test123", "password": "test12345", "password2": "test12345"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("test12345"))
+        self.assertEqual(self.user.email, "signed@example.com")
+        res = self.client.post(LOGOUT_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+        self.use_access(self.tokens["access"])
+
+        res = self.client.post(LOGOUT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_issues_new_pair(self):
+        res = self.client.post(REFRESH_URL, {"refresh": self.tokens["refresh"]})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.use_access(res.data["access"])
+        self.assertEqual(self.client.post(LOGOUT_URL).status_code, status.HTTP_200_OK)
+
+    def test_expired_access_token_rejected(self):
+        self.use_access(self.tokens["access"])
+
+        with override_settings(ACCESS_TOKEN_TTL=-1):
+            res = self.client.post(LOGOUT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_tampered_token_rejected(self):
+        self.use_access(self.tokens["access"][:-1] + "x")
+
+        res = self.client.post(LOGOUT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class LoginQueryTests(TestCase):
+    """Test the login fast path."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(
+            email="login@example.com",
+            password="test123",
+            username="Login User",
+        )
+        self.payload = {"email": "login@example.com", "password": "test123"}
+
+    def test_first_login_reads_user_and_upserts_token(self):
+        """Test a first login costs one user read and one token upsert."""
+        with self.assertNumQueries(2):
+            res = self.client.post(LOGIN_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["token"], Token.objects.get(user=self.user).key)
+
+    def test_repeat_login_is_single_query(self):
+        """Test an existing token is read together with the user."""
+        first = self.client.post(LOGIN_URL, self.payload).data["token"]
+
+        with self.assertNumQueries(1):
+            res = self.client.post(LOGIN_URL, self.payload)
+
+        self.assertEqual(res.data["token"], first)
+
+    def test_disabled_user_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.post(LOGIN_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn("token", res.data)
+
+
+class ForgotPasswordApiTests(TestCase):
+    """Test password reset emails go through the outbox."""
+
+    def setUp(self):
+        cache.clear()
+        create_user(email="reset@example.com", password="test123", username="Reset User")
+
+    def test_reset_email_queued(self):
+        """Test the reset link is queued instead of sent inline."""
+        res = self.client.post(FORGOT_PASSWORD_URL, {"email": "reset@example.com"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.recipients, ["reset@example.com"])
+        self.assertEqual(email.status, OutboxEmail.PENDING)
+        self.assertIn("reset-password?userId=", email.body)
+
+    def test_unknown_email_not_queued(self):
+        res = self.client.post(FORGOT_PASSWORD_URL, {"email": "nobody@example.com"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(OutboxEmail.objects.exists())
+
+
+THROTTLED_RATES = {
+    "login_ip": "5/min",
+    "login_account": "2/min",
+    "login_global": "100/min",
+    "password_reset_ip": "1/hour",
+}
+
+
+@override_settings(REST_FRAMEWORK={"DEFAULT_THROTTLE_RATES": THROTTLED_RATES})
+class ThrottleApiTests(TestCase):
+    """Test login and password reset are rate limited."""
+
+    def setUp(self):
+        cache.clear()
+        # Freeze the clock inside a window so no test straddles a boundary.
+        clock = patch("core.throttling.time")
+        clock.start().time.return_value = 1_800_000_000 + 1
+        self.addCleanup(clock.stop)
+        self.user = create_user(
+            email="throttle@example.com",
+            password="test123",
+            username="Throttle User",
+        )
+
+    def login(self, email="throttle@example.com", password="test123"):
+        return self.client.post(LOGIN_URL, {"email": email, "password": password})
+
+    def test_account_limit(self):
+        """Test failed logins exhaust the account budget, any case of email."""
+        self.login(password="wrong")
+        self.login(email="THROTTLE@example.com", password="wrong")
+
+        res = self.login()
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreaterEqual(int(res["Retry-After"]), 1)
+        self.assertEqual(rejection_counts("login")["account"], 1)
+
+    def test_ip_limit(self):
+        """Test one client is limited across accounts."""
+        for i in range(5):
+            self.login(email=f"user{i}@example.com")
+
+        res = self.login()
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(rejection_counts("login"), {"ip": 1, "account": 0, "global": 0})
+
+    def test_non_object_body(self):
+        """Test a JSON body that is not an object is rejected, not a 500."""
+        for body in ('[{"email": "throttle@example.com"}]', '"throttle@example.com"'):
+            res = self.client.post(LOGIN_URL, body, content_type="application/json")
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rejected_requests_not_counted(self):
+        """Test a rejected request does not use up the other budgets."""
+        self.login(email="other@example.com")
+        self.login(email="other@example.com")
+        for _ in range(3):
+            res = self.login(email="other@example.com")
+            self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        res = self.login()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_concurrent_request_counted(self):
+        """Test a request counted elsewhere while this one is checked is seen."""
+        self.login(password="wrong")
+        raced = []
+
+        def racing_incr(key, timeout=None):
+            if ":account:" in key and not raced:
+                # Another process takes the last slot of the account budget.
+                raced.append(incr(key, timeout))
+            return incr(key, timeout)
+
+        with patch("core.throttling.incr", side_effect=racing_incr):
+            res = self.login()
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(rejection_counts("login")["account"], 1)
+
+    def test_forgot_password_limit(self):
+        """Test reset mails are limited before any user lookup."""
+        self.client.post(FORGOT_PASSWORD_URL, {"email": "nobody@example.com"})
+
+        with self.assertNumQueries(0):
+            res = self.client.post(FORGOT_PASSWORD_URL, {"email": "throttle@example.com"})
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(rejection_counts("password_reset")["ip"], 1)
+
+
+class BulkActiveStatusApiTests(TestCase):
+    """Test activating and deactivating users in bulk."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = create_user(email="admin@example.com", password="test123", username="admin", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        self.users = [
+            create_user(email=f"bulk{i}@example.com", password="test123", username=f"bulk{i}")
+            for i in range(3)
+        ]
+
+    def post(self, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(BULK_ACTIVE_STATUS_URL, data, format="json")
+
+    def test_deactivate_revokes_tokens(self):
+        """Test cached DB tokens and signed tokens stop working at once."""
+        target, other = self.users[0], self.users[1]
+        db_token = Token.objects.create(user=target)
+        CachedTokenAuthentication().authenticate_credentials(db_token.key)
+        access = tokens.issue(target)["access"]
+        tokens.verify_access(access)
+        Token.objects.create(user=other)
+
+        with self.assertNumQueries(4):
+            res = self.post({"is_active": False, "ids": [target.pk, self.admin.pk]})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["updated"], 1)
+        target.refresh_from_db()
+        self.assertFalse(target.is_active)
+        self.assertTrue(get_user_model().objects.get(pk=self.admin.pk).is_active)
+        self.assertFalse(Token.objects.filter(user=target).exists())
+        self.assertTrue(Token.objects.filter(user=other).exists())
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {db_token.key}")
+        self.assertEqual(client.post(LOGOUT_URL).status_code, status.HTTP_401_UNAUTHORIZED)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.assertEqual(client.post(LOGOUT_URL).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_reactivate(self):
+        """Test reactivated users can log in again."""
+        self.post({"is_active": False, "ids": [self.users[0].pk]})
+        self.assertEqual(tokens.current_version(self.users[0].pk), tokens.REVOKED)
+
+        res = self.post({"is_active": True, "ids": [self.users[0].pk]})
+
+        self.assertEqual(res.data["updated"], 1)
+        self.assertNotEqual(tokens.current_version(self.users[0].pk), tokens.REVOKED)
+        res = APIClient().post(LOGIN_URL, {"email": "bulk0@example.com", "password": "test123"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_filters(self):
+        """Test users are selected by role and profile country."""
+        business = self.users[0]
+        business.role = get_user_model().BUSINESS
+        business.save()
+        located = self.users[1]
+        UserProfile.objects.create(
+            user=located,
+            location=Location.objects.create(city="Lyon", country="France"),
+            firstName="a", lastName="b", email="located@example.com",
+            gender="male", dob="2000-01-01", interests=[],
+        )
+
+        res = self.post({"is_active": False, "role": "business"})
+        self.assertEqual(res.data["updated"], 1)
+        res = self.post({"is_active": False, "country": "France"})
+        self.assertEqual(res.data["updated"], 1)
+
+        inactive = set(get_user_model().objects.filter(is_active=False).values_list("pk", flat=True))
+        self.assertEqual(inactive, {business.pk, located.pk})
+
+    def test_requires_selector(self):
+        res = self.post({"is_active": False})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(get_user_model().objects.filter(is_active=False).exists())
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(user=self.users[0])
+
+        res = self.post({"is_active": False, "ids": [self.users[1].pk]})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ConcurrentLoginTests(TransactionTestCase):
+    """Test concurrent logins of one user share a single token."""
+
+    def test_concurrent_upserts_agree(self):
+        user = create_user(email="race@example.com", password="test123", username="race")
+
+        def login(_):
+            try:
+                return upsert_token(user.pk)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            keys = set(pool.map(login, range(16)))
+
+        self.assertEqual(keys, {Token.objects.get(user=user).key})
@@ -12,7 +12,9 @@ app_name = "authentication"
 urlpatterns = [
     path("login/", views.LoginView.as_view(), name="login"),
     path("logout/", views.LogoutView.as_view(), name="logout"),
+    path("refresh/", views.RefreshTokenView.as_view(), name="refresh"),
     path("change-password/", views.ChangePasswordView.as_view(), name="changePassword"),
     path('forgot-password/', views.ForgotPasswordView.as_view(), name='forgotPassword'),
     path('reset-password/', views.ResetPasswordView.as_view(), name='resetPassword'),
+    path('bulk-active-status/', views.BulkActiveStatusView.as_view(), name='bulkActiveStatus'),
 ]
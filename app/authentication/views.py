@@ -7,20 +7,46 @@ from rest_framework.settings import api_settings
 from rest_framework import generics, permissions
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.authentication import TokenAuthentication
 
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.utils.encoding import force_bytes, smart_str
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
-from django.core.mail import send_mail
 
-from .serializers import AuthTokenSerializer, ChangePasswordSerializer, ForgotPasswordSerializer, ResetPasswordSerializer
+from core import accounts, outbox, tokens
+from core.authentication import CachedTokenAuthentication, SignedTokenAuthentication, token_key
+from core.throttling import LoginThrottle, PasswordResetThrottle
+
+from .serializers import AuthTokenSerializer, BulkActiveStatusSerializer, ChangePasswordSerializer, ForgotPasswordSerializer, RefreshTokenSerializer, ResetPasswordSerializer
 
 class LoginView(ObtainAuthToken):
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = [LoginThrottle]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+        if settings.AUTH_TOKEN_MODE == 'signed':
+            return Response(tokens.issue(user))
+        return Response({'token': token_key(user)})
+
+class RefreshTokenView(generics.GenericAPIView):
+    """Exchange a signed refresh token for a new access/refresh pair."""
+    serializer_class = RefreshTokenSerializer
+    authentication_classes = []
+
+    def get_authenticate_header(self, request):
+        # Answer rejected refresh tokens with 401 rather than 403.
+        return SignedTokenAuthentication.keyword
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.validated_data['tokens'])
 
 class LogoutView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -29,14 +55,17 @@ class LogoutView(generics.CreateAPIView):
     """
     def post(self, request, *args, **kwargs):
         if request.user.is_authenticated:
-            request.user.auth_token.delete()
+            if isinstance(request.successful_authenticator, SignedTokenAuthentication):
+                tokens.revoke(request.user.pk)
+            else:
+                request.user.auth_token.delete()
             return Response({"detail": "Successfully logged out."}, status=status.HTTP_200_OK)
         else:
             return Response({"detail": "User is not authenticated."}, status=status.HTTP_401_UNAUTHORIZED)
 
 class ChangePasswordView(generics.UpdateAPIView):
     queryset = get_user_model().objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SignedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = ChangePasswordSerializer
 
@@ -47,6 +76,7 @@ class ChangePasswordView(generics.UpdateAPIView):
 
 class ForgotPasswordView(generics.GenericAPIView):
     serializer_class = ForgotPasswordSerializer
+    throttle_classes = [PasswordResetThrottle]
 
     def post(self, request):
         serializer = self.get_serializer(data=request.data)
@@ -57,16 +87,13 @@ class ForgotPasswordView(generics.GenericAPIView):
         if user:
             token = PasswordResetTokenGenerator().make_token(user)
             uidb64 = urlsafe_base64_encode(force_bytes(user.id))
-            print(token)
-            print(urlsafe_base64_encode(force_bytes(token)))
-            # Send email with password reset link
+            # Queued for the deliver_outbox command instead of sent inline
             reset_link = f"http://localhost:5000/reset-password?userId={uidb64}&token={urlsafe_base64_encode(force_bytes(token))}/"
-            send_mail(
+            outbox.enqueue(
                 'Reset Your Password',
                 f'Please click the following link to reset your password: {reset_link}',
-                'from@example.com',
                 [email],
-                fail_silently=False,
+                from_email='from@example.com',
             )
             return Response({"message": "Password reset link sent to your email."}, status=status.HTTP_200_OK)
         else:
@@ -74,6 +101,7 @@ class ForgotPasswordView(generics.GenericAPIView):
 
 class ResetPasswordView(generics.CreateAPIView):
     serializer_class = ResetPasswordSerializer
+    throttle_classes = [PasswordResetThrottle]
 
     def post(self, request):
         serializer = self.get_serializer(data=request.data)
@@ -93,8 +121,20 @@ class ResetPasswordView(generics.CreateAPIView):
         if user is not None and PasswordResetTokenGenerator().check_token(user, decoded_token):
             user.set_password(password)
             user.save()
+            accounts.end_sessions(user.pk)
             return Response({"message": "Password reset successfully."}, status=status.HTTP_200_OK)
         else:
             return Response({"error": "Invalid token."}, status=status.HTTP_401_UNAUTHORIZED)
 
+class BulkActiveStatusView(generics.GenericAPIView):
+    """Only admin can activate or deactivate users in bulk."""
+    serializer_class = BulkActiveStatusSerializer
+    permission_classes = [permissions.IsAdminUser]
 
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # Admins cannot lock themselves out.
+        users = serializer.select(get_user_model().objects.exclude(pk=request.user.pk))
+        user_ids = accounts.set_active(users, serializer.validated_data['is_active'])
+        return Response({"updated": len(user_ids)}, status=status.HTTP_200_OK)
@@ -1,6 +1,7 @@
 """"
 Serializers for the business profile APIs.
 """
+from django.conf import settings
 from django.contrib.auth import get_user_model
 
 from rest_framework import serializers
@@ -8,8 +9,9 @@ from django.utils.translation import gettext as _
 
 from core.models import BusinessProfile, Location
 
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut
+from core import geocoding, search
+from core.fieldsets import SparseFieldsetsMixin
+from core.updates import ChangeOnlyUpdateMixin
 
 
 class BusinessActiveStatusSerializer(serializers.ModelSerializer):
@@ -22,30 +24,30 @@ class BusinessActiveStatusSerializer(serializers.ModelSerializer):
 class LocationSerializer(serializers.ModelSerializer):
     latitude = serializers.FloatField(read_only=True)
     longitude = serializers.FloatField(read_only=True)
+    geocodeStatus = serializers.CharField(read_only=True)
 
     class Meta:
         model = Location
-        fields = ['street','city', 'state', 'country', 'latitude', 'longitude']
+        fields = ['street','city', 'state', 'country', 'latitude', 'longitude', 'geocodeStatus']
 
     def create(self, validated_data):
+        if settings.GEOCODE_ASYNC:
+            # Coordinates are filled in later by the geocode_worker command.
+            validated_data['geocodeStatus'] = Location.PENDING
+            return super().create(validated_data)
+
         address = self._get_full_address(validated_data)
         latitude, longitude = self._get_latitude_longitude(address)
         validated_data['latitude'] = latitude
         validated_data['longitude'] = longitude
+        validated_data['geocodeStatus'] = geocoding.geocode_status(latitude)
         return super().create(validated_data)
 
     def _get_full_address(self, validated_data):
         return f"{validated_data['street']}, {validated_data['city']}, {validated_data['state']}, {validated_data['country']}"
 
     def _get_latitude_longitude(self, address):
-        geolocator = Nominatim(user_agent="geopy/1.0")
-        try:
-            location = geolocator.geocode(address)
-            if location:
-                return location.latitude, location.longitude
-        except GeocoderTimedOut:
-            pass
-        return None, None
+        return geocoding.geocode(address)
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -53,7 +55,7 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['username', 'email', 'password']
         extra_kwargs = {"password": {"write_only": True, "min_length": 6}}
 
-class BusinessProfileSerializer(serializers.ModelSerializer):
+class BusinessProfileSerializer(SparseFieldsetsMixin, ChangeOnlyUpdateMixin, serializers.ModelSerializer):
     location = LocationSerializer()
     user = UserSerializer()
     businessHours = serializers.DictField()
@@ -62,6 +64,8 @@ class BusinessProfileSerializer(serializers.ModelSerializer):
         # exclude = ['createdAt', 'updatedAt']
         fields = ["user", "location", "businessName", "businessType", "businessHours", "email", "contactNo", "businessLogo", "websiteUrl",]
 
+    updatable_fields = ['businessName', 'businessType', 'businessLogo', 'businessHours', 'email', 'contactNo', 'websiteUrl']
+
     def create(self, validated_data):
         """Create and return a business profile with encrypted password."""
 
@@ -77,35 +81,63 @@ class BusinessProfileSerializer(serializers.ModelSerializer):
             # Handle serializer validation errors
             raise serializers.ValidationError(_("Invalid location data"), code='Invalid')
 
-    def update(self, instance, validated_data):
-        """Update and return user profile"""
-        location_data = validated_data.pop('location', None)
-        business_data = validated_data.pop('user', None)
-
-        # Update UserProfile instance
-        instance.businessName = validated_data.get('businessName', instance.businessName)
-        instance.businessType = validated_data.get('businessType', instance.businessType)
-        instance.businessLogo = validated_data.get('businessLogo', instance.businessLogo)
-        instance.businessHours = validated_data.get('businessHours', instance.businessHours)
-        instance.email = validated_data.get('email', instance.email)
-        instance.contactNo = validated_data.get('contactNo', instance.contactNo)
-        instance.websiteUrl = validated_data.get('websiteUrl', instance.websiteUrl)
-
-        # Update Location instance
-        if location_data:
-            location_serializer = LocationSerializer(instance.location, data=location_data)
-            if location_serializer.is_valid():
-                location_serializer.save()
-
-        # Update User instance
-        if (business_data):
-            user = instance.user
-            password = business_data.pop('password', None)
-            user.email = business_data.get('email', user.email)
-            if (password):
-                user.set_password(password)
-            user.save()
-
-        # Save UserProfile instance
-        instance.save()
-        return instance
+
+class NearbyQuerySerializer(serializers.Serializer):
+    """Serializer for the query parameters of the nearby search."""
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lon = serializers.FloatField(min_value=-180, max_value=180)
+    radius = serializers.FloatField(
+        min_value=0.01,
+        max_value=settings.NEARBY_MAX_RADIUS_KM,
+        default=5,
+    )
+
+
+class PublicLocationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Location
+        fields = ['city', 'state', 'country']
+        read_only_fields = fields
+
+
+class PublicBusinessProfileSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    """Public part of a business profile.
+
+    Any authenticated user may list businesses, so the account and the
+    street address are left out.
+    """
+    location = PublicLocationSerializer(read_only=True)
+    businessHours = serializers.DictField(read_only=True)
+
+    class Meta:
+        model = BusinessProfile
+        fields = ['id', 'location', 'businessName', 'businessType', 'businessHours', 'businessLogo', 'websiteUrl']
+        read_only_fields = fields
+
+
+class NearbyBusinessProfileSerializer(PublicBusinessProfileSerializer):
+    """Public business profile with its distance in km from the search origin."""
+    distance = serializers.FloatField(read_only=True)
+
+    class Meta(PublicBusinessProfileSerializer.Meta):
+        fields = PublicBusinessProfileSerializer.Meta.fields + ["distance"]
+        read_only_fields = fields
+
+
+class BusinessSearchQuerySerializer(serializers.Serializer):
+    """Serializer for the query parameters of the business search."""
+    q = serializers.CharField(max_length=200)
+
+    def validate_q(self, value):
+        if not search.words(value):
+            raise serializers.ValidationError(_("Give at least one word to search for."))
+        return value
+
+
+class BusinessSearchProfileSerializer(PublicBusinessProfileSerializer):
+    """Public business profile with its relevance to the search query."""
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(PublicBusinessProfileSerializer.Meta):
+        fields = PublicBusinessProfileSerializer.Meta.fields + ["rank"]
+        read_only_fields = fields
@@ -2,17 +2,29 @@
 Test for the business profile APIs.
 """
 
-from django.test import TestCase
+import csv
+import io
+import json
+
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core import search
 from core.models import BusinessProfile, Location
+from core.tests.helpers import create_profile
 
 CREATE_BUSINESS_PROFILE_URL = reverse("businessProfile:create")
+BULK_CREATE_URL = reverse("businessProfile:bulk-create")
 ME_URL = reverse("businessProfile:me")
+NEARBY_URL = reverse("businessProfile:nearby")
+EXPORT_URL = reverse("businessProfile:export")
+SEARCH_URL = reverse("businessProfile:search")
 
 payload = {
 	"location": {
@@ -61,7 +73,6 @@ def create_business():
     businessProfile = BusinessProfile.objects.create(user=user, location=location, **payload_copy)
     return businessProfile
 
-
 class PublicUserApiTests(TestCase):
     """Test the public features of the admin profile API."""
 
@@ -141,3 +152,226 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(businessProfile.businessName, update_payload["businessName"])
         self.assertTrue(user.check_password(update_payload["user"]["password"]))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class NearbyBusinessApiTests(TestCase):
+    """Test the nearby business search."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=get_user_model().objects.create_user(
+            email="searcher@example.com", username="searcher", password="test12345"
+        ))
+        # Dhaka city centre and businesses roughly 1 km, 3 km and 60 km away.
+        self.origin = {"lat": 23.7104, "lon": 90.4074}
+        self.near = create_profile(BusinessProfile, "near", 23.7194, 90.4074)
+        self.closer = create_profile(BusinessProfile, "closer", 23.7104, 90.4164)
+        self.mid = create_profile(BusinessProfile, "mid", 23.7374, 90.4074)
+        self.far = create_profile(BusinessProfile, "far", 24.2504, 90.4074)
+
+    def test_location_geohash_is_maintained(self):
+        """Test saving coordinates updates the indexed geohash."""
+        location = self.near.location
+        self.assertTrue(location.geohash.startswith("wh0q"))
+
+        location.latitude = 51.5
+        location.longitude = -0.12
+        location.save(update_fields=["latitude", "longitude"])
+        location.refresh_from_db()
+        self.assertTrue(location.geohash.startswith("gcpuv"))
+
+    def test_nearby_filters_and_orders_by_distance(self):
+        """Test only businesses inside the radius are returned, nearest first."""
+        res = self.client.get(NEARBY_URL, {**self.origin, "radius": 5})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = [item["businessName"] for item in res.data["results"]]
+        self.assertEqual(names[2], "mid")
+        self.assertCountEqual(names[:2], ["near", "closer"])
+        self.assertAlmostEqual(res.data["results"][2]["distance"], 3.0, delta=0.1)
+
+    def test_nearby_hides_private_fields(self):
+        """Test callers see neither the account nor the street address."""
+        res = self.client.get(NEARBY_URL, {**self.origin, "radius": 5})
+
+        result = res.data["results"][0]
+        self.assertNotIn("user", result)
+        self.assertNotIn("email", result)
+        self.assertEqual(set(result["location"]), {"city", "state", "country"})
+
+    def test_nearby_large_radius(self):
+        """Test radii larger than a geohash cell still find every match."""
+        res = self.client.get(NEARBY_URL, {**self.origin, "radius": 100})
+
+        self.assertEqual(res.data["count"], 4)
+        self.assertEqual(res.data["results"][-1]["businessName"], "far")
+
+    def test_nearby_is_paginated(self):
+        """Test results are paginated."""
+        res = self.client.get(
+            NEARBY_URL, {**self.origin, "radius": 100, "page_size": 2}
+        )
+
+        self.assertEqual(res.data["count"], 4)
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertIsNotNone(res.data["next"])
+
+    def test_nearby_invalid_parameters(self):
+        """Test an error is returned for invalid coordinates or radius."""
+        res = self.client.get(NEARBY_URL, {"lat": 95, "lon": 0})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(NEARBY_URL, {**self.origin, "radius": 5000})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ExportApiTests(TestCase):
+    """Test the streaming business profile export."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=get_user_model().objects.create_user(
+            email="staff@example.com", username="staff", password="test12345", is_staff=True
+        ))
+
+    def test_export_csv(self):
+        """Test business hours are exported as a single JSON column."""
+        business = create_profile(BusinessProfile, "business", 23.7, 90.4)
+        business.businessHours = {"monday": "10:00am-09:00pm"}
+        business.save()
+
+        res = self.client.get(EXPORT_URL, {"output": "csv"})
+
+        content = b"".join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(rows[0]["location.latitude"], "23.7")
+        self.assertEqual(json.loads(rows[0]["businessHours"]), business.businessHours)
+
+
+class ConditionalRequestApiTests(TestCase):
+    """Test ETag handling on the business me endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.business = create_profile(BusinessProfile, "business", 23.7, 90.4)
+        self.client.force_authenticate(user=self.business.user)
+
+    def test_unchanged_profile_not_modified(self):
+        """Test a matching If-None-Match returns 304 until the user changes."""
+        etag = self.client.get(ME_URL).headers["ETag"]
+
+        res = self.client.get(ME_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.business.user.username = "renamed"
+        self.business.user.save()
+        res = self.client.get(ME_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class BusinessSearchApiTests(TestCase):
+    """Test full-text and fuzzy search of business profiles."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=get_user_model().objects.create_user(
+            email="user@example.com", username="user", password="test12345"
+        ))
+
+    def create_named(self, name, business_type):
+        business = create_profile(BusinessProfile, name.replace(" ", "_").lower())
+        business.businessName = name
+        business.businessType = business_type
+        business.save()
+        return business
+
+    def names(self, res):
+        return [row["businessName"] for row in res.data["results"]]
+
+    def test_search_ranks_name_above_type(self):
+        """Test stemmed prefix matches, with name matches ranked first."""
+        self.create_named("Bakers Corner", "cafe")
+        self.create_named("Sunrise", "bakery")
+        self.create_named("Harbour Books", "bookstore")
+
+        res = self.client.get(SEARCH_URL, {"q": "bake"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.names(res), ["Bakers Corner", "Sunrise"])
+        self.assertGreater(res.data["results"][0]["rank"], res.data["results"][1]["rank"])
+
+    def test_search_vector_follows_updates(self):
+        """Test the stored search vector is refreshed on write."""
+        business = self.create_named("Golden Gym", "gym")
+        business.businessName = "Silver Spa"
+        business.save()
+
+        self.assertEqual(self.names(self.client.get(SEARCH_URL, {"q": "golden"})), [])
+        self.assertEqual(
+            self.names(self.client.get(SEARCH_URL, {"q": "silver spa"})), ["Silver Spa"]
+        )
+
+    def test_search_tolerates_typos(self):
+        """Test misspelled names match when pg_trgm is installed."""
+        if not search.trigram_available():
+            self.skipTest("pg_trgm is not installed")
+        self.create_named("Riverside Restaurant", "restaurant")
+
+        res = self.client.get(SEARCH_URL, {"q": "Riversde Resturant"})
+
+        self.assertEqual(self.names(res), ["Riverside Restaurant"])
+
+    def test_trigram_detection_follows_setting_and_connection(self):
+        """Test the pg_trgm probe is overridable and re-run per connection."""
+        with override_settings(SEARCH_TRIGRAM=False), self.assertNumQueries(0):
+            self.assertFalse(search.trigram_available())
+
+        search.trigram_available()
+        with self.assertNumQueries(0):
+            search.trigram_available()
+        connection_created.send(sender=type(connection), connection=connection)
+        with self.assertNumQueries(1):
+            search.trigram_available()
+
+    def test_search_hides_private_fields(self):
+        """Test callers see neither the account nor the street address."""
+        self.create_named("Golden Gym", "gym")
+
+        result = self.client.get(SEARCH_URL, {"q": "golden"}).data["results"][0]
+
+        self.assertNotIn("user", result)
+        self.assertNotIn("email", result)
+        self.assertEqual(set(result["location"]), {"city", "state", "country"})
+
+    def test_search_requires_words(self):
+        res = self.client.get(SEARCH_URL, {"q": "&|!"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BulkCreateApiTests(TestCase):
+    """Test creating business profiles in bulk."""
+
+    def test_bulk_created_businesses_searchable(self):
+        """Test bulk inserts fill the search vector like single creates."""
+        staff = get_user_model().objects.create_user(
+            email="staff@example.com", username="staff", password="test12345", is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=staff)
+        items = []
+        for name in ["Bakers Corner", "Harbour Books"]:
+            slug = name.replace(" ", "_").lower()
+            items.append({
+                **payload,
+                "user": {"username": slug, "email": f"{slug}@example.com", "password": "test12345"},
+                "email": f"{slug}@example.com",
+                "businessName": name,
+            })
+
+        res = self.client.post(BULK_CREATE_URL, items, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.get(SEARCH_URL, {"q": "bakers"})
+        self.assertEqual(
+            [row["businessName"] for row in res.data["results"]], ["Bakers Corner"]
+        )
@@ -11,6 +11,10 @@ app_name = "businessProfile"
 urlpatterns = [
 	path('update-business-active-status/<int:pk>/', views.UpdateBusinessActiveStatusView.as_view(), name='update_business_active_status'),
 	path('create/', views.BusinessProfileCreateView.as_view(), name="create"),
+	path('bulk-create/', views.BusinessProfileBulkCreateView.as_view(), name="bulk-create"),
 	path('get-all-business_profiles/', views.BusinessProfileGetView.as_view(), name="get-all-business_profiles"),
-	path('me/', views.ManageBusinessProfileView.as_view(), name='me')
+	path('export-business_profiles/', views.BusinessProfileExportView.as_view(), name='export'),
+	path('me/', views.ManageBusinessProfileView.as_view(), name='me'),
+	path('nearby/', views.BusinessProfileNearbyView.as_view(), name='nearby'),
+	path('search/', views.BusinessProfileSearchView.as_view(), name='search'),
 ]
@@ -2,16 +2,32 @@
 Views for the business profile APIs.
 """
 
-from rest_framework import generics, permissions, authentication
+from rest_framework import generics, permissions
 
 from django.contrib.auth import get_user_model
+from django.shortcuts import get_object_or_404
+from django.db.models import Q
 
 from businessProfile.serializers import (
 	BusinessActiveStatusSerializer,
-	BusinessProfileSerializer
+	BusinessProfileSerializer,
+	BusinessSearchProfileSerializer,
+	BusinessSearchQuerySerializer,
+	NearbyBusinessProfileSerializer,
+	NearbyQuerySerializer,
 )
 
+from core import geo, search
 from core.models import BusinessProfile
+from core.authentication import CachedTokenAuthentication, SignedTokenAuthentication
+from core.bulk import BulkProfileCreateMixin
+from core.conditional import ConditionalProfileMixin
+from core.exports import ProfileExportMixin
+from core.fastpath import FastListMixin
+from core.filters import PROFILE_FILTERS, IndexedFilterBackend, profile_plans
+from core.fieldsets import SparseFieldsetsViewMixin
+from core.pagination import ProfileCursorPagination, SearchPagination
+from core.profile_cache import CachedProfileMixin
 
 class UpdateBusinessActiveStatusView(generics.UpdateAPIView):
     """API endpoint to update the is_active field of a business."""
@@ -26,20 +42,85 @@ class UpdateBusinessActiveStatusView(generics.UpdateAPIView):
 class BusinessProfileCreateView(generics.CreateAPIView):
     serializer_class = BusinessProfileSerializer
 
-class BusinessProfileGetView(generics.ListAPIView):
+class BusinessProfileBulkCreateView(BulkProfileCreateMixin, generics.GenericAPIView):
+    """Only admin can create profiles in bulk."""
+    serializer_class = BusinessProfileSerializer
+
+class BusinessProfileGetView(FastListMixin, SparseFieldsetsViewMixin, generics.ListAPIView):
     """Only admin can see the list of business profiles."""
-    queryset = BusinessProfile.objects.all()
+    queryset = BusinessProfile.objects.select_related('user', 'location')
     serializer_class = BusinessProfileSerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = ProfileCursorPagination
+    filter_backends = [IndexedFilterBackend]
+    profile_filters = PROFILE_FILTERS
+    index_plans = profile_plans(
+        'businessprofile_created_id_idx', 'business_role_active_idx', 'business_country_city_idx'
+    )
 
-class ManageBusinessProfileView(generics.RetrieveUpdateDestroyAPIView):
+class BusinessProfileExportView(SparseFieldsetsViewMixin, ProfileExportMixin, generics.GenericAPIView):
+    """Only admin can export business profiles."""
+    queryset = BusinessProfile.objects.select_related('user', 'location')
+    serializer_class = BusinessProfileSerializer
+    export_name = 'business-profiles'
+
+class ManageBusinessProfileView(ConditionalProfileMixin, CachedProfileMixin, SparseFieldsetsViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """Manage the authenticated business profiles."""
 
-    queryset = BusinessProfile.objects.all()
+    queryset = BusinessProfile.objects.select_related('user', 'location')
     serializer_class = BusinessProfileSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SignedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
         """Retrieve and return the authenticated business profiles."""
-        return self.request.user.business_profile
\ No newline at end of file
+        return get_object_or_404(self.get_queryset(), user=self.request.user)
+
+
+class BusinessProfileNearbyView(SparseFieldsetsViewMixin, generics.ListAPIView):
+    """List business profiles within a radius (km), nearest first."""
+
+    queryset = BusinessProfile.objects.select_related('location')
+    serializer_class = NearbyBusinessProfileSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = SearchPagination
+
+    def get_queryset(self):
+        query = NearbyQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        lat = query.validated_data['lat']
+        lon = query.validated_data['lon']
+        radius = query.validated_data['radius']
+
+        queryset = super().get_queryset().filter(
+            user__is_active=True,
+            location__latitude__isnull=False,
+        )
+        # Narrow candidates with the indexed geohash column before computing
+        # exact distances: the circle always fits in the 3x3 cell block.
+        precision = geo.precision_for_radius(lat, radius)
+        if precision:
+            cells = Q()
+            for cell in geo.neighbours(lat, lon, precision):
+                cells |= Q(location__geohash__startswith=cell)
+            queryset = queryset.filter(cells)
+
+        return queryset.annotate(
+            distance=geo.distance_expression(lat, lon, prefix='location__'),
+        ).filter(distance__lte=radius).order_by('distance', 'id')
+
+
+class BusinessProfileSearchView(SparseFieldsetsViewMixin, generics.ListAPIView):
+    """Search business profiles by name and type, most relevant first."""
+
+    queryset = BusinessProfile.objects.select_related('location')
+    serializer_class = BusinessSearchProfileSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = SearchPagination
+
+    def get_queryset(self):
+        query = BusinessSearchQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+
+        queryset = super().get_queryset().filter(user__is_active=True)
+        return search.search_businesses(queryset, query.validated_data['q'])
@@ -0,0 +1,76 @@
+"""
+Account state changes that end sessions.
+
+end_sessions() revokes a user's signed tokens and deletes their DB token;
+every password change goes through it.
+
+set_active() flips is_active with a single UPDATE ... WHERE id IN
+(<selection>) RETURNING id. Deactivating also deletes the users' auth
+tokens and bumps their tokenVersion in the same transaction, so neither
+database nor signed tokens keep working. No model signals are sent, so the auth snapshots,
+token versions and profile payloads cached for the changed users are
+dropped explicitly once the transaction commits.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from rest_framework.authtoken.models import Token
+
+from core import authentication, profile_cache, tokens
+
+
+CACHE_CHUNK = 1000  # Users invalidated per round of cache calls
+
+
+def invalidate(user_ids):
+    """Drop everything cached for the users, chunk by chunk."""
+    for start in range(0, len(user_ids), CACHE_CHUNK):
+        chunk = user_ids[start:start + CACHE_CHUNK]
+        authentication.invalidate_users(chunk)
+        cache.delete_many([tokens.version_key(user_id) for user_id in chunk])
+        profile_cache.invalidate(*chunk)
+
+
+def end_sessions(user_id):
+    """Revoke the user's signed tokens and delete their DB token."""
+    tokens.revoke(user_id)
+    Token.objects.filter(user_id=user_id).delete()
+
+
+def set_active(queryset, is_active):
+    """Set is_active on the users of queryset; return the changed ids."""
+    User = get_user_model()
+    q = connection.ops.quote_name
+    column = {
+        name: q(User._meta.get_field(name).column)
+        for name in ("is_active", "updatedAt", "tokenVersion")
+    }
+    assignments = f"{column['is_active']} = %s, {column['updatedAt']} = %s"
+    if not is_active:
+        assignments += (
+            f", {column['tokenVersion']} = {column['tokenVersion']} + 1"
+        )
+    selection, params = (
+        queryset.exclude(is_active=is_active).values("pk")
+        .query.sql_with_params()
+    )
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {q(User._meta.db_table)} SET {assignments} "
+            f"WHERE {q(User._meta.pk.column)} IN ({selection}) "
+            f"RETURNING {q(User._meta.pk.column)}",
+            [is_active, timezone.now(), *params],
+        )
+        user_ids = [row[0] for row in cursor.fetchall()]
+        if user_ids and not is_active:
+            cursor.execute(
+                f"DELETE FROM {q(Token._meta.db_table)} "
+                "WHERE user_id = ANY(%s)",
+                [user_ids],
+            )
+        transaction.on_commit(lambda: invalidate(user_ids))
+    return user_ids
@@ -44,6 +44,8 @@ class UserAdmin(BaseUserAdmin):
 admin.site.register(models.User, UserAdmin)
 admin.site.register(models.UserProfile)
 admin.site.register(models.Location)
+admin.site.register(models.GeocodeCache)
+admin.site.register(models.OutboxEmail)
 admin.site.register(models.AdminProfile)
 admin.site.register(models.BusinessProfile)
 
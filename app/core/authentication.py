@@ -0,0 +1,136 @@
+"""
+Token authentication backed by the shared cache.
+
+Token -> user snapshots live in the Django cache, so most requests
+authenticate without touching the database. A snapshot holds only the
+fields authorization needs; the rest of the user, password hash included,
+loads from the database when accessed. Saving or deleting a user and
+deleting a token drop the entry (see core.signals), and since every request
+reads the shared cache, no process keeps serving a revoked token.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from core import tokens
+
+
+SNAPSHOT_FIELDS = ("id", "is_active", "is_staff", "role", "tokenVersion")
+
+
+def token_cache_key(key):
+    """Return the cache key of a token, without exposing the token."""
+    return "auth:token:" + hashlib.sha256(key.encode()).hexdigest()
+
+
+def user_cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def snapshot(user):
+    """Return the user's SNAPSHOT_FIELDS values."""
+    return tuple(getattr(user, name) for name in SNAPSHOT_FIELDS)
+
+
+def restore(values):
+    """Return a User with only the snapshot fields loaded."""
+    User = get_user_model()
+    loaded = dict(zip(SNAPSHOT_FIELDS, values))
+    names = [
+        field.attname
+        for field in User._meta.concrete_fields
+        if field.attname in loaded
+    ]
+    return User.from_db("default", names, [loaded[name] for name in names])
+
+
+def invalidate_token(key):
+    cache.delete(token_cache_key(key))
+
+
+def invalidate_user(user_id):
+    """Drop the cached snapshot of the user's token."""
+    invalidate_users([user_id])
+
+
+def invalidate_users(user_ids):
+    """Drop the cached token snapshots of many users in two cache calls."""
+    user_keys = [user_cache_key(user_id) for user_id in user_ids]
+    cache_keys = list(cache.get_many(user_keys).values())
+    if cache_keys:
+        cache.delete_many(cache_keys + user_keys)
+
+
+def upsert_token(user_id):
+    """Return the user's token key, creating the token if it is missing.
+
+    A single INSERT ... ON CONFLICT statement, so concurrent logins of the
+    same user agree on one token instead of racing on the unique user_id.
+    """
+    table = connection.ops.quote_name(Token._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (key, user_id, created) VALUES (%s, %s, %s) "
+            f"ON CONFLICT (user_id) DO UPDATE SET key = {table}.key "
+            "RETURNING key",
+            [Token.generate_key(), user_id, timezone.now()],
+        )
+        return cursor.fetchone()[0]
+
+
+def token_key(user):
+    """Return the key of a user loaded with select_related("auth_token")."""
+    try:
+        return user.auth_token.key
+    except Token.DoesNotExist:
+        return upsert_token(user.pk)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication serving token -> user lookups from cache."""
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        values = cache.get(cache_key)
+        if values is None:
+            # Raises AuthenticationFailed for unknown tokens and inactive
+            # users, which are therefore never cached.
+            user, _ = super().authenticate_credentials(key)
+            values = snapshot(user)
+            cache.set_many(
+                {cache_key: values, user_cache_key(user.pk): cache_key},
+                settings.AUTH_TOKEN_CACHE_TTL,
+            )
+
+        user = restore(values)
+        token = Token(key=key, user=user)
+        token._state.adding = False
+        return user, token
+
+
+class SignedTokenAuthentication(TokenAuthentication):
+    """Authenticate "Bearer <access token>" headers without the database.
+
+    The user is built from the token's claims; fields the token does not
+    carry are loaded from the database only when accessed.
+    """
+
+    keyword = "Bearer"
+
+    def authenticate_credentials(self, key):
+        try:
+            payload = tokens.verify_access(key)
+        except tokens.InvalidToken:
+            msg = _("Invalid or expired token.")
+            raise exceptions.AuthenticationFailed(msg)
+        return tokens.lazy_user(payload), payload
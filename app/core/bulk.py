@@ -0,0 +1,187 @@
+"""
+Bulk creation of profiles.
+
+A JSON list of profiles, shaped like the create/ payload, is validated item
+by item with the view's serializer. Uniqueness is checked once per unique
+field with an IN query (and against the rest of the batch) instead of once
+per item, passwords are hashed across a process pool (core.hashing), and
+the User, Location and profile rows of the valid items are inserted with
+bulk_create in one transaction. Locations are always queued for the
+geocode_worker command rather than geocoded in the request. Invalid items
+are reported by index.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.utils.translation import gettext as _
+
+from rest_framework import permissions, serializers, status
+from rest_framework.response import Response
+from rest_framework.validators import UniqueValidator
+
+from core.hashing import hash_passwords
+from core.models import Location
+
+
+def pop_unique_validators(serializer, path=()):
+    """Remove the UniqueValidators of a serializer's fields.
+
+    Return (path, validator) pairs, path being the field's keys in the
+    validated data.
+    """
+    found = []
+    for field in serializer.fields.values():
+        if field.read_only:
+            continue
+        source = path + (field.source,)
+        if isinstance(field, serializers.Serializer):
+            found.extend(pop_unique_validators(field, source))
+            continue
+        unique = [
+            v for v in field.validators if isinstance(v, UniqueValidator)
+        ]
+        if unique:
+            field.validators = [v for v in field.validators if v not in unique]
+            found.extend((source, validator) for validator in unique)
+    return found
+
+
+def lookup(data, path):
+    for key in path:
+        data = data.get(key) if data is not None else None
+    return data
+
+
+def add_error(errors, path, message):
+    for key in path[:-1]:
+        errors = errors.setdefault(key, {})
+    errors.setdefault(path[-1], []).append(message)
+
+
+def stored_value(validator, path, value):
+    """Return value as bulk_create_profiles() stores it."""
+    User = get_user_model()
+    if (validator.queryset.model is User
+            and path[-1] == User.get_email_field_name()):
+        return User.objects.normalize_email(value)
+    return value
+
+
+def unique_errors(items, uniques):
+    """Return {index: errors} of items clashing with stored rows or earlier
+    items of the batch, with one query per unique field."""
+    errors = {}
+    for path, validator in uniques:
+        values = {
+            index: stored_value(validator, path, lookup(data, path))
+            for index, data in items.items()
+            if lookup(data, path) is not None
+        }
+        taken = set(
+            validator.queryset
+            .filter(**{f"{path[-1]}__in": set(values.values())})
+            .values_list(path[-1], flat=True)
+        )
+        for index, value in values.items():
+            if value in taken:
+                add_error(errors.setdefault(index, {}), path,
+                          str(validator.message))
+            taken.add(value)
+    return errors
+
+
+def new_location(data):
+    """Return an unsaved Location queued for geocoding.
+
+    Even with GEOCODE_ASYNC off, geocoding a whole batch inline would make
+    the request wait on up to BULK_CREATE_MAX_ITEMS geocoder calls.
+    """
+    return Location(**data, geocodeStatus=Location.PENDING)
+
+
+def bulk_create_profiles(model, items):
+    """Insert the users, locations and profiles of validated items."""
+    User = get_user_model()
+    users = [item.pop("user") for item in items]
+    hashed = hash_passwords(user.pop("password", None) for user in users)
+    locations = [new_location(item.pop("location")) for item in items]
+    with transaction.atomic():
+        Location.objects.bulk_create(locations)
+        users = User.objects.bulk_create([
+            User(
+                email=User.objects.normalize_email(user.pop("email")),
+                password=password,
+                **user,
+            )
+            for user, password in zip(users, hashed)
+        ])
+        return model.objects.bulk_create([
+            model(user=user, location=location, **item)
+            for user, location, item in zip(users, locations, items)
+        ])
+
+
+class BulkProfileCreateMixin:
+    """Create up to BULK_CREATE_MAX_ITEMS profiles from a JSON list.
+
+    Answers 201 when every item was created, 207 when only some were and
+    400 when none were; the body lists the created ids and the errors of
+    the rejected items by index.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        data = request.data
+        if not isinstance(data, list) or not data:
+            msg = _("Expected a non-empty list of profiles.")
+            raise serializers.ValidationError({"non_field_errors": [msg]})
+        if len(data) > settings.BULK_CREATE_MAX_ITEMS:
+            msg = _("Create at most %(count)d profiles at once.") % {
+                "count": settings.BULK_CREATE_MAX_ITEMS
+            }
+            raise serializers.ValidationError({"non_field_errors": [msg]})
+
+        serializer = self.get_serializer()
+        uniques = pop_unique_validators(serializer)
+        valid, errors = {}, {}
+        for index, item in enumerate(data):
+            try:
+                valid[index] = serializer.run_validation(item)
+            except serializers.ValidationError as exc:
+                errors[index] = exc.detail
+        for index, detail in unique_errors(valid, uniques).items():
+            del valid[index]
+            errors[index] = detail
+
+        created = []
+        if valid:
+            try:
+                profiles = bulk_create_profiles(
+                    serializer.Meta.model, list(valid.values())
+                )
+            except IntegrityError:
+                # Another request inserted a clashing row meanwhile.
+                msg = _("Profiles conflict with concurrent changes, retry.")
+                return Response(
+                    {"detail": msg}, status=status.HTTP_409_CONFLICT
+                )
+            created = [
+                {"index": index, "id": profile.pk}
+                for index, profile in zip(valid, profiles)
+            ]
+
+        if not errors:
+            code = status.HTTP_201_CREATED
+        elif created:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response({
+            "created": created,
+            "errors": [
+                {"index": index, "errors": errors[index]}
+                for index in sorted(errors)
+            ],
+        }, status=code)
@@ -0,0 +1,65 @@
+"""
+Caching helpers: an in-process TTL/LRU cache and shared cache counters.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+
+MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a time-to-live."""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=MISSING):
+        """Return the cached value for key, or default if missing/expired."""
+        with self._lock:
+            item = self._data.get(key, MISSING)
+            if item is MISSING:
+                return default
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store value under key, evicting the least recently used entry."""
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def incr(key, timeout=None):
+    """Increment a counter in the shared cache, creating it if missing."""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
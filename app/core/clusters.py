@@ -0,0 +1,199 @@
+"""
+Server-side clustering of locations for map tiles.
+
+A bounding box is snapped to z/x/y tiles of an equirectangular grid
+(2^z columns of longitude by 2^z rows of latitude, counted from the
+north-west). The grid halves longitude and latitude like a geohash does,
+so a tile is exactly the locations whose geohash starts with its first 2z
+bits and is read through the geohash index. Clusters are cached per tile,
+under a version bumped for the tiles containing a location that moved.
+"""
+
+import math
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, FloatField, Q
+from django.db.models.functions import Cast, Substr
+
+from core import geo
+from core.models import Location
+
+
+MAX_ZOOM = 20
+
+PROFILE_RELATIONS = {
+    "user": "userprofile",
+    "admin": "adminprofile",
+    "business": "businessprofile",
+}
+
+
+def precision_for_zoom(zoom):
+    """Return the geohash precision giving a few cells across a map tile."""
+    tile_span = 360.0 / 2 ** zoom
+    for precision in range(1, geo.GEOHASH_PRECISION + 1):
+        if geo.cell_size(precision)[1] <= tile_span / 4:
+            return precision
+    return geo.GEOHASH_PRECISION
+
+
+def geohash_bits(geohash):
+    """Return the bits of a geohash, alternating longitude and latitude."""
+    return "".join(format(geo.BASE32.index(char), "05b") for char in geohash)
+
+
+def tile_bits(zoom, x, y):
+    """Return the geohash bits shared by every point of tile zoom/x/y."""
+    row = 2 ** zoom - 1 - y
+    lon_bits = format(x, f"0{zoom}b") if zoom else ""
+    lat_bits = format(row, f"0{zoom}b") if zoom else ""
+    return "".join(lon + lat for lon, lat in zip(lon_bits, lat_bits))
+
+
+def geohash_prefixes(bits):
+    """Return the geohash prefixes starting with the given bits."""
+    length = math.ceil(len(bits) / 5)
+    extra = 5 * length - len(bits)
+    prefixes = []
+    for suffix in range(2 ** extra):
+        padded = bits + (format(suffix, f"0{extra}b") if extra else "")
+        prefixes.append("".join(
+            geo.BASE32[int(padded[i:i + 5], 2)]
+            for i in range(0, len(padded), 5)
+        ))
+    return prefixes
+
+
+def covering_tiles(bbox, zoom):
+    """Return (zoom, [(x, y), ...]) of the tiles covering a bounding box.
+
+    The zoom is lowered until at most CLUSTER_MAX_TILES tiles cover it.
+    """
+    min_lat, min_lon, max_lat, max_lon = bbox
+    while True:
+        size = 2 ** zoom
+
+        def column(lon):
+            return min(int((lon + 180) / 360 * size), size - 1)
+
+        def row(lat):
+            return min(int((90 - lat) / 180 * size), size - 1)
+
+        rows = range(row(max_lat), row(min_lat) + 1)
+        if min_lon <= max_lon:
+            columns = list(range(column(min_lon), column(max_lon) + 1))
+        else:
+            # The box crosses the antimeridian.
+            columns = (
+                list(range(column(min_lon), size))
+                + list(range(0, column(max_lon) + 1))
+            )
+        if zoom == 0 or len(rows) * len(columns) <= settings.CLUSTER_MAX_TILES:
+            return zoom, [(x, y) for x in columns for y in rows]
+        zoom -= 1
+
+
+def compute_clusters(bits, precision, profile=None):
+    """Aggregate the located rows of a tile by geohash cell."""
+    queryset = Location.objects.filter(geohash__isnull=False)
+    if bits:
+        condition = Q()
+        for prefix in geohash_prefixes(bits):
+            condition |= Q(geohash__startswith=prefix)
+        queryset = queryset.filter(condition)
+    if profile:
+        queryset = queryset.filter(
+            **{f"{PROFILE_RELATIONS[profile]}__isnull": False}
+        )
+
+    rows = (
+        queryset.annotate(cell=Substr("geohash", 1, precision))
+        .values("cell")
+        .annotate(
+            count=Count("id"),
+            latitude=Avg(Cast("latitude", FloatField())),
+            longitude=Avg(Cast("longitude", FloatField())),
+        )
+        .order_by("cell")
+    )
+    return [
+        {
+            "geohash": row["cell"],
+            "count": row["count"],
+            "latitude": row["latitude"],
+            "longitude": row["longitude"],
+        }
+        for row in rows
+    ]
+
+
+def in_bbox(cluster, bbox):
+    min_lat, min_lon, max_lat, max_lon = bbox
+    if not min_lat <= cluster["latitude"] <= max_lat:
+        return False
+    if min_lon <= max_lon:
+        return min_lon <= cluster["longitude"] <= max_lon
+    return cluster["longitude"] >= min_lon or cluster["longitude"] <= max_lon
+
+
+def version_key(bits):
+    return f"clusters:version:{bits}"
+
+
+def get_clusters(bbox, zoom, profile=None):
+    """Return the clusters in a bounding box from the cached tiles.
+
+    Missing tiles are computed and cached; clusters are kept when their
+    centroid is inside the box.
+    """
+    precision = precision_for_zoom(zoom)
+    tile_zoom, tiles = covering_tiles(bbox, zoom)
+    bits = {tile: tile_bits(tile_zoom, *tile) for tile in tiles}
+    versions = cache.get_many([version_key(value) for value in bits.values()])
+    keys = {
+        "clusters:{}/{}/{}:{}:{}:{}".format(
+            tile_zoom, x, y, precision, profile or "all",
+            versions.get(version_key(bits[x, y]), 0),
+        ): (x, y)
+        for x, y in tiles
+    }
+    cached = cache.get_many(keys)
+    missing = {
+        key: compute_clusters(bits[tile], precision, profile)
+        for key, tile in keys.items()
+        if key not in cached
+    }
+    if missing:
+        cache.set_many(missing, timeout=settings.CLUSTER_CACHE_TTL)
+        cached.update(missing)
+
+    clusters = [
+        cluster
+        for key in keys
+        for cluster in cached[key]
+        if in_bbox(cluster, bbox)
+    ]
+    return precision, sorted(clusters, key=lambda cluster: cluster["geohash"])
+
+
+def invalidate(geohashes):
+    """Expire the cached tiles, at every zoom, containing the geohashes.
+
+    A version outlives the tiles cached before it was bumped, so it only
+    needs to be kept for CLUSTER_CACHE_TTL.
+    """
+    keys = set()
+    for geohash in geohashes:
+        if not geohash:
+            continue
+        bits = geohash_bits(geohash)
+        keys.update(
+            version_key(bits[:2 * zoom]) for zoom in range(MAX_ZOOM + 1)
+        )
+    if keys:
+        cache.set_many(
+            dict.fromkeys(keys, uuid.uuid4().hex),
+            timeout=settings.CLUSTER_CACHE_TTL,
+        )
@@ -0,0 +1,123 @@
+"""
+Conditional requests (ETag / Last-Modified) for the profile me/ endpoints.
+
+Validators come from one values_list() query of the profile's, user's and
+location's updatedAt, so an unchanged profile is answered with a 304 (or a
+412 for a stale If-Match on PUT/PATCH/DELETE) without loading or
+serializing it. Writes check their precondition and update in one
+transaction holding row locks on the three rows, so of two concurrent
+writes with the same If-Match the second sees the first's change and gets
+a 412 instead of overwriting it.
+"""
+
+import hashlib
+
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    quote_etag,
+)
+from django.utils.http import http_date
+
+from core.fieldsets import requested_fieldset
+
+
+class ConditionalProfileMixin:
+    """Profile view mixin answering conditional requests cheaply."""
+
+    conditional_methods = ("GET", "HEAD")
+
+    def get_validators(self, lock=False):
+        """Return the (etag, last modified timestamp) of the profile.
+
+        With lock, the profile, user and location rows stay locked until
+        the end of the transaction.
+        """
+        model = self.get_serializer_class().Meta.model
+        queryset = model._default_manager.filter(user=self.request.user)
+        if lock:
+            queryset = queryset.select_for_update()
+        row = (
+            queryset
+            .values_list(
+                "id", "updatedAt", "user__updatedAt", "location__updatedAt"
+            )
+            .first()
+        )
+        if row is None:
+            return None, None
+
+        pk, *stamps = row
+        keep, omit = requested_fieldset(self.request)
+        renderer = getattr(self.request, "accepted_renderer", None)
+        parts = [model._meta.label_lower, str(pk)]
+        parts += [stamp.isoformat() if stamp else "" for stamp in stamps]
+        parts += [
+            ",".join(sorted(keep)) if keep is not None else "*",
+            ",".join(sorted(omit)),
+            getattr(renderer, "format", ""),
+        ]
+        digest = hashlib.sha1("|".join(parts).encode()).hexdigest()
+        last_modified = max(stamp for stamp in stamps if stamp)
+        return quote_etag(digest), int(last_modified.timestamp())
+
+    def set_validators(self, response, etag, last_modified):
+        response.headers["ETag"] = etag
+        response.headers["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validators = None, None
+        if request.method in self.conditional_methods:
+            self.validators = self.get_validators()
+
+    def handle_precondition(self, request):
+        """Return a 304/412 response when a precondition decides it."""
+        etag, last_modified = self.validators
+        if etag is None:
+            return None
+        stub = HttpResponse()
+        self.set_validators(stub, etag, last_modified)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified, response=stub
+        )
+        return None if response is stub else response
+
+    def get(self, request, *args, **kwargs):
+        return self.handle_precondition(request) or super().get(
+            request, *args, **kwargs
+        )
+
+    def write(self, handler, request, *args, **kwargs):
+        """Run a write handler if its precondition holds, atomically."""
+        with transaction.atomic():
+            self.validators = self.get_validators(lock=True)
+            return self.handle_precondition(request) or handler(
+                request, *args, **kwargs
+            )
+
+    def put(self, request, *args, **kwargs):
+        return self.write(super().put, request, *args, **kwargs)
+
+    def patch(self, request, *args, **kwargs):
+        return self.write(super().patch, request, *args, **kwargs)
+
+    def delete(self, request, *args, **kwargs):
+        return self.write(super().delete, request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if response.status_code != 200 or request.method == "DELETE":
+            return response
+        if request.method in ("PUT", "PATCH"):
+            # The update changed the timestamps the validators come from.
+            self.validators = self.get_validators()
+        etag, last_modified = getattr(self, "validators", (None, None))
+        if etag is not None:
+            self.set_validators(response, etag, last_modified)
+        return response
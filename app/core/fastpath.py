@@ -0,0 +1,139 @@
+"""
+Fast read-only serialization for list endpoints.
+
+A serializer's (already pruned) fields are compiled once per request into
+a flat list of values() lookups and per-field converters mirroring the
+fields' to_representation(). Rows are then read as plain dicts, skipping
+model instantiation and DRF's per-field attribute resolution, and come out
+identical to serializer.data.
+"""
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+
+from rest_framework import fields as drf_fields
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from core.pagination import pagination_ordering
+
+
+class Unsupported(Exception):
+    """The serializer has a field the fast path cannot read from values()."""
+
+
+def _identity(value):
+    return value
+
+
+def converter(field):
+    """Return a function converting a non-None value like field would."""
+    if isinstance(field, drf_fields.ChoiceField):
+        choices = field.choice_strings_to_values
+
+        def convert_choice(value):
+            if value == "":
+                return value
+            return choices.get(str(value), value)
+        return convert_choice
+    if isinstance(field, drf_fields.CharField):
+        return str
+    if isinstance(field, drf_fields.IntegerField):
+        return int
+    if isinstance(field, drf_fields.FloatField):
+        return float
+    if isinstance(field, drf_fields.DateField):
+        output_format = getattr(field, "format", api_settings.DATE_FORMAT)
+        if output_format and output_format.lower() == drf_fields.ISO_8601:
+            return lambda value: value.isoformat() if value else None
+    if isinstance(field, drf_fields.ListField):
+        child = converter(field.child)
+        return lambda value: [
+            child(item) if item is not None else None for item in value
+        ]
+    if isinstance(field, drf_fields.DictField):
+        child = converter(field.child)
+        return lambda value: {
+            str(key): child(item) if item is not None else None
+            for key, item in value.items()
+        }
+    if type(field) is drf_fields._UnvalidatedField:
+        return _identity
+    return field.to_representation
+
+
+def _lookup(queryset, model, prefix, field):
+    source = "__".join(field.source_attrs)
+    path = prefix + source
+    if not prefix and source in queryset.query.annotations:
+        return path, None
+    try:
+        return path, model._meta.get_field(source)
+    except FieldDoesNotExist:
+        raise Unsupported(field.field_name)
+
+
+def compile_plan(serializer, queryset, model=None, prefix=""):
+    """Return (values() paths, row builder) for a serializer's fields."""
+    model = model or queryset.model
+    paths = []
+    steps = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == "*":
+            raise Unsupported(name)
+        path, model_field = _lookup(queryset, model, prefix, field)
+        paths.append(path)
+        if isinstance(field, serializers.BaseSerializer):
+            if not isinstance(field, serializers.Serializer):
+                raise Unsupported(name)
+            nested_paths, nested_build = compile_plan(
+                field, queryset, model_field.related_model, path + "__"
+            )
+            paths.extend(nested_paths)
+            steps.append((name, path, nested_build, True))
+        else:
+            steps.append((name, path, converter(field), False))
+
+    def build(row):
+        data = {}
+        for name, path, convert, nested in steps:
+            value = row[path]
+            if value is None:
+                data[name] = None
+            elif nested:
+                data[name] = convert(row)
+            else:
+                data[name] = convert(value)
+        return data
+
+    return paths, build
+
+
+class FastListMixin:
+    """List view mixin serving rows through the compiled fast path.
+
+    Falls back to the regular serializer when FAST_LIST_SERIALIZATION is
+    off or the serializer has fields the fast path cannot compile.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_LIST_SERIALIZATION:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            paths, build = compile_plan(self.get_serializer(), queryset)
+        except Unsupported:
+            return super().list(request, *args, **kwargs)
+
+        # The cursor paginator reads its ordering fields from each row.
+        extra = pagination_ordering(self, queryset)
+        rows = queryset.values(*paths, *[n for n in extra if n not in paths])
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response([build(row) for row in page])
+        return Response([build(row) for row in rows])
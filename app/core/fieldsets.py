@@ -0,0 +1,124 @@
+"""
+Sparse fieldsets for the profile APIs.
+
+Clients list the fields they want with ?fields=firstName,user.username or
+drop fields with ?omit=interests,location. Dotted names select fields of
+nested serializers. The same selection prunes the database query so unused
+columns are deferred and unused relations are not joined.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.translation import gettext as _
+
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from core.pagination import pagination_ordering
+
+
+def requested_fieldset(request):
+    """Return the (fields, omit) sets requested by a read request."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None, set()
+
+    def parse(name):
+        value = request.query_params.get(name)
+        if value is None:
+            return None
+        return {part.strip() for part in value.split(",") if part.strip()}
+
+    return parse("fields"), parse("omit") or set()
+
+
+def field_paths(fields, prefix=""):
+    """Return the dotted names of readable serializer fields."""
+    paths = set()
+    for name, field in fields.items():
+        if field.write_only:
+            continue
+        paths.add(prefix + name)
+        if isinstance(field, serializers.Serializer):
+            paths |= field_paths(field.fields, f"{prefix}{name}.")
+    return paths
+
+
+def prune_fields(fields, keep, omit, prefix=""):
+    """Remove serializer fields not selected by keep/omit, in place."""
+    for name in list(fields):
+        path = prefix + name
+        field = fields[name]
+        nested = isinstance(field, serializers.Serializer)
+        if path in omit:
+            del fields[name]
+            continue
+
+        nested_keep = None
+        if keep is not None and path not in keep:
+            if not nested or not any(k.startswith(path + ".") for k in keep):
+                del fields[name]
+                continue
+            nested_keep = keep
+        if nested:
+            prune_fields(field.fields, nested_keep, omit, path + ".")
+
+
+class SparseFieldsetsMixin:
+    """Serializer mixin applying ?fields= and ?omit= to its fields."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        keep, omit = requested_fieldset(self.context.get("request"))
+        if keep is None and not omit:
+            return
+
+        unknown = ((keep or set()) | omit) - field_paths(self.fields)
+        if unknown:
+            msg = _("Unknown fields: %(fields)s") % {
+                "fields": ", ".join(sorted(unknown))
+            }
+            raise serializers.ValidationError({"fields": msg}, code="invalid")
+        prune_fields(self.fields, keep, omit)
+
+
+def model_paths(fields, model, prefix=""):
+    """Return (only() paths, select_related() relations) for fields."""
+    paths = []
+    relations = []
+    for field in fields.values():
+        if field.write_only or field.source == "*":
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+        path = prefix + field.source
+        paths.append(path)
+        if isinstance(field, serializers.Serializer):
+            relations.append(path)
+            nested_paths, nested_relations = model_paths(
+                field.fields, model_field.related_model, path + "__"
+            )
+            paths.extend(nested_paths)
+            relations.extend(nested_relations)
+    return paths, relations
+
+
+class SparseFieldsetsViewMixin:
+    """View mixin deferring columns and joins the response does not use."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        keep, omit = requested_fieldset(self.request)
+        if keep is None and not omit:
+            return queryset
+
+        paths, relations = model_paths(
+            self.get_serializer().fields, queryset.model
+        )
+        # Fields the paginator orders by are read from every row.
+        paths.extend(pagination_ordering(self, queryset))
+        queryset = queryset.select_related(None).only(*paths)
+        if relations:
+            # select_related() without arguments would follow every relation.
+            queryset = queryset.select_related(*relations)
+        return queryset
@@ -0,0 +1,170 @@
+"""
+Declarative, index-backed filtering and ordering for the profile lists.
+
+Views list their filters and the index plans allowed to answer them:
+
+    profile_filters = {
+        "gender": Filter("gender", serializers.ChoiceField(GENDERS)),
+        "created_after": Filter("createdAt", serializers.DateTimeField(),
+                                lookup="gte"),
+    }
+    index_plans = [
+        IndexPlan("userprofile_gender_idx", filters=["gender"],
+                  ranges=["created_after"], ordering=["createdAt"]),
+    ]
+
+A request is accepted when one plan covers it: its equality filters are a
+prefix of the plan's filters (the plan index's leading columns), its range
+filters are among the plan's ranges and its ordering, ?ordering= or else the
+pagination's default, among the plan's orderings. Anything else is rejected
+with a 400 instead of being answered by a sequential scan.
+
+Plans must name an index on the listed table itself: the cursor pages by
+(createdAt, id) of the profile, which an index on a joined table cannot
+return in order. The user and location columns filtered on are therefore
+copied onto the profile tables (kept current by database triggers) and
+indexed as (<filters>, createdAt, id), so even a coarse filter such as
+role is a range scan already in cursor order.
+"""
+
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext as _
+
+from rest_framework import serializers
+from rest_framework.filters import OrderingFilter
+
+
+class Filter:
+    """A query parameter filtering on lookup, parsed by a DRF field."""
+
+    def __init__(self, path, field, lookup="exact"):
+        self.path = path
+        self.field = field
+        self.lookup = lookup
+
+    @property
+    def is_range(self):
+        return self.lookup != "exact"
+
+    def parse(self, name, value):
+        try:
+            return self.field.run_validation(value)
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError({name: exc.detail})
+
+    def as_kwargs(self, value):
+        if self.lookup == "exact":
+            return {self.path: value}
+        return {f"{self.path}__{self.lookup}": value}
+
+
+class IndexPlan:
+    """Filters and orderings one index answers."""
+
+    def __init__(self, index, filters=(), ranges=(), ordering=()):
+        self.index = index
+        self.filters = list(filters)
+        self.ranges = set(ranges)
+        self.ordering = set(ordering)
+
+    def covers(self, equal, ranges, ordering):
+        prefix = self.filters[:len(equal)]
+        return (
+            set(prefix) == set(equal)
+            and ranges <= self.ranges
+            and ordering in self.ordering
+        )
+
+
+class IndexedFilterBackend(OrderingFilter):
+    """Apply a view's declared filters once an index plan covers them."""
+
+    def requested(self, request, view):
+        filters = getattr(view, "profile_filters", {})
+        values = {}
+        for name, profile_filter in filters.items():
+            value = request.query_params.get(name)
+            if value is not None:
+                values[name] = profile_filter.parse(name, value)
+        ordering = request.query_params.get(self.ordering_param)
+        return values, ordering or None
+
+    def get_plan(self, request, view):
+        """Return the index plan answering the request, or raise a 400."""
+        values, ordering = self.requested(request, view)
+        if not values and ordering is None:
+            return None, values, ordering
+
+        filters = view.profile_filters
+        equal = {name for name in values if not filters[name].is_range}
+        ranges = set(values) - equal
+        effective = ordering or self.get_default_ordering(view)[0]
+        for plan in view.index_plans:
+            if plan.covers(equal, ranges, effective):
+                return plan, values, ordering
+
+        requested = sorted(values)
+        requested.append(f"{self.ordering_param}={effective}")
+        msg = _("No index supports filtering by %(requested)s.") % {
+            "requested": ", ".join(requested)
+        }
+        raise serializers.ValidationError({"filters": msg}, code="invalid")
+
+    def get_default_ordering(self, view):
+        ordering = getattr(view, "ordering", None)
+        if ordering is None:
+            ordering = view.pagination_class.ordering
+        return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = self.get_plan(request, view)[2]
+        if ordering is None:
+            return self.get_default_ordering(view)
+        # The id breaks ties in the same direction as the requested field.
+        return (ordering, "-id" if ordering.startswith("-") else "id")
+
+    def filter_queryset(self, request, queryset, view):
+        values = self.get_plan(request, view)[1]
+        filters = view.profile_filters
+        for name, value in values.items():
+            queryset = queryset.filter(**filters[name].as_kwargs(value))
+        return queryset.order_by(*self.get_ordering(request, queryset, view))
+
+
+CREATED_ORDERING = ["createdAt", "-createdAt"]
+CREATED_RANGES = ["created_after", "created_before"]
+
+# Filters every profile list accepts, on columns the profile tables copy
+# from their user and location.
+PROFILE_FILTERS = {
+    "role": Filter(
+        "userRole",
+        serializers.ChoiceField(choices=get_user_model().role_choices),
+    ),
+    "is_active": Filter("userIsActive", serializers.BooleanField()),
+    "country": Filter("locationCountry", serializers.CharField()),
+    "city": Filter("locationCity", serializers.CharField()),
+    "created_after": Filter(
+        "createdAt", serializers.DateTimeField(), lookup="gte"
+    ),
+    "created_before": Filter(
+        "createdAt", serializers.DateTimeField(), lookup="lt"
+    ),
+}
+
+
+def profile_plans(created_index, role_index, place_index):
+    """Return the index plans of PROFILE_FILTERS for a profile table."""
+    return [
+        IndexPlan(
+            created_index, ranges=CREATED_RANGES, ordering=CREATED_ORDERING
+        ),
+        IndexPlan(
+            role_index, filters=["role", "is_active"],
+            ranges=CREATED_RANGES, ordering=CREATED_ORDERING,
+        ),
+        IndexPlan(
+            place_index, filters=["country", "city"],
+            ranges=CREATED_RANGES, ordering=CREATED_ORDERING,
+        ),
+    ]
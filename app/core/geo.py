@@ -0,0 +1,117 @@
+"""
+Geohash encoding and great-circle distance helpers.
+"""
+
+import math
+
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import (
+    ASin,
+    Cast,
+    Cos,
+    Power,
+    Radians,
+    Sin,
+    Sqrt,
+)
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+GEOHASH_PRECISION = 12
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Return the geohash of a point."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            middle = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= middle:
+                value = value * 2 + 1
+                lon_range[0] = middle
+            else:
+                value *= 2
+                lon_range[1] = middle
+        else:
+            middle = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= middle:
+                value = value * 2 + 1
+                lat_range[0] = middle
+            else:
+                value *= 2
+                lat_range[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """Return the (latitude, longitude) span in degrees of a geohash cell."""
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def neighbours(latitude, longitude, precision):
+    """Return the geohash cell containing a point and its eight neighbours."""
+    lat_span, lon_span = cell_size(precision)
+    cells = set()
+    for lat_step in (-1, 0, 1):
+        cell_lat = latitude + lat_step * lat_span
+        if not -90 <= cell_lat <= 90:
+            continue
+        for lon_step in (-1, 0, 1):
+            cell_lon = longitude + lon_step * lon_span
+            cell_lon = (cell_lon + 180) % 360 - 180
+            cells.add(encode(cell_lat, cell_lon, precision))
+    return sorted(cells)
+
+
+def precision_for_radius(latitude, radius_km):
+    """Return the finest geohash precision whose cells span radius_km.
+
+    A circle of that radius then always fits inside the 3x3 block of cells
+    around its centre. Returns 0 when even a one-character cell is too small.
+    """
+    shrink = max(math.cos(math.radians(latitude)), 0.01)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_span, lon_span = cell_size(precision)
+        height_km = lat_span * KM_PER_DEGREE
+        width_km = lon_span * KM_PER_DEGREE * shrink
+        if min(height_km, width_km) >= radius_km:
+            return precision
+    return 0
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Return the great-circle distance between two points in km."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def distance_expression(latitude, longitude, prefix=""):
+    """Return a query expression for the distance in km to a point."""
+    lat = Radians(Cast(F(f"{prefix}latitude"), FloatField()))
+    lon = Radians(Cast(F(f"{prefix}longitude"), FloatField()))
+    origin_lat = Value(math.radians(latitude), output_field=FloatField())
+    origin_lon = Value(math.radians(longitude), output_field=FloatField())
+    a = (
+        Power(Sin((lat - origin_lat) / 2), 2)
+        + Cos(origin_lat) * Cos(lat) * Power(Sin((lon - origin_lon) / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(a))
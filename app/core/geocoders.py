@@ -0,0 +1,154 @@
+"""
+Geocoder backends selected by the GEOCODER_BACKENDS setting.
+"""
+
+import bisect
+import csv
+import difflib
+import functools
+import re
+import unicodedata
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from geopy.geocoders import Nominatim
+
+
+def normalize_component(text):
+    """Casefold a single address component and strip punctuation."""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = re.sub(r"[^\w\s-]", "", text)
+    return " ".join(text.split())
+
+
+class BaseGeocoder:
+    """Interface for geocoder backends."""
+
+    def geocode(self, address):
+        """Return (latitude, longitude), or None if the address is unknown.
+
+        Returning None lets the next configured backend try the address.
+        """
+        raise NotImplementedError
+
+
+class NominatimGeocoder(BaseGeocoder):
+    """Remote geocoding through OpenStreetMap Nominatim."""
+
+    def __init__(self, user_agent="geopy/1.0", timeout=1):
+        self.client = Nominatim(user_agent=user_agent, timeout=timeout)
+
+    def geocode(self, address):
+        location = self.client.geocode(address)
+        if location:
+            return location.latitude, location.longitude
+        return None
+
+
+class GazetteerGeocoder(BaseGeocoder):
+    """Offline city-level geocoding from a GeoNames-style CSV file.
+
+    The file needs city, state, country, latitude and longitude columns
+    and may have a population column used to rank ambiguous names.
+    Addresses are matched on their last three components, first exactly,
+    then by city and country, then by city prefix and finally by a fuzzy
+    match on the city name within the country.
+    """
+
+    def __init__(self, path, fuzzy_cutoff=0.85, min_prefix=3):
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.min_prefix = min_prefix
+        self.places = {}
+        self.cities = {}
+        self.names = {}
+        with open(path, newline="", encoding="utf-8") as gazetteer:
+            for row in csv.DictReader(gazetteer):
+                self._add(row)
+        for country, cities in self.cities.items():
+            self.names[country] = sorted(cities)
+
+    def _add(self, row):
+        city = normalize_component(row["city"])
+        state = normalize_component(row.get("state"))
+        country = normalize_component(row["country"])
+        point = (float(row["latitude"]), float(row["longitude"]))
+        population = int(row.get("population") or 0)
+
+        self.places.setdefault((city, state, country), point)
+        best = self.cities.setdefault(country, {}).get(city)
+        if best is None or population > best[1]:
+            self.cities[country][city] = (point, population)
+
+    def geocode(self, address):
+        parts = [normalize_component(part) for part in address.split(",")]
+        parts = [part for part in parts if part and part != "none"]
+        if len(parts) < 2:
+            return None
+        city, country = parts[-3 if len(parts) >= 3 else -2], parts[-1]
+        if len(parts) >= 3:
+            point = self.places.get((city, parts[-2], country))
+            if point is not None:
+                return point
+
+        cities = self.cities.get(country)
+        if not cities:
+            return None
+        if city in cities:
+            return cities[city][0]
+        name = self._prefix_match(country, city) or self._fuzzy_match(
+            country, city
+        )
+        return cities[name][0] if name else None
+
+    def _prefix_match(self, country, city):
+        if len(city) < self.min_prefix:
+            return None
+        names = self.names[country]
+        cities = self.cities[country]
+        start = bisect.bisect_left(names, city)
+        best = None
+        for name in names[start:]:
+            if not name.startswith(city):
+                break
+            if best is None or cities[name][1] > cities[best][1]:
+                best = name
+        return best
+
+    def _fuzzy_match(self, country, city):
+        matches = difflib.get_close_matches(
+            city, self.names[country], n=1, cutoff=self.fuzzy_cutoff
+        )
+        return matches[0] if matches else None
+
+
+class ChainGeocoder(BaseGeocoder):
+    """Try each backend in order until one knows the address."""
+
+    def __init__(self, backends):
+        self.backends = backends
+
+    def geocode(self, address):
+        for backend in self.backends:
+            point = backend.geocode(address)
+            if point is not None:
+                return point
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def get_geocoder():
+    """Return the process-wide geocoder built from settings."""
+    backends = []
+    for config in settings.GEOCODER_BACKENDS:
+        backend_class = import_string(config["BACKEND"])
+        backends.append(backend_class(**config.get("OPTIONS", {})))
+    return ChainGeocoder(backends)
+
+
+@receiver(setting_changed)
+def reset_geocoder(*, setting, **kwargs):
+    if setting == "GEOCODER_BACKENDS":
+        get_geocoder.cache_clear()
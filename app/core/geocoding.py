@@ -0,0 +1,232 @@
+"""
+Geocoding service with a two-level (memory + database) cache.
+"""
+
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from geopy.exc import GeocoderServiceError
+
+from core.cache import TTLCache, MISSING
+from core.geocoders import get_geocoder, normalize_component
+from core.models import GeocodeCache, Location
+
+
+NOT_FOUND = (None, None)
+
+memory_cache = TTLCache(
+    maxsize=getattr(settings, "GEOCODE_CACHE_SIZE", 10000),
+    ttl=getattr(settings, "GEOCODE_CACHE_TTL", 60 * 60),
+)
+
+
+def normalize_address(address):
+    """Return the canonical cache key for a free-form address."""
+    parts = [normalize_component(part) for part in (address or "").split(",")]
+    return ", ".join(part for part in parts if part and part != "none")
+
+
+def geocode(address):
+    """Return (latitude, longitude) for an address, or (None, None)."""
+    try:
+        return resolve(address)
+    except GeocoderServiceError:
+        return NOT_FOUND
+
+
+def resolve(address):
+    """Return (latitude, longitude) for an address, or (None, None).
+
+    Raises GeocoderServiceError when the geocoder fails (timeouts, outages,
+    rate limits); these failures are not cached so a later call retries.
+    """
+    key = normalize_address(address)
+    if not key:
+        return NOT_FOUND
+
+    coordinates = get_cached(key)
+    if coordinates is not MISSING:
+        return coordinates
+
+    coordinates = lookup(address)
+    store(key, coordinates)
+    return coordinates
+
+
+def get_cached(key):
+    """Return cached coordinates for a normalized address, or MISSING."""
+    coordinates = memory_cache.get(key)
+    if coordinates is not MISSING:
+        return coordinates
+
+    entry = GeocodeCache.objects.filter(address=key).first()
+    if entry is None or _is_expired(entry):
+        return MISSING
+    coordinates = _coordinates(entry)
+    _remember(key, coordinates)
+    return coordinates
+
+
+def store(key, coordinates):
+    """Save coordinates for a normalized address in both cache levels."""
+    GeocodeCache.objects.update_or_create(
+        address=key,
+        defaults={"latitude": coordinates[0], "longitude": coordinates[1]},
+    )
+    _remember(key, coordinates)
+
+
+def lookup(address):
+    """Query the configured geocoder backends, bypassing the cache."""
+    point = get_geocoder().geocode(address)
+    return point if point is not None else NOT_FOUND
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing calls at most `rate` per second apart."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until the caller may make its next call."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def location_address(location):
+    """Return the address string geocoded for a Location."""
+    return ", ".join(
+        str(part)
+        for part in (
+            location.street, location.city, location.state, location.country
+        )
+    )
+
+
+def geocode_status(latitude):
+    """Return the Location status matching a geocoding outcome."""
+    return Location.DONE if latitude is not None else Location.FAILED
+
+
+def claim_pending(batch_size):
+    """Mark a batch of queued locations as being geocoded and return it.
+
+    Rows locked by another worker are skipped. Claims older than
+    GEOCODE_CLAIM_TIMEOUT belong to a worker that died and are taken over.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.GEOCODE_CLAIM_TIMEOUT)
+    with transaction.atomic():
+        locations = list(
+            Location.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(geocodeStatus=Location.PENDING)
+                | Q(geocodeStatus=Location.GEOCODING, updatedAt__lt=stale)
+            )
+            .order_by("id")[:batch_size]
+        )
+        Location.objects.filter(
+            pk__in=[location.pk for location in locations]
+        ).update(geocodeStatus=Location.GEOCODING, updatedAt=now)
+    return locations
+
+
+def save_claimed(location, fields):
+    """Save fields of a claimed location unless its claim was dropped.
+
+    An address edited while it was being geocoded is queued again and
+    keeps its new state.
+    """
+    with transaction.atomic():
+        current = (
+            Location.objects.select_for_update()
+            .filter(pk=location.pk, geocodeStatus=Location.GEOCODING)
+            .first()
+        )
+        if current is None:
+            return False
+        for name in fields:
+            setattr(current, name, getattr(location, name))
+        current.save(update_fields=[*fields, "updatedAt"])
+    return True
+
+
+def resolve_location(location):
+    """Geocode a claimed Location and save its coordinates and status."""
+    latitude, longitude = resolve(location_address(location))
+    location.latitude = latitude
+    location.longitude = longitude
+    location.geocodeStatus = geocode_status(latitude)
+    save_claimed(location, ["latitude", "longitude", "geocodeStatus"])
+    return location
+
+
+def retry_location(location):
+    """Queue a location again after a geocoder failure.
+
+    It is marked FAILED once it used up GEOCODE_MAX_ATTEMPTS attempts.
+    """
+    location.geocodeAttempts += 1
+    location.geocodeStatus = Location.PENDING
+    if location.geocodeAttempts >= settings.GEOCODE_MAX_ATTEMPTS:
+        location.geocodeStatus = Location.FAILED
+    save_claimed(location, ["geocodeAttempts", "geocodeStatus"])
+
+
+def geocode_pending(batch_size=50):
+    """Resolve one batch of pending locations and return its size.
+
+    The batch is claimed in a short transaction and each location is then
+    geocoded and saved on its own, so no lock or transaction is held
+    across the geocoder requests. When the geocoder fails the location is
+    retried later, the rest of the batch is released and the
+    GeocoderServiceError is re-raised so the caller can back off.
+    """
+    locations = claim_pending(batch_size)
+    for index, location in enumerate(locations):
+        try:
+            resolve_location(location)
+        except GeocoderServiceError:
+            retry_location(location)
+            Location.objects.filter(
+                pk__in=[rest.pk for rest in locations[index + 1:]],
+                geocodeStatus=Location.GEOCODING,
+            ).update(geocodeStatus=Location.PENDING)
+            raise
+    return len(locations)
+
+
+def _coordinates(entry):
+    if not entry.found:
+        return NOT_FOUND
+    return float(entry.latitude), float(entry.longitude)
+
+
+def _is_expired(entry):
+    """Negative results expire so addresses that failed are retried."""
+    if entry.found:
+        return False
+    ttl = getattr(settings, "GEOCODE_NEGATIVE_TTL", 24 * 60 * 60)
+    return entry.updatedAt < timezone.now() - timedelta(seconds=ttl)
+
+
+def _remember(key, coordinates):
+    ttl = None
+    if coordinates == NOT_FOUND:
+        ttl = getattr(settings, "GEOCODE_NEGATIVE_CACHE_TTL", 5 * 60)
+    memory_cache.set(key, coordinates, ttl=ttl)
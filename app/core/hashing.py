@@ -0,0 +1,72 @@
+"""
+Password hashing across a process pool.
+
+PBKDF2 is CPU bound and holds the GIL, so hashing many passwords in one
+request only scales across processes. The pool is started on first use and
+kept for the life of the process; its workers are spawned rather than
+forked, so they do not inherit the server's threads, locks or database
+connections. Small batches are hashed inline.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+
+def _setup():
+    # Spawned (rather than forked) workers start without Django configured.
+    if not apps.ready:
+        django.setup()
+
+
+def _hash_chunk(passwords):
+    return [make_password(password) for password in passwords]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def max_workers():
+    return settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+
+
+def get_pool():
+    """Return the shared hashing pool, starting it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_setup,
+            )
+        return _pool
+
+
+def hash_passwords(passwords):
+    """Return make_password() of every password, in order."""
+    passwords = list(passwords)
+    workers = min(
+        max_workers(),
+        len(passwords) // settings.PASSWORD_HASH_MIN_PER_WORKER,
+    )
+    if workers <= 1:
+        return _hash_chunk(passwords)
+
+    size = -(-len(passwords) // workers)
+    chunks = [
+        passwords[start:start + size]
+        for start in range(0, len(passwords), size)
+    ]
+    return [
+        hashed
+        for chunk in get_pool().map(_hash_chunk, chunks)
+        for hashed in chunk
+    ]
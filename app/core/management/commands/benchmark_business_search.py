@@ -0,0 +1,111 @@
+"""
+Django command measuring business search on a synthetic dataset.
+"""
+
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core import search
+from core.models import BusinessProfile, Location
+
+
+NAMES = [
+    "Golden", "Harbour", "Maple", "Urban", "Sunrise", "Royal", "Green",
+    "Blue", "Corner", "Riverside", "Summit", "Crescent", "Liberty", "Oak",
+]
+TYPES = [
+    "restaurant", "bakery", "bookstore", "pharmacy", "gym", "florist",
+    "barber", "hardware store", "coffee shop", "tailor", "grocery",
+]
+
+
+class Rollback(Exception):
+    """Raised to discard the synthetic rows."""
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the business search"""
+
+    help = (
+        "Insert synthetic business profiles in a rolled back transaction and "
+        "print the plan and timing of search queries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000000)
+        parser.add_argument("--chunk-size", type=int, default=10000)
+        parser.add_argument(
+            "--query", action="append", dest="queries",
+            help="Search text to benchmark; may be repeated.",
+        )
+
+    def handle(self, *args, **options):
+        "Entry point for command"
+        queries = options["queries"] or ["harbour bakery", "resturant", "cof"]
+        try:
+            with transaction.atomic():
+                self._seed(options["rows"], options["chunk_size"])
+                for text in queries:
+                    self._run(text)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _seed(self, rows, chunk_size):
+        started = time.perf_counter()
+        rng = random.Random(0)
+        User = get_user_model()
+        for start in range(0, rows, chunk_size):
+            indexes = range(start, min(start + chunk_size, rows))
+            users = User.objects.bulk_create(
+                User(
+                    email=f"search{index}@example.com",
+                    username=f"search{index}",
+                    password="!",
+                )
+                for index in indexes
+            )
+            locations = Location.objects.bulk_create(
+                Location(city="city", geocodeStatus=Location.FAILED)
+                for _ in indexes
+            )
+            BusinessProfile.objects.bulk_create(
+                BusinessProfile(
+                    user=user,
+                    location=location,
+                    businessName=" ".join(
+                        [rng.choice(NAMES), rng.choice(NAMES), str(index)]
+                    ),
+                    businessType=rng.choice(TYPES),
+                    businessHours={},
+                    email=user.email,
+                    contactNo="0039928",
+                )
+                for index, user, location in zip(indexes, users, locations)
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {BusinessProfile._meta.db_table}")
+        trigram = "on" if search.trigram_available() else "off"
+        self.stdout.write(
+            f"Inserted {rows} businesses in "
+            f"{time.perf_counter() - started:.1f}s (trigram search: {trigram})"
+        )
+
+    def _run(self, text):
+        queryset = search.search_businesses(
+            BusinessProfile.objects.all(), text
+        )[:20]
+        plan = queryset.explain(analyze=True, buffers=True)
+        sequential = f"Seq Scan on {BusinessProfile._meta.db_table}" in plan
+
+        started = time.perf_counter()
+        found = len(queryset)
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(f"\nq={text!r}: {found} rows in {elapsed:.1f} ms")
+        self.stdout.write(plan)
+        if sequential:
+            self.stderr.write("The search scanned the whole table!")
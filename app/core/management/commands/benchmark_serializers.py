@@ -0,0 +1,134 @@
+"""
+Django command comparing regular and fast list serialization throughput.
+"""
+
+import time
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from adminProfile.serializers import AdminProfileSerializer
+from businessProfile.serializers import BusinessProfileSerializer
+from core.fastpath import compile_plan
+from core.models import AdminProfile, BusinessProfile, Location, UserProfile
+from userProfile.serializers import UserProfileSerializer
+
+
+PROFILES = {
+    "user": (UserProfile, UserProfileSerializer),
+    "admin": (AdminProfile, AdminProfileSerializer),
+    "business": (BusinessProfile, BusinessProfileSerializer),
+}
+
+
+class Rollback(Exception):
+    """Raised to discard the synthetic rows."""
+
+
+def profile_fields(profile, index):
+    if profile == "business":
+        return {
+            "businessName": f"Business {index}",
+            "businessType": "retail",
+            "businessHours": {"monday": "10:00am-09:00pm"},
+            "contactNo": "0039928",
+            "websiteUrl": "http://example.com",
+        }
+    return {
+        "firstName": f"First {index}",
+        "lastName": "Last",
+        "gender": "female",
+        "dob": date(1990, 1, 1),
+        "profileImg": "avatar.jpg",
+        "interests": ["fishing", "hiking"],
+    }
+
+
+class Command(BaseCommand):
+    """Django command to benchmark list serialization"""
+
+    help = (
+        "Insert synthetic profiles in a rolled back transaction and report "
+        "rows/second for the serializer and the fast path."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument(
+            "--profile", choices=list(PROFILES), default="user"
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        "Entry point for command"
+        try:
+            with transaction.atomic():
+                profile, rows = options["profile"], options["rows"]
+                self._seed(profile, rows)
+                self._run(profile, rows, options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _seed(self, profile, rows):
+        model, _ = PROFILES[profile]
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(
+                email=f"bench{index}@example.com",
+                username=f"bench{index}",
+                password="!",
+            )
+            for index in range(rows)
+        )
+        locations = Location.objects.bulk_create(
+            Location(
+                street="1 Main St",
+                city="Dhaka",
+                state="Dhaka",
+                country="Bangladesh",
+                latitude=23.7104,
+                longitude=90.40744,
+                geocodeStatus=Location.DONE,
+            )
+            for _ in range(rows)
+        )
+        model.objects.bulk_create(
+            model(
+                user=user,
+                location=location,
+                email=user.email,
+                **profile_fields(profile, index),
+            )
+            for index, (user, location) in enumerate(zip(users, locations))
+        )
+
+    def _run(self, profile, rows, repeat):
+        model, serializer_class = PROFILES[profile]
+        queryset = model.objects.select_related("user", "location")
+        queryset = queryset.order_by("id")
+        renderer = JSONRenderer()
+
+        def regular():
+            return serializer_class(queryset.all(), many=True).data
+
+        def fast():
+            paths, build = compile_plan(serializer_class(), queryset)
+            return [build(row) for row in queryset.values(*paths)]
+
+        if renderer.render(regular()) != renderer.render(fast()):
+            self.stderr.write("Fast path output differs from the serializer!")
+
+        for name, serialize in (("serializer", regular), ("fast path", fast)):
+            best = min(self._time(serialize) for _ in range(repeat))
+            self.stdout.write(
+                f"{name:>10}: {rows / best:12.0f} rows/s "
+                f"({best * 1000:.1f} ms)"
+            )
+
+    def _time(self, serialize):
+        started = time.perf_counter()
+        serialize()
+        return time.perf_counter() - started
@@ -0,0 +1,52 @@
+"""
+Django command to deliver emails queued in the outbox.
+"""
+
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from core import outbox
+
+
+class Command(BaseCommand):
+    """Django command to drain the email outbox"""
+
+    help = "Send queued emails over a single reused mail connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2.0,
+            help="Seconds to wait when no email is due.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no email is due instead of polling.",
+        )
+
+    def handle(self, *args, **options):
+        "Entry point for command"
+        self.stdout.write("Outbox worker started...")
+        total = 0
+        connection = get_connection()
+        try:
+            while True:
+                processed = outbox.deliver_pending(
+                    options["batch_size"], connection
+                )
+                total += processed
+                if processed:
+                    continue
+                if options["once"]:
+                    break
+                # Don't hold the relay session open while idle.
+                connection.close()
+                time.sleep(options["sleep"])
+        finally:
+            connection.close()
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} emails."))
@@ -0,0 +1,191 @@
+"""
+Django command to geocode locations that are missing coordinates.
+
+Addresses the geocoder fails on (timeouts, outages, rate limits) are
+neither cached nor saved, so a later run retries them, and a location
+whose address was edited while its chunk was being geocoded keeps the
+edit instead of the coordinates of its old address.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from geopy.exc import GeocoderServiceError
+
+from core import clusters, geocoding, profile_cache
+from core.cache import MISSING
+from core.models import Location
+from core.updates import ADDRESS_FIELDS
+
+
+class Command(BaseCommand):
+    """Django command to backfill missing location coordinates"""
+
+    help = (
+        "Geocode locations with null coordinates in id order. "
+        "Re-run with --after-id to resume from the last checkpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Threads issuing geocoder requests.",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=1.0,
+            help="Maximum geocoder requests per second across all workers.",
+        )
+        parser.add_argument(
+            "--after-id",
+            type=int,
+            default=0,
+            help="Only process locations with an id greater than this.",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=None,
+            help="Stop after this many locations.",
+        )
+
+    def handle(self, *args, **options):
+        "Entry point for command"
+        limiter = geocoding.RateLimiter(options["rate"])
+        last_id = options["after_id"]
+        limit = options["limit"]
+        processed = resolved = lookups = 0
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            while limit is None or processed < limit:
+                size = options["chunk_size"]
+                if limit is not None:
+                    size = min(size, limit - processed)
+                chunk = list(
+                    Location.objects.filter(
+                        id__gt=last_id, latitude__isnull=True
+                    )
+                    .exclude(geocodeStatus__in=[
+                        Location.PENDING, Location.GEOCODING,
+                    ])
+                    .order_by("id")
+                    .only("id", "street", "city", "state", "country")[:size]
+                )
+                if not chunk:
+                    break
+
+                counts = self._process_chunk(chunk, pool, limiter)
+                processed += len(chunk)
+                resolved += counts[0]
+                lookups += counts[1]
+                last_id = chunk[-1].id
+
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"Checkpoint id={last_id}: {processed} processed, "
+                    f"{resolved} resolved, {lookups} geocoder requests, "
+                    f"{processed / elapsed:.1f} rows/s"
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfill finished: {processed} processed, {resolved} resolved, "
+            f"last id {last_id}."
+        ))
+
+    def _process_chunk(self, chunk, pool, limiter):
+        """Geocode a chunk and return (resolved count, remote lookups)."""
+        by_key = {}
+        for location in chunk:
+            address = geocoding.location_address(location)
+            key = geocoding.normalize_address(address)
+            by_key.setdefault(key, (address, []))[1].append(location)
+
+        results = {}
+        misses = []
+        for key, (address, _) in by_key.items():
+            coordinates = geocoding.NOT_FOUND
+            if key:
+                coordinates = geocoding.get_cached(key)
+            if coordinates is MISSING:
+                misses.append((key, address))
+            else:
+                results[key] = coordinates
+
+        def remote(item):
+            key, address = item
+            limiter.wait()
+            try:
+                return key, geocoding.lookup(address)
+            except GeocoderServiceError as exc:
+                self.stderr.write(f"Geocoder failed for {address!r}: {exc}")
+                return key, None
+
+        for key, coordinates in pool.map(remote, misses):
+            if coordinates is not None:
+                geocoding.store(key, coordinates)
+                results[key] = coordinates
+
+        now = timezone.now()
+        geocoded = []
+        for key, (_, locations) in by_key.items():
+            if key not in results:
+                continue
+            latitude, longitude = results[key]
+            for location in locations:
+                location.latitude = latitude
+                location.longitude = longitude
+                location.geocodeStatus = geocoding.geocode_status(latitude)
+                location.geohash = location.compute_geohash()
+                location.updatedAt = now
+                geocoded.append(location)
+        saved = self._save_unchanged(geocoded)
+
+        clusters.invalidate(location.geohash for location in saved)
+        # bulk_update() sends no signals; drop the affected cached profiles.
+        profile_cache.invalidate_locations(location.pk for location in saved)
+        resolved = sum(location.latitude is not None for location in saved)
+        return resolved, len(misses)
+
+    def _save_unchanged(self, locations):
+        """Save the locations still holding the address that was geocoded.
+
+        Locations edited (and possibly re-queued or geocoded) since the
+        chunk was read are left alone. Return the saved locations.
+        """
+        with transaction.atomic():
+            current = {
+                row["id"]: row
+                for row in Location.objects.select_for_update()
+                .filter(
+                    pk__in=[location.pk for location in locations],
+                    latitude__isnull=True,
+                )
+                .exclude(geocodeStatus__in=[
+                    Location.PENDING, Location.GEOCODING,
+                ])
+                .values("id", *ADDRESS_FIELDS)
+            }
+            unchanged = [
+                location for location in locations
+                if location.pk in current and all(
+                    current[location.pk][name] == getattr(location, name)
+                    for name in ADDRESS_FIELDS
+                )
+            ]
+            Location.objects.bulk_update(
+                unchanged,
+                [
+                    "latitude", "longitude", "geocodeStatus", "geohash",
+                    "updatedAt",
+                ],
+            )
+        return unchanged
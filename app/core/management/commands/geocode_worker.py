@@ -0,0 +1,51 @@
+"""
+Django command to geocode locations queued by profile creation.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from geopy.exc import GeocoderServiceError
+
+from core import geocoding
+
+
+class Command(BaseCommand):
+    """Django command to drain the pending geocode queue"""
+
+    help = "Backfill coordinates for locations waiting to be geocoded."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2.0,
+            help="Seconds to wait when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling.",
+        )
+
+    def handle(self, *args, **options):
+        "Entry point for command"
+        self.stdout.write("Geocode worker started...")
+        total = 0
+        while True:
+            try:
+                processed = geocoding.geocode_pending(options["batch_size"])
+            except GeocoderServiceError as exc:
+                # The failed location is queued again; back off before
+                # taking the next batch.
+                self.stderr.write(f"Geocoder unavailable: {exc}")
+                processed = 0
+            total += processed
+            if processed:
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["sleep"])
+        self.stdout.write(self.style.SUCCESS(f"Geocoded {total} locations."))
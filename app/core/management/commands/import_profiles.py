@@ -0,0 +1,85 @@
+"""
+Django command to import profiles with Postgres COPY.
+"""
+
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, transaction
+
+from core import profile_io
+from core.management.commands.export_profiles import output_format
+
+
+class Command(BaseCommand):
+    """Django command to import profiles of a type from a file"""
+
+    help = (
+        "Load profiles from CSV or NDJSON (as written by export_profiles or "
+        "the export API) through a staging table, in one transaction. Rows "
+        "missing required fields or clashing with existing users, profiles "
+        "or earlier rows are skipped; a malformed value aborts the import."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("profile_type", choices=profile_io.PROFILE_TYPES)
+        parser.add_argument("path", help='Input file, "-" for stdin.')
+        parser.add_argument(
+            "--format", choices=profile_io.FORMATS, dest="output",
+            help="Defaults to the file extension, else csv.",
+        )
+        parser.add_argument(
+            "--progress-every", type=int, default=64 * 1024 * 1024,
+            help="Report progress every this many characters read.",
+        )
+
+    def handle(self, *args, **options):
+        "Entry point for command"
+        path = options["path"]
+        profile_type = options["profile_type"]
+        importer = profile_io.ProfileImport(
+            profile_io.PROFILE_TYPES[profile_type],
+            options["output"] or output_format(path),
+        )
+
+        def report(count):
+            self.stdout.write(f"Loaded {count // (1024 * 1024)} MiB...")
+
+        started = time.perf_counter()
+        try:
+            file = (
+                sys.stdin if path == "-"
+                else open(path, encoding="utf-8", newline="")
+            )
+        except OSError as exc:
+            raise CommandError(exc)
+        try:
+            with transaction.atomic():
+                importer.load(profile_io.ProgressFile(
+                    file, report, options["progress_every"]
+                ))
+                self.stdout.write(
+                    f"Staged {importer.counts['read']} rows in "
+                    f"{time.perf_counter() - started:.1f}s."
+                )
+                if importer.ignored:
+                    self.stdout.write(
+                        f"Ignored columns: {', '.join(importer.ignored)}"
+                    )
+                importer.clean()
+                importer.merge()
+        except (ValueError, DatabaseError) as exc:
+            raise CommandError(f"Import failed, nothing was imported: {exc}")
+        finally:
+            if file is not sys.stdin:
+                file.close()
+
+        counts = importer.counts
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {counts['imported']} {profile_type} profiles in "
+            f"{time.perf_counter() - started:.1f}s; skipped "
+            f"{counts['incomplete']} incomplete, {counts['invalid']} "
+            f"invalid, {counts['duplicate']} duplicate and "
+            f"{counts['existing']} existing rows."
+        ))
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:08
+
+from django.db import migrations, models
+
+
+def set_existing_status(apps, schema_editor):
+    """Mark rows created before background geocoding as done or failed."""
+    Location = apps.get_model('core', 'Location')
+    Location.objects.filter(latitude__isnull=False).update(geocodeStatus='done')
+    Location.objects.filter(latitude__isnull=True).update(geocodeStatus='failed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_geocodecache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='geocodeStatus',
+            field=models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.RunPython(set_existing_status, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(condition=models.Q(('geocodeStatus', 'pending')), fields=['id'], name='location_geocode_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:12
+
+from django.db import migrations, models
+
+from core import geo
+
+
+def populate_geohash(apps, schema_editor):
+    """Compute the geohash of every location that has coordinates."""
+    Location = apps.get_model('core', 'Location')
+    located = Location.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    batch = []
+    for location in located.only('id', 'latitude', 'longitude').iterator(chunk_size=2000):
+        location.geohash = geo.encode(float(location.latitude), float(location.longitude))
+        batch.append(location)
+        if len(batch) == 2000:
+            Location.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    Location.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_location_geocodestatus'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='geohash',
+            field=models.CharField(blank=True, max_length=12, null=True),
+        ),
+        migrations.RunPython(populate_geohash, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(fields=['geohash'], name='location_geohash_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_location_geohash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='adminprofile',
+            index=models.Index(fields=['createdAt', 'id'], name='adminprofile_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='businessprofile',
+            index=models.Index(fields=['createdAt', 'id'], name='businessprofile_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['createdAt', 'id'], name='userprofile_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:30
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_profile_created_id_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['interests'], name='userprofile_interests_gin_idx'),
+        ),
+    ]
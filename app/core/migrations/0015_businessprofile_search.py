@@ -0,0 +1,69 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:32
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+SEARCH_TRIGGER = """
+CREATE FUNCTION core_businessprofile_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW."searchVector" :=
+        setweight(to_tsvector('english', coalesce(NEW."businessName", '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW."businessType", '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_businessprofile_search_vector_trigger
+BEFORE INSERT OR UPDATE OF "businessName", "businessType" ON core_businessprofile
+FOR EACH ROW EXECUTE FUNCTION core_businessprofile_search_vector();
+
+UPDATE core_businessprofile SET "businessName" = "businessName";
+"""
+
+DROP_SEARCH_TRIGGER = """
+DROP TRIGGER IF EXISTS core_businessprofile_search_vector_trigger ON core_businessprofile;
+DROP FUNCTION IF EXISTS core_businessprofile_search_vector();
+"""
+
+# pg_trgm is optional: servers without it still get full-text search.
+TRIGRAM_INDEXES = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS businessprofile_name_trgm_idx
+            ON core_businessprofile USING gin ("businessName" gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS businessprofile_type_trgm_idx
+            ON core_businessprofile USING gin ("businessType" gin_trgm_ops);
+    END IF;
+END
+$$;
+"""
+
+DROP_TRIGRAM_INDEXES = """
+DROP INDEX IF EXISTS businessprofile_name_trgm_idx;
+DROP INDEX IF EXISTS businessprofile_type_trgm_idx;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_userprofile_interests_gin'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='businessprofile',
+            name='searchVector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='businessprofile',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['searchVector'], name='businessprofile_search_idx'),
+        ),
+        migrations.RunSQL(SEARCH_TRIGGER, DROP_SEARCH_TRIGGER),
+        migrations.RunSQL(TRIGRAM_INDEXES, DROP_TRIGRAM_INDEXES),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_businessprofile_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='adminprofile',
+            index=models.Index(fields=['gender', 'createdAt', 'id'], name='adminprofile_gender_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['gender', 'createdAt', 'id'], name='userprofile_gender_idx'),
+        ),
+    ]
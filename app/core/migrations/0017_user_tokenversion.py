@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_profile_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='tokenVersion',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:51
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_user_tokenversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255)),
+                ('body', models.TextField()),
+                ('fromEmail', models.CharField(blank=True, max_length=255, null=True)),
+                ('recipients', django.contrib.postgres.fields.ArrayField(base_field=models.EmailField(max_length=255), size=None)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('dead', 'Dead')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('nextAttemptAt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('lastError', models.TextField(blank=True, default='')),
+                ('sentAt', models.DateTimeField(blank=True, null=True)),
+                ('createdAt', models.DateTimeField(auto_now_add=True)),
+                ('updatedAt', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['nextAttemptAt', 'id'], name='outbox_pending_idx')],
+            },
+        ),
+    ]
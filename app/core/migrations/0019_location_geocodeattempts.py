@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_outboxemail'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='location',
+            name='location_geocode_pending_idx',
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='geocodeAttempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='location',
+            name='geocodeStatus',
+            field=models.CharField(choices=[('pending', 'Pending'), ('geocoding', 'Geocoding'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(condition=models.Q(('geocodeStatus__in', ['pending', 'geocoding'])), fields=['id'], name='location_geocode_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,172 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:16
+
+from django.db import migrations, models
+
+
+PROFILE_TABLES = ["core_userprofile", "core_adminprofile", "core_businessprofile"]
+
+# Profiles copy the filtered user and location columns on every write that
+# could change them; user and location updates re-run the copy by touching
+# the referencing profile rows.
+FILTER_TRIGGERS = """
+CREATE FUNCTION core_profile_filter_columns() RETURNS trigger AS $$
+BEGIN
+    SELECT role, is_active INTO NEW."userRole", NEW."userIsActive"
+        FROM core_user WHERE id = NEW.user_id;
+    SELECT country, city INTO NEW."locationCountry", NEW."locationCity"
+        FROM core_location WHERE id = NEW.location_id;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION core_user_profile_filters() RETURNS trigger AS $$
+BEGIN
+%(user_updates)s
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_user_profile_filters_trigger
+AFTER UPDATE OF role, is_active ON core_user
+FOR EACH ROW
+WHEN (OLD.role IS DISTINCT FROM NEW.role OR OLD.is_active IS DISTINCT FROM NEW.is_active)
+EXECUTE FUNCTION core_user_profile_filters();
+
+CREATE FUNCTION core_location_profile_filters() RETURNS trigger AS $$
+BEGIN
+%(location_updates)s
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_location_profile_filters_trigger
+AFTER UPDATE OF country, city ON core_location
+FOR EACH ROW
+WHEN (OLD.country IS DISTINCT FROM NEW.country OR OLD.city IS DISTINCT FROM NEW.city)
+EXECUTE FUNCTION core_location_profile_filters();
+""" % {
+    "user_updates": "\n".join(
+        f"    UPDATE {table} SET user_id = user_id WHERE user_id = NEW.id;"
+        for table in PROFILE_TABLES
+    ),
+    "location_updates": "\n".join(
+        f"    UPDATE {table} SET location_id = location_id WHERE location_id = NEW.id;"
+        for table in PROFILE_TABLES
+    ),
+} + "".join(
+    f"""
+CREATE TRIGGER {table}_filter_columns_trigger
+BEFORE INSERT OR UPDATE OF user_id, location_id, "userRole", "userIsActive",
+    "locationCountry", "locationCity" ON {table}
+FOR EACH ROW EXECUTE FUNCTION core_profile_filter_columns();
+
+UPDATE {table} SET user_id = user_id;
+"""
+    for table in PROFILE_TABLES
+)
+
+DROP_FILTER_TRIGGERS = "".join(
+    f"DROP TRIGGER IF EXISTS {table}_filter_columns_trigger ON {table};\n"
+    for table in PROFILE_TABLES
+) + """
+DROP TRIGGER IF EXISTS core_user_profile_filters_trigger ON core_user;
+DROP TRIGGER IF EXISTS core_location_profile_filters_trigger ON core_location;
+DROP FUNCTION IF EXISTS core_user_profile_filters();
+DROP FUNCTION IF EXISTS core_location_profile_filters();
+DROP FUNCTION IF EXISTS core_profile_filter_columns();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_location_geocodeattempts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adminprofile',
+            name='locationCity',
+            field=models.CharField(editable=False, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='adminprofile',
+            name='locationCountry',
+            field=models.CharField(editable=False, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='adminprofile',
+            name='userIsActive',
+            field=models.BooleanField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='adminprofile',
+            name='userRole',
+            field=models.CharField(editable=False, max_length=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='businessprofile',
+            name='locationCity',
+            field=models.CharField(editable=False, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='businessprofile',
+            name='locationCountry',
+            field=models.CharField(editable=False, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='businessprofile',
+            name='userIsActive',
+            field=models.BooleanField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='businessprofile',
+            name='userRole',
+            field=models.CharField(editable=False, max_length=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='locationCity',
+            field=models.CharField(editable=False, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='locationCountry',
+            field=models.CharField(editable=False, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='userIsActive',
+            field=models.BooleanField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='userRole',
+            field=models.CharField(editable=False, max_length=50, null=True),
+        ),
+        migrations.RunSQL(FILTER_TRIGGERS, DROP_FILTER_TRIGGERS),
+        migrations.AddIndex(
+            model_name='adminprofile',
+            index=models.Index(fields=['userRole', 'userIsActive', 'createdAt', 'id'], name='adminprofile_role_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='adminprofile',
+            index=models.Index(fields=['locationCountry', 'locationCity', 'createdAt', 'id'], name='adminprofile_country_city_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='businessprofile',
+            index=models.Index(fields=['userRole', 'userIsActive', 'createdAt', 'id'], name='business_role_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='businessprofile',
+            index=models.Index(fields=['locationCountry', 'locationCity', 'createdAt', 'id'], name='business_country_city_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['userRole', 'userIsActive', 'createdAt', 'id'], name='userprofile_role_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['locationCountry', 'locationCity', 'createdAt', 'id'], name='userprofile_country_city_idx'),
+        ),
+    ]
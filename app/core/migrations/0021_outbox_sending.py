@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_profile_filter_columns'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='outboxemail',
+            name='outbox_pending_idx',
+        ),
+        migrations.AlterField(
+            model_name='outboxemail',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('dead', 'Dead')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='outboxemail',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'sending'])), fields=['nextAttemptAt', 'id'], name='outbox_pending_idx'),
+        ),
+    ]
@@ -4,13 +4,18 @@ Database models.
 
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.search import SearchVectorField
+from django.contrib.postgres.indexes import GinIndex
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin,
 )
 
+from core import geo
+
 
 class UserManager(BaseUserManager):
     """Manager for users."""
@@ -53,6 +58,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     role = models.CharField(max_length=50, choices=role_choices, default=USER)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Bumped to revoke every signed access/refresh token issued so far.
+    tokenVersion = models.PositiveIntegerField(default=0)
     createdAt = models.DateTimeField(auto_now_add=True)
     updatedAt = models.DateTimeField(auto_now=True)
 
@@ -63,18 +70,121 @@ class User(AbstractBaseUser, PermissionsMixin):
 
 class Location(models.Model):
     """Location objects"""
+    PENDING = 'pending'
+    GEOCODING = 'geocoding'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    geocode_status_choices = [
+        (PENDING, 'Pending'),
+        (GEOCODING, 'Geocoding'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed')
+    ]
+
     street = models.CharField(max_length=255, blank=True, null=True)
     city = models.CharField(max_length=255, blank=True, null=True)
     state = models.CharField(max_length=255, blank=True, null=True)
     country = models.CharField(max_length=255, blank=True, null=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
     latitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
+    geocodeStatus = models.CharField(max_length=20, choices=geocode_status_choices, default=PENDING)
+    # Geocoder failures so far; the worker gives up after GEOCODE_MAX_ATTEMPTS.
+    geocodeAttempts = models.PositiveSmallIntegerField(default=0)
+    geohash = models.CharField(max_length=geo.GEOHASH_PRECISION, blank=True, null=True)
     createdAt = models.DateTimeField(auto_now_add=True)
     updatedAt = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['id'],
+                condition=models.Q(geocodeStatus__in=['pending', 'geocoding']),
+                name='location_geocode_pending_idx',
+            ),
+            # varchar_pattern_ops lets geohash prefix (LIKE 'abc%') lookups use the index.
+            models.Index(
+                fields=['geohash'],
+                opclasses=['varchar_pattern_ops'],
+                name='location_geohash_idx',
+            ),
+        ]
+
+    def compute_geohash(self):
+        if self.latitude is None or self.longitude is None:
+            return None
+        return geo.encode(float(self.latitude), float(self.longitude))
+
+    def save(self, *args, **kwargs):
+        """Keep the geohash in step with the coordinates."""
+        geohash = self.compute_geohash()
+        self.previous_geohash = self.geohash
+        self.geohash_changed = geohash != self.geohash
+        self.geohash = geohash
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.city + ', ' + self.state + ', ' + self.country
 
+
+class GeocodeCache(models.Model):
+    """Geocoding results keyed by normalized address"""
+    address = models.CharField(max_length=1024, unique=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
+    createdAt = models.DateTimeField(auto_now_add=True)
+    updatedAt = models.DateTimeField(auto_now=True)
+
+    @property
+    def found(self):
+        return self.latitude is not None and self.longitude is not None
+
+    def __str__(self):
+        return self.address
+
+
+class OutboxEmail(models.Model):
+    """Emails queued in the request transaction for the deliver_outbox command"""
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    DEAD = 'dead'
+
+    status_choices = [
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (DEAD, 'Dead')
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    fromEmail = models.CharField(max_length=255, blank=True, null=True)
+    recipients = ArrayField(models.EmailField(max_length=255))
+    status = models.CharField(max_length=20, choices=status_choices, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    nextAttemptAt = models.DateTimeField(default=timezone.now)
+    lastError = models.TextField(blank=True, default='')
+    sentAt = models.DateTimeField(blank=True, null=True)
+    createdAt = models.DateTimeField(auto_now_add=True)
+    updatedAt = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['nextAttemptAt', 'id'],
+                condition=models.Q(status__in=['pending', 'sending']),
+                name='outbox_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)}"
+
+
 class UserProfile(models.Model):
     """Regular user profile objects"""
     MALE = 'male'
@@ -102,9 +212,24 @@ class UserProfile(models.Model):
     profileImg = models.CharField(max_length=255, null=True, blank=True)
     interests = ArrayField(models.CharField(max_length=100), blank=True)
     location = models.OneToOneField(Location, on_delete=models.CASCADE)
+    # Copied from the user and location by database triggers so the list
+    # filters on them are answered by indexes on this table.
+    userRole = models.CharField(max_length=50, null=True, editable=False)
+    userIsActive = models.BooleanField(null=True, editable=False)
+    locationCountry = models.CharField(max_length=255, null=True, editable=False)
+    locationCity = models.CharField(max_length=255, null=True, editable=False)
     createdAt = models.DateTimeField(auto_now_add=True)
     updatedAt = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['createdAt', 'id'], name='userprofile_created_id_idx'),
+            models.Index(fields=['gender', 'createdAt', 'id'], name='userprofile_gender_idx'),
+            models.Index(fields=['userRole', 'userIsActive', 'createdAt', 'id'], name='userprofile_role_active_idx'),
+            models.Index(fields=['locationCountry', 'locationCity', 'createdAt', 'id'], name='userprofile_country_city_idx'),
+            GinIndex(fields=['interests'], name='userprofile_interests_gin_idx'),
+        ]
+
     def is_authenticated(self):
         return self.user.is_authenticated
 
@@ -139,9 +264,23 @@ class AdminProfile(models.Model):
     profileImg = models.CharField(max_length=255, null=True, blank=True)
     interests = ArrayField(models.CharField(max_length=100), blank=True)
     location = models.OneToOneField(Location, on_delete=models.CASCADE)
+    # Copied from the user and location by database triggers so the list
+    # filters on them are answered by indexes on this table.
+    userRole = models.CharField(max_length=50, null=True, editable=False)
+    userIsActive = models.BooleanField(null=True, editable=False)
+    locationCountry = models.CharField(max_length=255, null=True, editable=False)
+    locationCity = models.CharField(max_length=255, null=True, editable=False)
     createdAt = models.DateTimeField(auto_now_add=True)
     updatedAt = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['createdAt', 'id'], name='adminprofile_created_id_idx'),
+            models.Index(fields=['gender', 'createdAt', 'id'], name='adminprofile_gender_idx'),
+            models.Index(fields=['userRole', 'userIsActive', 'createdAt', 'id'], name='adminprofile_role_active_idx'),
+            models.Index(fields=['locationCountry', 'locationCity', 'createdAt', 'id'], name='adminprofile_country_city_idx'),
+        ]
+
     def is_authenticated(self):
         return self.user.is_authenticated
 
@@ -164,9 +303,25 @@ class BusinessProfile(models.Model):
     businessLogo = models.CharField(max_length=255, null=True, blank=True)
     websiteUrl = models.CharField(max_length=255, null=True, blank=True)
     location = models.OneToOneField(Location, on_delete=models.CASCADE)
+    # Maintained by a database trigger from businessName and businessType.
+    searchVector = SearchVectorField(null=True, editable=False)
+    # Copied from the user and location by database triggers so the list
+    # filters on them are answered by indexes on this table.
+    userRole = models.CharField(max_length=50, null=True, editable=False)
+    userIsActive = models.BooleanField(null=True, editable=False)
+    locationCountry = models.CharField(max_length=255, null=True, editable=False)
+    locationCity = models.CharField(max_length=255, null=True, editable=False)
     createdAt = models.DateTimeField(auto_now_add=True)
     updatedAt = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['createdAt', 'id'], name='businessprofile_created_id_idx'),
+            models.Index(fields=['userRole', 'userIsActive', 'createdAt', 'id'], name='business_role_active_idx'),
+            models.Index(fields=['locationCountry', 'locationCity', 'createdAt', 'id'], name='business_country_city_idx'),
+            GinIndex(fields=['searchVector'], name='businessprofile_search_idx'),
+        ]
+
     def is_authenticated(self):
         return self.user.is_authenticated
 
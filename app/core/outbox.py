@@ -0,0 +1,129 @@
+"""
+Transactional email outbox.
+
+Requests queue emails with enqueue(), inside their own transaction, so an
+email exists exactly when the change that caused it commits and the request
+never waits on the mail relay. The deliver_outbox command drains the queue
+in batches over one reused connection of the configured EMAIL_BACKEND.
+A batch is claimed in a short transaction and sent outside it, so a slow
+mail relay never holds row locks; claims older than OUTBOX_CLAIM_TIMEOUT
+belong to a worker that died and are sent again. Failed sends are retried
+with exponential backoff; after OUTBOX_MAX_ATTEMPTS attempts the email is
+dead-lettered.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import OutboxEmail
+
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(subject, body, recipients, from_email=None):
+    """Queue an email for delivery and return its outbox row."""
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        fromEmail=from_email,
+        recipients=list(recipients),
+    )
+
+
+def backoff(attempts):
+    """Return the delay before retrying an email that failed attempts times."""
+    delay = settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.OUTBOX_RETRY_MAX_DELAY))
+
+
+def message(email, connection):
+    return EmailMessage(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.fromEmail,
+        to=email.recipients,
+        connection=connection,
+    )
+
+
+def deliver(emails, connection):
+    """Send emails over one connection, recording each outcome.
+
+    Opening an already open connection is a no-op, so the connection is
+    only (re)established before the first email and after a failure.
+    """
+    now = timezone.now()
+    for email in emails:
+        email.attempts += 1
+        email.updatedAt = now
+        try:
+            connection.open()
+            connection.send_messages([message(email, connection)])
+        except Exception as exc:
+            email.lastError = f"{type(exc).__name__}: {exc}"
+            if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                email.status = OutboxEmail.DEAD
+                logger.error("Dead-lettered outbox email %s", email.pk)
+            else:
+                email.status = OutboxEmail.PENDING
+                email.nextAttemptAt = now + backoff(email.attempts)
+            # The relay may have dropped the session; start a new one.
+            connection.close()
+        else:
+            email.status = OutboxEmail.SENT
+            email.sentAt = now
+            email.lastError = ""
+    OutboxEmail.objects.bulk_update(
+        emails,
+        [
+            "status", "attempts", "nextAttemptAt", "lastError", "sentAt",
+            "updatedAt",
+        ],
+    )
+
+
+def claim_due(batch_size):
+    """Mark a batch of due emails as being sent and return it.
+
+    Rows locked by another worker are skipped, so several workers can
+    drain the queue concurrently without sending the same email twice.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT)
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=OutboxEmail.PENDING, nextAttemptAt__lte=now)
+                | Q(status=OutboxEmail.SENDING, updatedAt__lt=stale)
+            )
+            .order_by("nextAttemptAt", "id")[:batch_size]
+        )
+        OutboxEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(status=OutboxEmail.SENDING, updatedAt=now)
+    return emails
+
+
+def deliver_pending(batch_size=100, connection=None):
+    """Deliver one batch of due emails and return its size.
+
+    Pass a connection to reuse it across batches; the caller closes it.
+    """
+    emails = claim_due(batch_size)
+    if emails and connection is None:
+        connection = get_connection()
+        try:
+            deliver(emails, connection)
+        finally:
+            connection.close()
+    elif emails:
+        deliver(emails, connection)
+    return len(emails)
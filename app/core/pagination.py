@@ -0,0 +1,132 @@
+"""
+Pagination classes shared by the profile APIs.
+"""
+
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    PageNumberPagination,
+    _reverse_ordering,
+)
+
+
+class ProfileCursorPagination(CursorPagination):
+    """Opaque keyset pagination over (createdAt, id).
+
+    The cursor holds the createdAt and id of the row a page starts after,
+    and the page is read with a row-value comparison,
+    (createdAt, id) > (%s, %s), which Postgres answers with a range scan
+    on the (createdAt, id) index. Rows sharing a createdAt are paged by id
+    instead of by an offset, so deep pages cost the same as the first one
+    and rows inserted while a client pages through do not shift the results.
+    """
+
+    ordering = ('createdAt', 'id')
+    page_size = settings.PROFILE_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.PROFILE_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None and self.cursor.position is not None:
+            queryset = queryset.filter(
+                self.after(queryset.model, ordering, self.cursor.position)
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def after(self, model, ordering, position):
+        """Return the condition selecting rows after position in ordering."""
+        fields = [model._meta.get_field(name.lstrip('-')) for name in ordering]
+        try:
+            values = json.loads(position)
+            values = [field.to_python(value) for field, value in zip(fields, values)]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if len(values) != len(fields) or None in values:
+            raise NotFound(self.invalid_cursor_message)
+
+        quote = connection.ops.quote_name
+        table = quote(model._meta.db_table)
+        columns = ", ".join(f"{table}.{quote(field.column)}" for field in fields)
+        placeholders = ", ".join(["%s"] * len(fields))
+        # get_ordering() gives every field the same direction.
+        operator = "<" if ordering[0].startswith('-') else ">"
+        return RawSQL(
+            f"({columns}) {operator} ({placeholders})",
+            values,
+            output_field=BooleanField(),
+        )
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for name in ordering:
+            name = name.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return json.dumps(values)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[-1], self.ordering)
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[0], self.ordering)
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+
+class SearchPagination(PageNumberPagination):
+    """Page numbers for ranked search results (nearby, search, interests)."""
+
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+def pagination_ordering(view, queryset):
+    """Return the fields a view's cursor paginator reads from each row."""
+    paginator = view.paginator
+    if not isinstance(paginator, CursorPagination):
+        return ()
+    ordering = paginator.get_ordering(view.request, queryset, view)
+    return tuple(name.lstrip('-') for name in ordering)
@@ -0,0 +1,133 @@
+"""
+Per-user cache of serialized profile payloads.
+
+Payload keys embed a per-user version token, so invalidating a user is a
+single delete of the version key; stale payloads are never read again and
+expire on their own. Concurrent misses are collapsed with a cache.add()
+lock so only one request recomputes a payload while the others wait for it.
+Works with any Django cache backend shared by the web processes.
+"""
+
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from rest_framework.response import Response
+
+from core.cache import MISSING, incr
+from core.fieldsets import requested_fieldset
+
+
+LOCK_TTL = 10  # Seconds before an abandoned recompute lock expires
+LOCK_WAIT = 2.0  # Seconds a request waits for another one's recompute
+LOCK_POLL = 0.05
+
+HITS_KEY = "profile:stats:hits"
+MISSES_KEY = "profile:stats:misses"
+
+
+def version_key(user_id):
+    return f"profile:version:{user_id}"
+
+
+def get_version(user_id):
+    """Return the user's current version token, creating one if needed."""
+    key = version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(*user_ids):
+    """Drop every cached payload of the given users."""
+    cache.delete_many([version_key(user_id) for user_id in user_ids])
+
+
+def invalidate_locations(location_ids):
+    """Drop cached payloads of the profiles placed at these locations."""
+    from core.models import AdminProfile, BusinessProfile, UserProfile
+
+    location_ids = list(location_ids)
+    if not location_ids:
+        return
+    querysets = [
+        model.objects.filter(location_id__in=location_ids).values_list(
+            "user_id", flat=True
+        )
+        for model in (UserProfile, AdminProfile, BusinessProfile)
+    ]
+    user_ids = querysets[0].union(*querysets[1:])
+    invalidate(*user_ids)
+
+
+def stats():
+    """Return the hit and miss counters."""
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+    return {
+        "hits": counters.get(HITS_KEY, 0),
+        "misses": counters.get(MISSES_KEY, 0),
+    }
+
+
+def payload_key(user_id, variant):
+    digest = hashlib.sha1(variant.encode()).hexdigest()
+    return f"profile:{user_id}:{get_version(user_id)}:{digest}"
+
+
+def get_or_compute(user_id, variant, compute):
+    """Return the cached payload for (user, variant), computing it once."""
+    key = payload_key(user_id, variant)
+    data = cache.get(key, MISSING)
+    if data is not MISSING:
+        incr(HITS_KEY)
+        return data
+    incr(MISSES_KEY)
+
+    lock = f"{key}:lock"
+    if cache.add(lock, 1, LOCK_TTL):
+        try:
+            data = compute()
+            cache.set(key, data, settings.PROFILE_CACHE_TTL)
+        finally:
+            cache.delete(lock)
+        return data
+
+    # Another request is computing this payload; wait for its result.
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL)
+        data = cache.get(key, MISSING)
+        if data is not MISSING:
+            return data
+        if cache.get(lock) is None:
+            break
+    return compute()
+
+
+class CachedProfileMixin:
+    """Retrieve view mixin serving the user's serialized profile from cache.
+
+    Disabled when PROFILE_CACHE_TTL is 0.
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.PROFILE_CACHE_TTL:
+            return super().retrieve(request, *args, **kwargs)
+
+        keep, omit = requested_fieldset(request)
+        variant = "|".join([
+            self.get_serializer_class().Meta.model._meta.label_lower,
+            ",".join(sorted(keep)) if keep is not None else "*",
+            ",".join(sorted(omit)),
+        ])
+        data = get_or_compute(
+            request.user.pk,
+            variant,
+            lambda: self.get_serializer(self.get_object()).data,
+        )
+        return Response(data)
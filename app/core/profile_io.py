@@ -0,0 +1,443 @@
+"""
+Bulk profile import and export through Postgres COPY.
+
+Files use the columns of the API's CSV export (user.username, location.city,
+firstName, ...) or the same fields as nested NDJSON objects. An export is a
+single COPY ... TO STDOUT over the joined tables. An import COPYs the file
+into a temporary staging table, drops rows that are incomplete, hold values
+outside a field's choices or clash with stored users/profiles or earlier
+rows, allocates the user and location
+ids from their sequences and merges with one INSERT ... SELECT per table,
+so memory use does not grow with the file.
+"""
+
+import csv
+import io
+
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.fields import ArrayField
+from django.db import connection
+from django.db.models import JSONField
+
+from psycopg2.extras import execute_values
+
+from core import geo
+from core.models import AdminProfile, BusinessProfile, Location, UserProfile
+
+
+PROFILE_TYPES = {
+    "user": UserProfile,
+    "admin": AdminProfile,
+    "business": BusinessProfile,
+}
+FORMATS = ["csv", "ndjson"]
+
+USER_FIELDS = ["username", "email", "role", "is_active"]
+LOCATION_FIELDS = [
+    "street", "city", "state", "country", "latitude", "longitude",
+    "geocodeStatus",
+]
+SKIPPED_FIELDS = {"id", "user", "location", "createdAt", "updatedAt"}
+TEXT_TYPES = {"CharField", "EmailField", "TextField"}
+
+STAGING = "profile_import"
+# One JSON document per line: no quoting, no delimiter inside a line.
+JSON_LINES = r"FORMAT csv, QUOTE E'\x01', DELIMITER E'\x02'"
+GEOHASH_CHUNK = 10000
+
+
+def q(name):
+    return connection.ops.quote_name(name)
+
+
+def profile_fields(model):
+    return [
+        field.name
+        for field in model._meta.concrete_fields
+        if field.editable and field.name not in SKIPPED_FIELDS
+    ]
+
+
+def columns(model, passwords=False):
+    """Return the (column, table alias, field) of a profile type's files."""
+    User = get_user_model()
+    user_fields = USER_FIELDS + (["password"] if passwords else [])
+    return (
+        [(f"user.{name}", "u", User._meta.get_field(name))
+         for name in user_fields]
+        + [(f"location.{name}", "l", Location._meta.get_field(name))
+           for name in LOCATION_FIELDS]
+        + [(name, "p", model._meta.get_field(name))
+           for name in profile_fields(model)]
+    )
+
+
+class ProgressFile(io.TextIOBase):
+    """Text file wrapper calling report(count) as COPY reads or writes it.
+
+    Reads count characters, writes count lines.
+    """
+
+    def __init__(self, file, report, every):
+        self.file = file
+        self.report = report
+        self.every = every
+        self.count = 0
+        self.next = every
+
+    def _advance(self, count):
+        self.count += count
+        if self.count >= self.next:
+            self.report(self.count)
+            self.next = (self.count // self.every + 1) * self.every
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        self._advance(len(data))
+        return data
+
+    def readline(self, size=-1):
+        data = self.file.readline(size)
+        self._advance(len(data))
+        return data
+
+    def write(self, data):
+        self._advance(data.count("\n"))
+        return self.file.write(data)
+
+
+def export_sql(model, output, passwords=False):
+    """Return the COPY statement exporting every profile of model."""
+    User = get_user_model()
+    select = [("id", "p.id")]
+    for name, alias, field in columns(model, passwords):
+        value = f"{alias}.{q(field.column)}"
+        if output == "csv" and isinstance(field, (ArrayField, JSONField)):
+            value = f"to_jsonb({value})::text"
+        select.append((name, value))
+    source = (
+        f"FROM {q(model._meta.db_table)} p "
+        f"JOIN {q(User._meta.db_table)} u ON u.id = p.user_id "
+        f"JOIN {q(Location._meta.db_table)} l ON l.id = p.location_id "
+        "ORDER BY p.id"
+    )
+
+    if output == "csv":
+        values = ", ".join(f"{value} AS {q(name)}" for name, value in select)
+        return (
+            f"COPY (SELECT {values} {source}) TO STDOUT "
+            "WITH (FORMAT csv, HEADER)"
+        )
+
+    groups = {}
+    for name, value in select:
+        group, _, key = name.rpartition(".")
+        groups.setdefault(group, []).append(f"'{key}', {value}")
+    pairs = groups.pop("")
+    for group, members in groups.items():
+        pairs.append(f"'{group}', json_build_object({', '.join(members)})")
+    return (
+        f"COPY (SELECT json_build_object({', '.join(pairs)}) {source}) "
+        f"TO STDOUT WITH ({JSON_LINES})"
+    )
+
+
+def export_profiles(model, file, output="csv", passwords=False):
+    with connection.cursor() as cursor:
+        cursor.copy_expert(export_sql(model, output, passwords), file)
+
+
+def cast(field, value):
+    """Cast staged text to the field's column type."""
+    if isinstance(field, ArrayField):
+        return (
+            f"ARRAY(SELECT jsonb_array_elements_text(({value})::jsonb))"
+            f"::{field.db_type(connection)}"
+        )
+    if field.get_internal_type() in TEXT_TYPES:
+        # Assignment to varchar rejects values that are too long.
+        return value
+    return f"({value})::{field.db_type(connection)}"
+
+
+def blank(field):
+    """Return the SQL of a missing value of a field, None if required."""
+    if field.null:
+        return "NULL"
+    if field.blank:
+        return "'{}'" if isinstance(field, ArrayField) else "''"
+    return None
+
+
+class ProfileImport:
+    """Import one profile file through the staging table.
+
+    Run inside a transaction: the staging table is dropped on commit.
+    """
+
+    def __init__(self, model, output="csv"):
+        self.model = model
+        self.role = next(
+            role for role, profile in PROFILE_TYPES.items()
+            if profile is model
+        )
+        self.output = output
+        self.columns = columns(model, passwords=True)
+        self.present = set()
+        self.ignored = []
+        self.counts = {}
+
+    def execute(self, sql, params=None):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
+
+    def load(self, file):
+        """COPY the file into the staging table and return its row count."""
+        known = {name for name, *_ in self.columns}
+        with connection.cursor() as cursor:
+            if self.output == "csv":
+                header = next(csv.reader([file.readline()]), [])
+                if len(set(header)) != len(header):
+                    raise ValueError("The CSV header repeats a column.")
+                self.present = known & set(header)
+                self.ignored = [name for name in header if name not in known]
+                # Only known column names reach the SQL; COPY still needs
+                # a column for every field, so unknown ones get placeholders.
+                header = [
+                    name if name in known else f"ignored_{index}"
+                    for index, name in enumerate(header)
+                ]
+                staged = ", ".join(f"{q(name)} text" for name in header)
+                cursor.execute(
+                    f"CREATE TEMP TABLE {STAGING} "
+                    f"(n bigserial, {staged}) ON COMMIT DROP"
+                )
+                names = ", ".join(q(name) for name in header)
+                cursor.copy_expert(
+                    f"COPY {STAGING} ({names}) FROM STDIN WITH (FORMAT csv)",
+                    file,
+                )
+            else:
+                self.present = known
+                cursor.execute(
+                    f"CREATE TEMP TABLE {STAGING}_raw "
+                    "(n bigserial, doc jsonb) ON COMMIT DROP"
+                )
+                cursor.copy_expert(
+                    f"COPY {STAGING}_raw (doc) FROM STDIN WITH ({JSON_LINES})",
+                    file,
+                )
+                extracted = ", ".join(
+                    f"doc #>> '{{{name.replace('.', ',')}}}' AS {q(name)}"
+                    for name, *_ in self.columns
+                )
+                cursor.execute(
+                    f"CREATE TEMP TABLE {STAGING} ON COMMIT DROP AS "
+                    f"SELECT n, {extracted} FROM {STAGING}_raw "
+                    "WHERE doc IS NOT NULL"
+                )
+                cursor.execute(f"DROP TABLE {STAGING}_raw")
+            cursor.execute(f"ANALYZE {STAGING}")
+            cursor.execute(f"SELECT count(*) FROM {STAGING}")
+            self.counts["read"] = cursor.fetchone()[0]
+        return self.counts["read"]
+
+    def value(self, name, field, default=None):
+        if name in self.present:
+            value = cast(field, f"s.{q(name)}")
+            if default is None:
+                return value
+            return f"COALESCE({value}, {default})"
+        return default
+
+    def required(self):
+        """Return the staged columns every row must fill."""
+        missing = []
+        for name, _, field in self.columns:
+            if name.startswith("location.") or blank(field) is not None:
+                continue
+            if name in ("user.role", "user.is_active", "user.password"):
+                continue
+            missing.append(name)
+        return missing
+
+    def choices(self):
+        """Return {staged column: allowed values} of the choice fields."""
+        allowed = {
+            name: [value for value, _ in field.flatchoices]
+            for name, _, field in self.columns
+            if field.choices and name in self.present
+        }
+        if "user.role" in allowed:
+            # A profile type's users all have its role.
+            allowed["user.role"] = [self.role]
+        return allowed
+
+    def clean(self):
+        """Drop incomplete and invalid rows and rows clashing with stored or
+        earlier rows; return the number of rows left to import."""
+        required = self.required()
+        absent = [name for name in required if name not in self.present]
+        if absent:
+            raise ValueError(f"Missing columns: {', '.join(absent)}")
+        self.counts["incomplete"] = self.execute(
+            f"DELETE FROM {STAGING} s WHERE "
+            + " OR ".join(f"coalesce(s.{q(name)}, '') = ''"
+                          for name in required)
+        )
+
+        self.counts["invalid"] = 0
+        for name, values in self.choices().items():
+            self.counts["invalid"] += self.execute(
+                f"DELETE FROM {STAGING} s WHERE coalesce(s.{q(name)}, '') "
+                f"<> '' AND s.{q(name)} <> ALL(%s)",
+                [values],
+            )
+
+        self.counts["duplicate"] = self.counts["existing"] = 0
+        for name, alias, field in self.columns:
+            if not field.unique:
+                continue
+            self.counts["duplicate"] += self.execute(
+                f"DELETE FROM {STAGING} WHERE n IN ("
+                f"SELECT n FROM (SELECT n, row_number() OVER "
+                f"(PARTITION BY {q(name)} ORDER BY n) AS r FROM {STAGING}) d "
+                "WHERE d.r > 1)"
+            )
+            table = q(field.model._meta.db_table)
+            self.counts["existing"] += self.execute(
+                f"DELETE FROM {STAGING} s WHERE EXISTS ("
+                f"SELECT 1 FROM {table} t "
+                f"WHERE t.{q(field.column)} = s.{q(name)})"
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {STAGING}")
+            return cursor.fetchone()[0]
+
+    def insert(self, model, values):
+        """INSERT ... SELECT the staged rows into model's table.
+
+        Fields missing from values get their default, the transaction's
+        time plus a microsecond per staged row for auto_now(_add) fields, so
+        imported rows keep distinct timestamps in file order, or NULL; a
+        missing primary key comes from its sequence.
+        """
+        names, exprs, params = [], [], []
+        for field in model._meta.concrete_fields:
+            if field.primary_key and field.attname not in values:
+                continue
+            names.append(q(field.column))
+            if field.attname in values:
+                exprs.append(values[field.attname])
+            elif getattr(field, "auto_now", False) or getattr(
+                field, "auto_now_add", False
+            ):
+                exprs.append("now() + s.n * interval '1 microsecond'")
+            elif field.has_default() and not callable(field.default):
+                exprs.append("%s")
+                params.append(field.get_db_prep_value(
+                    field.get_default(), connection
+                ))
+            else:
+                exprs.append("NULL")
+        return self.execute(
+            f"INSERT INTO {q(model._meta.db_table)} ({', '.join(names)}) "
+            f"SELECT {', '.join(exprs)} FROM {STAGING} s",
+            params,
+        )
+
+    def merge(self):
+        """Insert the staged rows; return the number of profiles added."""
+        User = get_user_model()
+        fields = {name: field for name, _, field in self.columns}
+        with connection.cursor() as cursor:
+            sequences = []
+            for model in (User, Location):
+                cursor.execute(
+                    "SELECT pg_get_serial_sequence(%s, 'id')",
+                    [model._meta.db_table],
+                )
+                sequences.append(cursor.fetchone()[0])
+            cursor.execute(
+                f"ALTER TABLE {STAGING} "
+                "ADD COLUMN user_id bigint, ADD COLUMN location_id bigint"
+            )
+            cursor.execute(
+                f"UPDATE {STAGING} SET user_id = nextval(%s), "
+                "location_id = nextval(%s)",
+                sequences,
+            )
+
+        location = {"id": "s.location_id", "geohash": "NULL"}
+        for name in LOCATION_FIELDS[:-1]:
+            value = self.value(f"location.{name}", fields[f"location.{name}"])
+            location[name] = value or "NULL"
+        coordinates = (
+            f"CASE WHEN {location['latitude']} IS NOT NULL "
+            f"AND {location['longitude']} IS NOT NULL "
+            f"THEN '{Location.DONE}' ELSE '{Location.PENDING}' END"
+        )
+        location["geocodeStatus"] = self.value(
+            "location.geocodeStatus", fields["location.geocodeStatus"],
+            coordinates,
+        )
+        self.insert(Location, location)
+
+        self.insert(User, {
+            "id": "s.user_id",
+            "username": self.value("user.username", fields["user.username"]),
+            "email": self.value("user.email", fields["user.email"]),
+            "role": self.value(
+                "user.role", fields["user.role"], f"'{self.role}'"
+            ),
+            "is_active": self.value(
+                "user.is_active", fields["user.is_active"], "true"
+            ),
+            # Accounts without a password hash cannot log in until reset.
+            "password": self.value(
+                "user.password", fields["user.password"],
+                "'!' || md5(random()::text)",
+            ),
+        })
+
+        profile = {"user_id": "s.user_id", "location_id": "s.location_id"}
+        for name in profile_fields(self.model):
+            field = fields[name]
+            default = blank(field)
+            profile[field.attname] = (
+                self.value(name, field, None if default == "NULL" else default)
+                or default
+            )
+        self.counts["imported"] = self.insert(self.model, profile)
+
+        if {"location.latitude", "location.longitude"} <= self.present:
+            self.fill_geohashes()
+        # Dropped on commit anyway, but the caller's transaction may go on.
+        self.execute(f"DROP TABLE {STAGING}")
+        return self.counts["imported"]
+
+    def fill_geohashes(self):
+        """Compute the geohash of imported coordinates, chunk by chunk."""
+        table = q(Location._meta.db_table)
+        with connection.chunked_cursor() as rows, \
+                connection.cursor() as cursor:
+            rows.execute(
+                f"SELECT l.id, l.latitude, l.longitude FROM {table} l "
+                f"JOIN {STAGING} s ON s.location_id = l.id "
+                "WHERE l.latitude IS NOT NULL AND l.longitude IS NOT NULL"
+            )
+            while True:
+                chunk = rows.fetchmany(GEOHASH_CHUNK)
+                if not chunk:
+                    break
+                execute_values(
+                    cursor.cursor,
+                    f"UPDATE {table} l SET geohash = v.geohash "
+                    "FROM (VALUES %s) AS v(id, geohash) WHERE l.id = v.id",
+                    [
+                        (pk, geo.encode(float(lat), float(lng)))
+                        for pk, lat, lng in chunk
+                    ],
+                    page_size=len(chunk),
+                )
@@ -0,0 +1,82 @@
+"""
+Full-text and trigram search over business profiles.
+
+The full-text side matches every word of the query as a prefix against the
+trigger-maintained searchVector column. When the server has pg_trgm, names
+and types within trigram similarity of the query match too, so typos still
+find the business; both sides are answered by GIN indexes. SEARCH_TRIGRAM
+forces trigram matching on or off; when it is None the extension is looked
+up once per database connection.
+"""
+
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramSimilarity,
+)
+from django.core.signals import setting_changed
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.dispatch import receiver
+
+
+SEARCH_CONFIG = "english"  # Must match the trigger created by migration 0015
+WORD = re.compile(r"\w+")
+
+
+def words(text):
+    return WORD.findall(text.lower())
+
+
+@lru_cache(maxsize=None)
+def trigram_installed():
+    """Return whether the pg_trgm extension is installed."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def trigram_available():
+    """Return whether searches also match by trigram similarity."""
+    if settings.SEARCH_TRIGRAM is not None:
+        return settings.SEARCH_TRIGRAM
+    return trigram_installed()
+
+
+@receiver(connection_created)
+def reset_trigram(**kwargs):
+    # The extension may have been installed since the last connection.
+    trigram_installed.cache_clear()
+
+
+@receiver(setting_changed)
+def reset_trigram_setting(*, setting, **kwargs):
+    if setting == "SEARCH_TRIGRAM":
+        trigram_installed.cache_clear()
+
+
+def prefix_query(text):
+    """Return a query matching every word of text as a prefix."""
+    raw = " & ".join(f"{word}:*" for word in words(text))
+    return SearchQuery(raw, search_type="raw", config=SEARCH_CONFIG)
+
+
+def search_businesses(queryset, text):
+    """Filter business profiles matching text, best match first."""
+    query = prefix_query(text)
+    matches = Q(searchVector=query)
+    rank = SearchRank(F("searchVector"), query)
+    if trigram_available():
+        matches |= Q(businessName__trigram_similar=text)
+        matches |= Q(businessType__trigram_similar=text)
+        rank = rank + Greatest(
+            TrigramSimilarity("businessName", text),
+            TrigramSimilarity("businessType", text),
+        )
+    return queryset.filter(matches).annotate(rank=rank).order_by("-rank", "id")
@@ -0,0 +1,65 @@
+"""
+Signal handlers keeping derived data in step with the models.
+
+Caches are invalidated once the writing transaction commits: invalidated
+earlier, a concurrent read could refill them from the old committed row.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from django.contrib.auth import get_user_model
+
+from rest_framework.authtoken.models import Token
+
+from core import authentication, clusters, profile_cache, tokens
+from core.models import AdminProfile, BusinessProfile, Location, UserProfile
+
+
+def after_commit(func, *args):
+    transaction.on_commit(lambda: func(*args))
+
+
+@receiver(post_save, sender=Location)
+def location_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        # Fixtures are saved as stored, without Location.save() tracking
+        # the geohash, so drop the tiles of the stored one.
+        if instance.geohash:
+            after_commit(clusters.invalidate, [instance.geohash])
+        return
+    if instance.geohash_changed:
+        after_commit(
+            clusters.invalidate, [instance.previous_geohash, instance.geohash]
+        )
+    if not created:
+        after_commit(profile_cache.invalidate_locations, [instance.pk])
+
+
+@receiver(post_delete, sender=Location)
+def location_deleted(sender, instance, **kwargs):
+    after_commit(clusters.invalidate, [instance.geohash])
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_save, sender=AdminProfile)
+@receiver(post_save, sender=BusinessProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_delete, sender=AdminProfile)
+@receiver(post_delete, sender=BusinessProfile)
+def profile_changed(sender, instance, **kwargs):
+    after_commit(profile_cache.invalidate, instance.user_id)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def user_changed(sender, instance, **kwargs):
+    after_commit(profile_cache.invalidate, instance.pk)
+    after_commit(authentication.invalidate_user, instance.pk)
+    after_commit(tokens.forget_version, instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    after_commit(authentication.invalidate_token, instance.key)
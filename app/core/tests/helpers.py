@@ -0,0 +1,75 @@
+"""
+Shared helpers for API tests.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.models import AdminProfile, BusinessProfile, Location, UserProfile
+
+
+PROFILE_FIELDS = {
+    UserProfile: {
+        "lastName": "test",
+        "gender": "male",
+        "dob": "2000-01-01",
+        "interests": ["fishing"],
+    },
+    AdminProfile: {
+        "lastName": "test",
+        "gender": "male",
+        "dob": "2000-01-01",
+        "interests": ["fishing"],
+    },
+    BusinessProfile: {
+        "businessType": "test type",
+        "businessHours": {},
+        "contactNo": "0039928",
+    },
+}
+NAME_FIELDS = {
+    UserProfile: "firstName",
+    AdminProfile: "firstName",
+    BusinessProfile: "businessName",
+}
+ROLES = {
+    UserProfile: "user",
+    AdminProfile: "admin",
+    BusinessProfile: "business",
+}
+
+
+def create_profile(model, name, latitude=None, longitude=None, **fields):
+    """Create and return a profile of model with a unique email."""
+    email = f"{name}@example.com"
+    user = get_user_model().objects.create_user(
+        email=email, username=name, password="test12345", role=ROLES[model]
+    )
+    location = Location.objects.create(
+        city="test", state="test", country="test",
+        latitude=latitude, longitude=longitude,
+    )
+    return model.objects.create(
+        user=user,
+        location=location,
+        email=email,
+        **{NAME_FIELDS[model]: name, **PROFILE_FIELDS[model], **fields},
+    )
+
+
+class QueryBudgetMixin:
+    """Assert an endpoint stays within a fixed number of SQL queries."""
+
+    def assertQueryBudget(self, budget, url, params=None):
+        """GET url and fail if it runs more than budget queries."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params or {})
+        executed = len(queries)
+        if executed > budget:
+            statements = "\n".join(query["sql"] for query in queries)
+            self.fail(
+                f"GET {url} ran {executed} queries, budget is {budget}:\n"
+                f"{statements}"
+            )
+        return res
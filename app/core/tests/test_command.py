@@ -2,12 +2,25 @@
 Test custom django management command
 """
 
+import csv
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
 from unittest.mock import patch
 from psycopg2 import OperationalError as Psycopg2Error
 
-from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from geopy.exc import GeocoderUnavailable
+
+from core import geocoding
+from core.models import BusinessProfile, GeocodeCache, Location, UserProfile
 
 
 @patch("core.management.commands.wait_for_db.Command.check")
@@ -30,3 +43,390 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=["default"])
+
+
+@patch("core.geocoding.resolve")
+class GeocodeWorkerCommandTests(TestCase):
+    """Test the geocode_worker command."""
+
+    def test_geocode_worker_resolves_pending(self, patched_resolve):
+        """Test pending locations get coordinates and a final status."""
+        patched_resolve.side_effect = [(10.5, 20.25), (None, None)]
+        found = Location.objects.create(city="found", geocodeStatus=Location.PENDING)
+        missing = Location.objects.create(city="missing", geocodeStatus=Location.PENDING)
+        done = Location.objects.create(city="done", geocodeStatus=Location.DONE)
+
+        call_command("geocode_worker", "--once", stdout=StringIO())
+
+        found.refresh_from_db()
+        missing.refresh_from_db()
+        done.refresh_from_db()
+        self.assertEqual(found.geocodeStatus, Location.DONE)
+        self.assertEqual(float(found.latitude), 10.5)
+        self.assertEqual(missing.geocodeStatus, Location.FAILED)
+        self.assertIsNone(missing.latitude)
+        self.assertIsNone(done.latitude)
+        self.assertEqual(patched_resolve.call_count, 2)
+
+    @override_settings(GEOCODE_MAX_ATTEMPTS=2)
+    def test_geocoder_failure_is_retried(self, patched_resolve):
+        """Test a geocoder outage requeues the batch instead of failing it."""
+        patched_resolve.side_effect = GeocoderUnavailable("down")
+        first = Location.objects.create(city="first")
+        second = Location.objects.create(city="second")
+
+        call_command(
+            "geocode_worker", "--once", stdout=StringIO(), stderr=StringIO()
+        )
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.geocodeStatus, Location.PENDING)
+        self.assertEqual(first.geocodeAttempts, 1)
+        self.assertEqual(second.geocodeStatus, Location.PENDING)
+        self.assertEqual(second.geocodeAttempts, 0)
+
+        with self.assertRaises(GeocoderUnavailable):
+            geocoding.geocode_pending()
+        first.refresh_from_db()
+        self.assertEqual(first.geocodeStatus, Location.FAILED)
+
+    def test_stale_claim_is_taken_over(self, patched_resolve):
+        """Test locations claimed by a dead worker are geocoded again."""
+        patched_resolve.return_value = (10.5, 20.25)
+        stale = Location.objects.create(
+            city="stale", geocodeStatus=Location.GEOCODING
+        )
+        claimed = Location.objects.create(
+            city="claimed", geocodeStatus=Location.GEOCODING
+        )
+        Location.objects.filter(pk=stale.pk).update(
+            updatedAt=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertEqual(geocoding.geocode_pending(), 1)
+
+        stale.refresh_from_db()
+        claimed.refresh_from_db()
+        self.assertEqual(stale.geocodeStatus, Location.DONE)
+        self.assertEqual(claimed.geocodeStatus, Location.GEOCODING)
+
+    def test_edited_address_is_not_overwritten(self, patched_resolve):
+        """Test an address edited while geocoding keeps its new state."""
+        location = Location.objects.create(city="old")
+
+        def edit(address):
+            Location.objects.filter(pk=location.pk).update(
+                city="new", geocodeStatus=Location.PENDING
+            )
+            return (10.5, 20.25)
+
+        patched_resolve.side_effect = edit
+        geocoding.geocode_pending()
+
+        location.refresh_from_db()
+        self.assertEqual(location.geocodeStatus, Location.PENDING)
+        self.assertIsNone(location.latitude)
+
+
+def stub_lookup(address):
+    """Local stand-in for the remote geocoder."""
+    if address.startswith("unknown"):
+        return (None, None)
+    return (10.5, 20.25)
+
+
+@patch("core.geocoding.lookup", side_effect=stub_lookup)
+class GeocodeBackfillCommandTests(TestCase):
+    """Test the geocode_backfill command."""
+
+    def setUp(self):
+        geocoding.memory_cache.clear()
+
+    def create_location(self, street, **params):
+        defaults = {
+            "city": "city",
+            "state": "state",
+            "country": "country",
+            "geocodeStatus": Location.FAILED,
+        }
+        defaults.update(params)
+        return Location.objects.create(street=street, **defaults)
+
+    def test_backfill_resolves_missing_coordinates(self, patched_lookup):
+        """Test null coordinates are filled and duplicates geocoded once."""
+        first = self.create_location("known")
+        duplicate = self.create_location("KNOWN")
+        unknown = self.create_location("unknown")
+        pending = self.create_location("known", geocodeStatus=Location.PENDING)
+
+        out = StringIO()
+        call_command(
+            "geocode_backfill", "--chunk-size", "2", "--rate", "0", stdout=out
+        )
+
+        for location in (first, duplicate, unknown, pending):
+            location.refresh_from_db()
+        self.assertEqual(float(first.latitude), 10.5)
+        self.assertEqual(float(duplicate.longitude), 20.25)
+        self.assertEqual(first.geocodeStatus, Location.DONE)
+        self.assertEqual(unknown.geocodeStatus, Location.FAILED)
+        self.assertIsNone(pending.latitude)
+        self.assertEqual(patched_lookup.call_count, 2)
+        self.assertIn(f"Checkpoint id={unknown.id}", out.getvalue())
+
+    def test_backfill_resumes_after_id(self, patched_lookup):
+        """Test locations up to the checkpoint are skipped."""
+        skipped = self.create_location("known")
+        resumed = self.create_location("known")
+
+        call_command(
+            "geocode_backfill",
+            "--after-id", str(skipped.id),
+            "--rate", "0",
+            stdout=StringIO(),
+        )
+
+        skipped.refresh_from_db()
+        resumed.refresh_from_db()
+        self.assertIsNone(skipped.latitude)
+        self.assertEqual(resumed.geocodeStatus, Location.DONE)
+
+
+    def test_backfill_leaves_geocoder_failures_for_retry(self, patched_lookup):
+        """Test a failing geocoder neither stops the run nor marks rows."""
+        def lookup(address):
+            if address.startswith("down"):
+                raise GeocoderUnavailable("service down")
+            return stub_lookup(address)
+        patched_lookup.side_effect = lookup
+        down = self.create_location("down")
+        known = self.create_location("known")
+
+        err = StringIO()
+        call_command(
+            "geocode_backfill", "--chunk-size", "1", "--rate", "0",
+            stdout=StringIO(), stderr=err,
+        )
+
+        updated_at = down.updatedAt
+        down.refresh_from_db()
+        known.refresh_from_db()
+        self.assertIsNone(down.latitude)
+        self.assertEqual(down.updatedAt, updated_at)
+        self.assertFalse(GeocodeCache.objects.filter(address__startswith="down").exists())
+        self.assertIn("service down", err.getvalue())
+        self.assertEqual(known.geocodeStatus, Location.DONE)
+
+    def test_backfill_keeps_address_edited_meanwhile(self, patched_lookup):
+        """Test coordinates of the old address do not overwrite an edit."""
+        location = self.create_location("known")
+        store = geocoding.store
+
+        def edit_then_store(key, coordinates):
+            # Lookups run on worker threads; edit from the test's connection.
+            Location.objects.filter(pk=location.pk).update(street="moved")
+            store(key, coordinates)
+
+        with patch("core.geocoding.store", side_effect=edit_then_store):
+            call_command("geocode_backfill", "--rate", "0", stdout=StringIO())
+
+        location.refresh_from_db()
+        self.assertEqual(location.street, "moved")
+        self.assertIsNone(location.latitude)
+
+
+class BenchmarkBusinessSearchCommandTests(TestCase):
+    """Test the benchmark_business_search command."""
+
+    def test_benchmark_reports_plan(self):
+        """Test each query's plan is printed and the rows are rolled back."""
+        out = StringIO()
+        call_command(
+            "benchmark_business_search", "--rows", "50", "--query", "golden",
+            stdout=out, stderr=StringIO(),
+        )
+
+        self.assertIn("Inserted 50 businesses", out.getvalue())
+        self.assertIn("q='golden'", out.getvalue())
+        self.assertIn("Execution Time", out.getvalue())
+        self.assertFalse(BusinessProfile.objects.exists())
+
+
+class ProfileImportExportCommandTests(TestCase):
+    """Test the COPY based import_profiles and export_profiles commands."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def create_profile(self, name, **location):
+        user = get_user_model().objects.create_user(
+            email=f"{name}@example.com", username=name, password="test12345"
+        )
+        return UserProfile.objects.create(
+            user=user,
+            location=Location.objects.create(city="city", **location),
+            firstName=name,
+            lastName="test",
+            email=f"{name}@example.com",
+            gender="male",
+            dob="2000-01-01",
+            interests=["fishing", "chess"],
+        )
+
+    def write_csv(self, name, rows):
+        with open(self.path(name), "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        return self.path(name)
+
+    def test_round_trip(self):
+        """Test exported profiles import unchanged, in both formats."""
+        for output in ("csv", "ndjson"):
+            with self.subTest(output=output):
+                UserProfile.objects.all().delete()
+                get_user_model().objects.all().delete()
+                self.create_profile(
+                    "alice", latitude=10.5, longitude=20.25,
+                    geocodeStatus=Location.DONE,
+                )
+                self.create_profile("bob")
+                path = self.path(f"users.{output}")
+
+                call_command(
+                    "export_profiles", "user", path, "--with-passwords",
+                    stdout=StringIO(),
+                )
+                get_user_model().objects.all().delete()
+                out = StringIO()
+                call_command("import_profiles", "user", path, stdout=out)
+
+                self.assertIn("Imported 2 user profiles", out.getvalue())
+                alice = UserProfile.objects.select_related(
+                    "user", "location"
+                ).get(email="alice@example.com")
+                self.assertEqual(alice.interests, ["fishing", "chess"])
+                self.assertTrue(alice.user.check_password("test12345"))
+                self.assertEqual(alice.location.geocodeStatus, Location.DONE)
+                self.assertEqual(alice.location.geohash, alice.location.compute_geohash())
+                bob = UserProfile.objects.get(email="bob@example.com")
+                self.assertEqual(bob.location.geocodeStatus, Location.PENDING)
+                # The filter columns are copied for COPY-imported rows too.
+                self.assertEqual((alice.userRole, alice.locationCity), ("user", "city"))
+                # Rows keep distinct timestamps in file order for the cursor.
+                self.assertLess(alice.createdAt, bob.createdAt)
+
+                # Imported ids came from the sequences.
+                self.create_profile("carol")
+
+    def test_export_ndjson_nests_objects(self):
+        self.create_profile("alice")
+
+        call_command("export_profiles", "user", self.path("users.ndjson"), stdout=StringIO())
+
+        with open(self.path("users.ndjson")) as file:
+            rows = [json.loads(line) for line in file]
+        self.assertEqual(rows[0]["user"]["username"], "alice")
+        self.assertEqual(rows[0]["location"]["city"], "city")
+        self.assertEqual(rows[0]["interests"], ["fishing", "chess"])
+        self.assertNotIn("password", rows[0]["user"])
+
+    def test_import_skips_invalid_rows(self):
+        """Test incomplete, invalid, duplicate and existing rows are skipped."""
+        self.create_profile("taken")
+        row = {
+            "user.username": "new",
+            "user.email": "new@example.com",
+            "user.role": "",
+            "location.city": "city",
+            "firstName": "new",
+            "lastName": "test",
+            "email": "new@example.com",
+            "gender": "female",
+            "dob": "2001-02-03",
+            "unknown": "ignored",
+        }
+        path = self.write_csv("users.csv", [
+            row,
+            {**row, "user.username": "other"},
+            {**row, "user.username": "taken", "user.email": "x@example.com",
+             "email": "x@example.com"},
+            {**row, "user.username": "blank", "user.email": "blank@example.com",
+             "email": "blank@example.com", "firstName": ""},
+            {**row, "user.username": "gender", "user.email": "gender@example.com",
+             "email": "gender@example.com", "gender": "unknown"},
+            {**row, "user.username": "admin", "user.email": "admin@example.com",
+             "email": "admin@example.com", "user.role": "admin"},
+        ])
+        out = StringIO()
+
+        call_command("import_profiles", "user", path, stdout=out)
+
+        self.assertIn(
+            "Imported 1 user profiles", out.getvalue()
+        )
+        self.assertIn(
+            "skipped 1 incomplete, 2 invalid, 1 duplicate and 1 existing rows",
+            out.getvalue(),
+        )
+        self.assertIn("Ignored columns: unknown", out.getvalue())
+        profile = UserProfile.objects.select_related("user").get(email="new@example.com")
+        self.assertEqual(profile.interests, [])
+        self.assertEqual(profile.user.role, "user")
+        self.assertFalse(profile.user.has_usable_password())
+
+    def test_import_header_cannot_inject_sql(self):
+        """Test unknown header names never reach the staging SQL."""
+        header = 'x" text); DROP TABLE core_user; --'
+        path = self.write_csv("users.csv", [{
+            "user.username": "new",
+            "user.email": "new@example.com",
+            "firstName": "new",
+            "lastName": "test",
+            "email": "new@example.com",
+            "gender": "female",
+            "dob": "2001-02-03",
+            header: "ignored",
+        }])
+        out = StringIO()
+
+        call_command("import_profiles", "user", path, stdout=out)
+
+        self.assertIn("Imported 1 user profiles", out.getvalue())
+        self.assertIn(f"Ignored columns: {header}", out.getvalue())
+        self.assertTrue(get_user_model().objects.filter(username="new").exists())
+
+    def test_import_missing_column_fails(self):
+        path = self.write_csv("users.csv", [{"user.username": "a"}])
+
+        with self.assertRaises(CommandError):
+            call_command("import_profiles", "user", path, stdout=StringIO())
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_import_business_fills_search_vector(self):
+        path = self.path("businesses.ndjson")
+        with open(path, "w") as file:
+            file.write(json.dumps({
+                "user": {"username": "bakery", "email": "bakery@example.com"},
+                "location": {"city": "city"},
+                "businessName": "Bakers Corner",
+                "businessType": "bakery",
+                "businessHours": {"monday": "9-5"},
+                "email": "bakery@example.com",
+                "contactNo": "0039928",
+            }) + "\n")
+
+        call_command("import_profiles", "business", path, stdout=StringIO())
+
+        business = BusinessProfile.objects.select_related("user").get()
+        self.assertEqual(business.businessHours, {"monday": "9-5"})
+        self.assertEqual(business.user.role, "business")
+        self.assertTrue(
+            BusinessProfile.objects.filter(searchVector="baker").exists()
+        )
@@ -0,0 +1,179 @@
+"""
+Test for the fast list serialization path.
+"""
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from adminProfile.serializers import AdminProfileSerializer
+from businessProfile.serializers import BusinessProfileSerializer
+from core.fastpath import compile_plan
+from core.models import AdminProfile, BusinessProfile, Location, UserProfile
+from userProfile.serializers import UserProfileSerializer
+
+
+USER_LIST_URL = reverse("userProfile:get")
+
+
+def create_user(name, **params):
+    return get_user_model().objects.create_user(
+        email=f"{name}@example.com", username=name, password="test12345",
+        **params,
+    )
+
+
+def create_location(**params):
+    defaults = {"street": "street", "city": "city", "country": "country"}
+    defaults.update(params)
+    return Location.objects.create(**defaults)
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+class FastPathTests(TestCase):
+    """Test the fast path renders exactly what the serializers render."""
+
+    def setUp(self):
+        UserProfile.objects.create(
+            user=create_user("user1"),
+            location=create_location(latitude=23.7104, longitude=90.40744),
+            firstName="One",
+            middleName="Middle",
+            lastName="Profile",
+            email="user1@example.com",
+            gender="female",
+            dob="1990-02-03",
+            contactNo="0039928",
+            profileImg="one.jpg",
+            interests=["fishing", "hiking"],
+        )
+        UserProfile.objects.create(
+            user=create_user("user2"),
+            location=create_location(geocodeStatus=Location.PENDING),
+            firstName="Two",
+            lastName="Profile",
+            email="user2@example.com",
+            gender="male",
+            dob="2000-01-01",
+            interests=[],
+        )
+        AdminProfile.objects.create(
+            user=create_user("admin", role="admin", is_staff=True),
+            location=create_location(),
+            firstName="Admin",
+            lastName="Profile",
+            email="admin@example.com",
+            gender="other",
+            dob="1985-12-31",
+            interests=["chess"],
+        )
+        BusinessProfile.objects.create(
+            user=create_user("business", role="business"),
+            location=create_location(latitude=1.5, longitude=-2.25),
+            businessName="Business",
+            businessType="retail",
+            businessHours={"monday": "10:00am-09:00pm", "sunday": None},
+            email="business@example.com",
+            contactNo="0039928",
+        )
+
+    def assertSameOutput(self, serializer_class, params=None):
+        request = Request(APIRequestFactory().get("/", params or {}))
+        context = {"request": request}
+        model = serializer_class.Meta.model
+        queryset = model.objects.select_related("user", "location")
+        queryset = queryset.order_by("id")
+
+        expected = serializer_class(queryset, many=True, context=context).data
+        paths, build = compile_plan(
+            serializer_class(context=context), queryset
+        )
+        rows = [build(row) for row in queryset.values(*paths)]
+
+        self.assertTrue(rows)
+        self.assertEqual(render(rows), render(expected))
+
+    def test_user_profiles(self):
+        """Test user profiles, including a null middleName and location."""
+        self.assertSameOutput(UserProfileSerializer)
+
+    def test_admin_profiles(self):
+        self.assertSameOutput(AdminProfileSerializer)
+
+    def test_business_profiles(self):
+        """Test business hours and coordinates are rendered the same."""
+        self.assertSameOutput(BusinessProfileSerializer)
+
+    def test_sparse_fieldsets(self):
+        """Test pruned serializers compile to the same subset."""
+        self.assertSameOutput(
+            UserProfileSerializer, {"fields": "firstName,location.city"}
+        )
+        self.assertSameOutput(
+            BusinessProfileSerializer, {"omit": "location,businessHours"}
+        )
+
+
+class FastListApiTests(TestCase):
+    """Test list endpoints return the same body with the fast path."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(create_user("staff", is_staff=True))
+        for index in range(3):
+            UserProfile.objects.create(
+                user=create_user(f"user{index}"),
+                location=create_location(),
+                firstName=f"User {index}",
+                lastName="Profile",
+                email=f"user{index}@example.com",
+                gender="male",
+                dob="2000-01-01",
+                interests=["fishing"],
+            )
+
+    def get_pages(self, params):
+        pages = []
+        url = USER_LIST_URL
+        while url:
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, 200, res.content)
+            pages.append(res.content)
+            url, params = res.data["next"], None
+        return pages
+
+    def test_list_matches_serializer(self):
+        for params in ({"page_size": 2}, {"page_size": 2, "omit": "user"}):
+            with override_settings(FAST_LIST_SERIALIZATION=False):
+                expected = self.get_pages(params)
+            with override_settings(FAST_LIST_SERIALIZATION=True):
+                pages = self.get_pages(params)
+
+            self.assertEqual(len(pages), 2)
+            self.assertEqual(pages, expected)
+
+
+class BenchmarkSerializersCommandTests(TestCase):
+    """Test the benchmark_serializers command."""
+
+    def test_benchmark_reports_both_paths(self):
+        out, err = StringIO(), StringIO()
+        call_command(
+            "benchmark_serializers", "--rows", "5", "--repeat", "1",
+            "--profile", "business", stdout=out, stderr=err,
+        )
+
+        self.assertIn("serializer", out.getvalue())
+        self.assertIn("fast path", out.getvalue())
+        self.assertEqual(err.getvalue(), "")
+        self.assertFalse(BusinessProfile.objects.exists())
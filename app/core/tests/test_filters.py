@@ -0,0 +1,50 @@
+"""
+Test for the index-backed profile filters.
+"""
+
+from django.test import SimpleTestCase
+
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from adminProfile.views import AdminProfileGetView
+from businessProfile.views import BusinessProfileGetView
+from core.filters import Filter, IndexedFilterBackend, IndexPlan
+from userProfile.views import UserProfileGetView
+
+
+class IndexPlanTests(SimpleTestCase):
+    """Test every declared index plan is backed by a model index."""
+
+    def test_plans_reference_indexes(self):
+        for view in (
+            UserProfileGetView, AdminProfileGetView, BusinessProfileGetView
+        ):
+            model = view.queryset.model
+            indexes = {index.name for index in model._meta.indexes}
+            for plan in view.index_plans:
+                self.assertIn(plan.index, indexes, view.__name__)
+                for name in plan.filters + sorted(plan.ranges):
+                    self.assertIn(name, view.profile_filters)
+
+
+class DefaultOrderingView(UserProfileGetView):
+    profile_filters = {"gender": Filter("gender", serializers.CharField())}
+    index_plans = [IndexPlan("userprofile_gender_idx", filters=["gender"])]
+
+
+class IndexedFilterBackendTests(SimpleTestCase):
+    """Test the ordering a request is checked against."""
+
+    def plan(self, params):
+        request = Request(APIRequestFactory().get("/", params))
+        return IndexedFilterBackend().get_plan(request, DefaultOrderingView())
+
+    def test_default_ordering_must_be_covered(self):
+        """Test a filter is rejected when its plan cannot page by createdAt."""
+        with self.assertRaises(serializers.ValidationError):
+            self.plan({"gender": "male"})
+
+    def test_unfiltered_request_needs_no_plan(self):
+        self.assertIsNone(self.plan({})[0])
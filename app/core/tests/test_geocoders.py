@@ -0,0 +1,94 @@
+"""
+Test for the geocoder backends.
+"""
+
+import os
+import tempfile
+from unittest.mock import MagicMock
+
+from django.test import SimpleTestCase, override_settings
+
+from core import geocoding
+from core.geocoders import ChainGeocoder, GazetteerGeocoder, get_geocoder
+
+
+GAZETTEER = """city,state,country,latitude,longitude,population
+Springfield,Illinois,United States,39.80172,-89.64371,116250
+Springfield,Massachusetts,United States,42.10148,-72.58981,155929
+San Francisco,California,United States,37.77493,-122.41942,864816
+Dhaka,Dhaka Division,Bangladesh,23.7104,90.40744,10356500
+"""
+
+
+def write_gazetteer(test):
+    """Write the sample gazetteer to a temporary file for a test."""
+    handle, path = tempfile.mkstemp(suffix=".csv")
+    with os.fdopen(handle, "w") as gazetteer:
+        gazetteer.write(GAZETTEER)
+    test.addCleanup(os.remove, path)
+    return path
+
+
+class GazetteerGeocoderTests(SimpleTestCase):
+    """Test offline geocoding from a gazetteer file."""
+
+    def setUp(self):
+        self.geocoder = GazetteerGeocoder(write_gazetteer(self))
+
+    def test_exact_match(self):
+        """Test city, state and country resolve to that place."""
+        point = self.geocoder.geocode(
+            "1 Main St, Springfield, Illinois, United States"
+        )
+        self.assertEqual(point, (39.80172, -89.64371))
+
+    def test_city_and_country_match(self):
+        """Test an unknown state falls back to the most populous city."""
+        point = self.geocoder.geocode("Springfield, Unknown, united states")
+        self.assertEqual(point, (42.10148, -72.58981))
+
+    def test_prefix_match(self):
+        """Test a truncated city name matches by prefix."""
+        point = self.geocoder.geocode("Street, San Fran, CA, United States")
+        self.assertEqual(point, (37.77493, -122.41942))
+
+    def test_fuzzy_match(self):
+        """Test a misspelled city name matches within the country."""
+        point = self.geocoder.geocode("Street, Dhakka, Dhaka, Bangladesh")
+        self.assertEqual(point, (23.7104, 90.40744))
+
+    def test_miss_returns_none(self):
+        """Test unknown places are reported as a miss."""
+        self.assertIsNone(self.geocoder.geocode("Street, Paris, Fr, France"))
+        self.assertIsNone(self.geocoder.geocode("Nowhere"))
+
+
+class GeocoderChainTests(SimpleTestCase):
+    """Test backend selection and fall-through."""
+
+    def test_chain_falls_through_on_miss(self):
+        """Test the next backend is only used when the first misses."""
+        offline = MagicMock(**{"geocode.return_value": None})
+        remote = MagicMock(**{"geocode.return_value": (1.0, 2.0)})
+
+        point = ChainGeocoder([offline, remote]).geocode("Somewhere")
+
+        self.assertEqual(point, (1.0, 2.0))
+        offline.geocode.assert_called_once_with("Somewhere")
+
+    def test_backends_built_from_settings(self):
+        """Test the GEOCODER_BACKENDS setting selects the backends."""
+        path = write_gazetteer(self)
+        backends = [{
+            "BACKEND": "core.geocoders.GazetteerGeocoder",
+            "OPTIONS": {"path": path},
+        }]
+        with override_settings(GEOCODER_BACKENDS=backends):
+            self.assertIsInstance(
+                get_geocoder().backends[0], GazetteerGeocoder
+            )
+            self.assertEqual(
+                geocoding.lookup("Street, Dhaka, Dhaka Division, Bangladesh"),
+                (23.7104, 90.40744),
+            )
+            self.assertEqual(geocoding.lookup("Nowhere, Land"), (None, None))
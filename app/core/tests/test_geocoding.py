@@ -0,0 +1,115 @@
+"""
+Test for the geocoding cache.
+"""
+
+from datetime import timedelta
+from unittest.mock import patch, MagicMock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from geopy.exc import GeocoderTimedOut
+
+from core import geocoding
+from core.geocoders import get_geocoder
+from core.models import GeocodeCache
+
+
+ADDRESS = "Test Street, Test City, Test State, Test Country"
+
+
+def nominatim_returning(latitude=None, longitude=None):
+    """Return a patched Nominatim whose geocode yields the given point."""
+    result = None
+    if latitude is not None:
+        result = MagicMock(latitude=latitude, longitude=longitude)
+    geolocator = MagicMock()
+    geolocator.geocode.return_value = result
+    return geolocator
+
+
+@patch("core.geocoders.Nominatim")
+class GeocodeCacheTests(TestCase):
+    """Test the memory and database geocode caches."""
+
+    def setUp(self):
+        geocoding.memory_cache.clear()
+        get_geocoder.cache_clear()
+
+    def test_normalize_address(self, patched_nominatim):
+        """Test equivalent addresses share a cache key."""
+        self.assertEqual(
+            geocoding.normalize_address("  Test  Street, TEST City.,None, "),
+            "test street, test city",
+        )
+        self.assertEqual(
+            geocoding.normalize_address(ADDRESS),
+            geocoding.normalize_address(ADDRESS.upper()),
+        )
+
+    def test_result_is_stored(self, patched_nominatim):
+        """Test a remote result is saved to the database cache."""
+        patched_nominatim.return_value = nominatim_returning(10.5, 20.25)
+
+        self.assertEqual(geocoding.geocode(ADDRESS), (10.5, 20.25))
+
+        entry = GeocodeCache.objects.get(
+            address=geocoding.normalize_address(ADDRESS)
+        )
+        self.assertTrue(entry.found)
+
+    def test_memory_hit_skips_database(self, patched_nominatim):
+        """Test a repeated address is answered from memory."""
+        patched_nominatim.return_value = nominatim_returning(10.5, 20.25)
+        geocoding.geocode(ADDRESS)
+
+        with self.assertNumQueries(0):
+            result = geocoding.geocode(ADDRESS.lower())
+
+        self.assertEqual(result, (10.5, 20.25))
+        patched_nominatim.return_value.geocode.assert_called_once()
+
+    def test_database_hit_skips_remote(self, patched_nominatim):
+        """Test a cached address does not call the geocoder."""
+        GeocodeCache.objects.create(
+            address=geocoding.normalize_address(ADDRESS),
+            latitude=1.5,
+            longitude=2.5,
+        )
+
+        with self.assertNumQueries(1):
+            result = geocoding.geocode(ADDRESS)
+
+        self.assertEqual(result, (1.5, 2.5))
+        patched_nominatim.assert_not_called()
+
+    def test_negative_result_is_cached(self, patched_nominatim):
+        """Test an address without a match is not looked up again."""
+        patched_nominatim.return_value = nominatim_returning()
+
+        self.assertEqual(geocoding.geocode(ADDRESS), (None, None))
+        geocoding.memory_cache.clear()
+        self.assertEqual(geocoding.geocode(ADDRESS), (None, None))
+
+        patched_nominatim.return_value.geocode.assert_called_once()
+
+    def test_expired_negative_result_is_retried(self, patched_nominatim):
+        """Test stale negative results are looked up again."""
+        patched_nominatim.return_value = nominatim_returning(3.0, 4.0)
+        entry = GeocodeCache.objects.create(
+            address=geocoding.normalize_address(ADDRESS)
+        )
+        GeocodeCache.objects.filter(pk=entry.pk).update(
+            updatedAt=timezone.now() - timedelta(days=30)
+        )
+
+        self.assertEqual(geocoding.geocode(ADDRESS), (3.0, 4.0))
+        entry.refresh_from_db()
+        self.assertTrue(entry.found)
+
+    def test_timeout_is_not_cached(self, patched_nominatim):
+        """Test geocoder timeouts are retried on the next call."""
+        patched_nominatim.return_value.geocode.side_effect = GeocoderTimedOut
+
+        self.assertEqual(geocoding.geocode(ADDRESS), (None, None))
+        self.assertFalse(GeocodeCache.objects.exists())
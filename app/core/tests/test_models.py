@@ -4,7 +4,9 @@ Test for models.
 
 from decimal import Decimal
 
+from django.core import serializers
 from django.test import TestCase
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 from core import models
@@ -55,3 +57,17 @@ class ModelsTest(TestCase):
         self.assertTrue(user.is_superuser)
         self.assertTrue(user.is_staff)
 
+    def test_location_loads_from_fixture(self):
+        """Test raw (fixture) saves of locations pass through the signals."""
+        location = models.Location(
+            pk=9999, city="city", state="state", country="country",
+            latitude=Decimal("10.5"), longitude=Decimal("20.25"), geohash="s3",
+            createdAt=timezone.now(), updatedAt=timezone.now(),
+        )
+        fixture = serializers.serialize("json", [location])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for obj in serializers.deserialize("json", fixture):
+                obj.save()
+
+        self.assertEqual(models.Location.objects.get(pk=9999).geohash, "s3")
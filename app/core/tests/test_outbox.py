@@ -0,0 +1,147 @@
+"""
+Tests for the email outbox.
+"""
+
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPServerDisconnected
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import outbox
+from core.models import OutboxEmail
+
+
+class CountingBackend(EmailBackend):
+    """Locmem backend counting the connections it opens."""
+
+    opened = 0
+
+    def open(self):
+        if not getattr(self, "is_open", False):
+            self.is_open = True
+            CountingBackend.opened += 1
+
+    def close(self):
+        self.is_open = False
+
+
+@override_settings(
+    OUTBOX_MAX_ATTEMPTS=3, OUTBOX_RETRY_DELAY=60, OUTBOX_RETRY_MAX_DELAY=100,
+    OUTBOX_CLAIM_TIMEOUT=300,
+)
+class OutboxTests(TestCase):
+    """Test delivering queued emails."""
+
+    def enqueue(self, n=1):
+        return [
+            outbox.enqueue("Subject", f"Body {i}", [f"to{i}@example.com"])
+            for i in range(n)
+        ]
+
+    def test_backoff_doubles_up_to_max(self):
+        self.assertEqual(outbox.backoff(1), timedelta(seconds=60))
+        self.assertEqual(outbox.backoff(2), timedelta(seconds=100))
+
+    def test_batch_reuses_one_connection(self):
+        """Test a batch is sent over a single connection."""
+        self.enqueue(3)
+        CountingBackend.opened = 0
+
+        sent = outbox.deliver_pending(connection=CountingBackend())
+
+        self.assertEqual(sent, 3)
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(
+            OutboxEmail.objects.exclude(status=OutboxEmail.SENT).exists()
+        )
+
+    def test_failure_backs_off_then_dead_letters(self):
+        """Test failed sends are retried later and finally dead-lettered."""
+        email, = self.enqueue()
+        failing = patch.object(
+            EmailBackend, "send_messages",
+            side_effect=SMTPServerDisconnected("gone"),
+        )
+
+        with failing:
+            outbox.deliver_pending()
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.nextAttemptAt, timezone.now())
+        self.assertIn("gone", email.lastError)
+        # Not due yet.
+        self.assertEqual(outbox.deliver_pending(), 0)
+
+        with failing:
+            for _ in range(2):
+                OutboxEmail.objects.update(nextAttemptAt=timezone.now())
+                outbox.deliver_pending()
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.DEAD)
+        self.assertEqual(email.attempts, 3)
+
+    def test_failure_does_not_block_batch(self):
+        self.enqueue(2)
+        with patch.object(
+            EmailBackend, "send_messages",
+            side_effect=[SMTPServerDisconnected("gone"), 1],
+        ):
+            outbox.deliver_pending()
+
+        statuses = list(
+            OutboxEmail.objects.order_by("id").values_list("status", flat=True)
+        )
+        self.assertEqual(statuses, [OutboxEmail.PENDING, OutboxEmail.SENT])
+
+    def test_sends_outside_claim_transaction(self):
+        """Test no transaction or row lock is held while sending."""
+        self.enqueue()
+        depth = len(connection.atomic_blocks)
+        seen = []
+
+        def send_messages(backend, messages):
+            seen.append((
+                len(connection.atomic_blocks),
+                OutboxEmail.objects.get().status,
+            ))
+            return len(messages)
+
+        with patch.object(EmailBackend, "send_messages", send_messages):
+            outbox.deliver_pending()
+
+        self.assertEqual(seen, [(depth, OutboxEmail.SENDING)])
+        self.assertEqual(OutboxEmail.objects.get().status, OutboxEmail.SENT)
+
+    def test_stale_claim_is_sent_again(self):
+        """Test emails claimed by a worker that died are sent again."""
+        fresh, stale = self.enqueue(2)
+        OutboxEmail.objects.update(status=OutboxEmail.SENDING)
+        OutboxEmail.objects.filter(pk=stale.pk).update(
+            updatedAt=timezone.now() - timedelta(seconds=301)
+        )
+
+        self.assertEqual(outbox.deliver_pending(), 1)
+
+        fresh.refresh_from_db()
+        stale.refresh_from_db()
+        self.assertEqual(fresh.status, OutboxEmail.SENDING)
+        self.assertEqual(stale.status, OutboxEmail.SENT)
+
+    def test_deliver_outbox_command(self):
+        self.enqueue(2)
+
+        call_command("deliver_outbox", "--once", stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            OutboxEmail.objects.filter(status=OutboxEmail.SENT).count(), 2
+        )
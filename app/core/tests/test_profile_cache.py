@@ -0,0 +1,118 @@
+"""
+Test for the per-user profile payload cache.
+"""
+
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from core import profile_cache
+from core.models import Location, UserProfile
+
+
+class ProfileCacheTests(SimpleTestCase):
+    """Test caching, counters and stampede protection."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_hit_after_miss(self):
+        """Test a payload is computed once and then served from cache."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {"firstName": "test"}
+
+        for _ in range(3):
+            data = profile_cache.get_or_compute(1, "variant", compute)
+
+        self.assertEqual(data, {"firstName": "test"})
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(profile_cache.stats(), {"hits": 2, "misses": 1})
+
+    def test_invalidate_drops_payloads(self):
+        """Test invalidating a user forces a recompute for that user only."""
+        profile_cache.get_or_compute(1, "variant", lambda: "old")
+        profile_cache.get_or_compute(2, "variant", lambda: "other")
+
+        profile_cache.invalidate(1)
+
+        self.assertEqual(
+            profile_cache.get_or_compute(1, "variant", lambda: "new"), "new"
+        )
+        self.assertEqual(
+            profile_cache.get_or_compute(2, "variant", lambda: "new"), "other"
+        )
+
+    def test_concurrent_misses_compute_once(self):
+        """Test concurrent misses wait for a single recompute."""
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return "payload"
+
+        def request():
+            results.append(profile_cache.get_or_compute(1, "variant", compute))
+
+        threads = [threading.Thread(target=request) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["payload"] * 5)
+
+
+class ProfileCacheInvalidationTests(TestCase):
+    """Test model signals invalidate the owner's cached payloads."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", username="user", password="test12345"
+        )
+        self.location = Location.objects.create(city="test")
+        self.profile = UserProfile.objects.create(
+            user=self.user,
+            location=self.location,
+            firstName="test",
+            lastName="test",
+            email="user@example.com",
+            gender="male",
+            dob="2000-01-01",
+            interests=[],
+        )
+        self.version = profile_cache.get_version(self.user.pk)
+
+    def assertInvalidated(self):
+        self.assertNotEqual(
+            profile_cache.get_version(self.user.pk), self.version
+        )
+
+    def test_profile_save_invalidates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.save()
+        self.assertInvalidated()
+
+    def test_user_save_invalidates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertInvalidated()
+
+    def test_location_save_invalidates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.location.save()
+        self.assertInvalidated()
+
+    def test_profile_delete_invalidates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.delete()
+        self.assertInvalidated()
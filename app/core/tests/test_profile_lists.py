@@ -0,0 +1,44 @@
+"""
+Test the query counts of the profile list endpoints.
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import AdminProfile, BusinessProfile, UserProfile
+from core.tests.helpers import QueryBudgetMixin, create_profile
+
+
+LIST_URLS = {
+    UserProfile: reverse("userProfile:get"),
+    AdminProfile: reverse("adminProfile:get-all-admins"),
+    BusinessProfile: reverse("businessProfile:get-all-business_profiles"),
+}
+
+
+class ListQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Test the list endpoints run a constant number of queries."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=get_user_model().objects.create_user(
+            email="staff@example.com", username="staff", password="test12345", is_staff=True
+        ))
+
+    def test_list_query_count_is_constant(self):
+        """Test related users and locations are fetched with the rows."""
+        for model, url in LIST_URLS.items():
+            with self.subTest(model=model.__name__):
+                name = model.__name__.lower()
+                for index in range(3):
+                    create_profile(model, f"{name}{index}")
+                res = self.assertQueryBudget(1, url)
+                self.assertEqual(len(res.data['results']), 3)
+
+                for index in range(3, 13):
+                    create_profile(model, f"{name}{index}")
+                res = self.assertQueryBudget(1, url)
+                self.assertEqual(len(res.data['results']), 13)
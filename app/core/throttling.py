@@ -0,0 +1,142 @@
+"""
+Sliding-window throttles for the expensive authentication endpoints.
+
+Each scope is limited per client IP, per account (the submitted email) and
+globally. A limit is estimated from two fixed-window counters in the shared
+cache, weighting the previous window by how much of it still overlaps the
+sliding window, so bursts at a window boundary cannot double the rate.
+Every dimension is counted before it is checked, with atomic increments, so
+concurrent requests cannot all slip under a limit; a rejected request's
+counts are taken back so it does not use up any budget, and rejections are
+counted per scope/dimension.
+"""
+
+import logging
+import math
+import time
+from collections.abc import Mapping
+
+from django.core.cache import cache
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from core.cache import incr
+
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = ("ip", "account", "global")
+
+
+def parse_rate(rate):
+    """Parse a DRF rate such as "5/min" into (requests, seconds)."""
+    num, period = rate.split("/")
+    return int(num), {"s": 1, "m": 60, "h": 3600, "d": 86400}[period[0]]
+
+
+def rejected_key(scope, dimension):
+    return f"throttle:rejected:{scope}:{dimension}"
+
+
+def rejection_counts(scope):
+    """Return the number of rejected requests per dimension of a scope."""
+    keys = {
+        dimension: rejected_key(scope, dimension) for dimension in DIMENSIONS
+    }
+    counts = cache.get_many(keys.values())
+    return {dimension: counts.get(key, 0) for dimension, key in keys.items()}
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Throttle a scope per IP, per account and globally.
+
+    Rates come from REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] under
+    "<scope>_ip", "<scope>_account" and "<scope>_global"; a missing rate
+    leaves that dimension unlimited.
+    """
+
+    scope = None
+    account_field = "email"
+
+    def get_account(self, request):
+        # A JSON body may be a list or scalar; only the IP limits apply then.
+        if not isinstance(request.data, Mapping):
+            return None
+        account = request.data.get(self.account_field)
+        if isinstance(account, str) and account.strip():
+            return account.strip().lower()
+        return None
+
+    def get_limits(self, request):
+        """Yield (dimension, ident, limit, duration) for each limit."""
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        idents = {
+            "ip": self.get_ident(request),
+            "account": self.get_account(request),
+            "global": "all",
+        }
+        for dimension in DIMENSIONS:
+            rate = rates.get(f"{self.scope}_{dimension}")
+            if rate is None or idents[dimension] is None:
+                continue
+            limit, duration = parse_rate(rate)
+            yield dimension, idents[dimension], limit, duration
+
+    def allow_request(self, request, view):
+        now = time.time()
+        windows = []
+        for dimension, ident, limit, duration in self.get_limits(request):
+            window = int(now // duration)
+            key = f"throttle:{self.scope}:{dimension}:{ident}"
+            windows.append((
+                dimension, limit, duration, window,
+                f"{key}:{window}", f"{key}:{window - 1}",
+            ))
+        previous_counts = cache.get_many([window[5] for window in windows])
+        # Count first: incr is atomic, so concurrent requests each see
+        # their own position in the window and cannot all pass a limit.
+        counts = {
+            current: incr(current, timeout=2 * duration)
+            for _, _, duration, _, current, _ in windows
+        }
+
+        self.retry_after = 0
+        for dimension, limit, duration, window, current, previous in windows:
+            elapsed = now / duration - window
+            used = counts[current] - 1
+            overlap = previous_counts.get(previous, 0) * (1 - elapsed)
+            if used + overlap < limit:
+                continue
+            if used >= limit:
+                wait = (1 - elapsed) * duration
+            else:
+                # The previous window's weight fades as time passes.
+                fraction = 1 - (limit - used) / previous_counts[previous]
+                wait = (fraction - elapsed) * duration
+            self.retry_after = max(self.retry_after, wait)
+            incr(rejected_key(self.scope, dimension))
+            logger.warning(
+                "Throttled %s request (%s limit)", self.scope, dimension
+            )
+        if not self.retry_after:
+            return True
+
+        # A rejected request does not use up any dimension's budget.
+        for current in counts:
+            try:
+                cache.decr(current)
+            except ValueError:
+                pass
+        return False
+
+    def wait(self):
+        return max(1, math.ceil(self.retry_after))
+
+
+class LoginThrottle(SlidingWindowThrottle):
+    scope = "login"
+
+
+class PasswordResetThrottle(SlidingWindowThrottle):
+    scope = "password_reset"
@@ -0,0 +1,124 @@
+"""
+Stateless signed access and refresh tokens.
+
+Tokens are HMAC-signed (django.core.signing) payloads carrying the user id,
+role, staff flag and the user's tokenVersion, with the signing time used
+for expiry. Verifying one is CPU work plus a cache read of the user's
+current version; bumping the version (logout, password change, reset) or
+deactivating the user revokes every token issued before.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+
+ACCESS_SALT = "core.tokens.access"
+REFRESH_SALT = "core.tokens.refresh"
+REVOKED = -1
+
+
+class InvalidToken(Exception):
+    """The token is malformed, expired or revoked."""
+
+
+def version_key(user_id):
+    return f"auth:version:{user_id}"
+
+
+def forget_version(user_id):
+    """Drop the cached version; the next verification reads the row.
+
+    Writing the saved instance's version instead could cache a stale one:
+    revoke() bumps the column without updating loaded instances.
+    """
+    cache.delete(version_key(user_id))
+
+
+def current_version(user_id):
+    """Return the user's token version, REVOKED if inactive or missing."""
+    version = cache.get(version_key(user_id))
+    if version is None:
+        row = (
+            get_user_model().objects.filter(pk=user_id)
+            .values_list("tokenVersion", "is_active")
+            .first()
+        )
+        version = row[0] if row and row[1] else REVOKED
+        cache.set(version_key(user_id), version, settings.AUTH_TOKEN_CACHE_TTL)
+    return version
+
+
+def revoke(user_id):
+    """Invalidate every signed token issued to the user so far."""
+    get_user_model().objects.filter(pk=user_id).update(
+        tokenVersion=F("tokenVersion") + 1
+    )
+    forget_version(user_id)
+    # Until the bump commits, readers may cache the old version again.
+    transaction.on_commit(lambda: forget_version(user_id))
+
+
+def issue(user):
+    """Return a new access/refresh token pair for the user."""
+    payload = {
+        "uid": user.pk,
+        "role": user.role,
+        "staff": user.is_staff,
+        "ver": user.tokenVersion,
+    }
+    return {
+        "access": signing.dumps(payload, salt=ACCESS_SALT),
+        "refresh": signing.dumps(
+            {"uid": user.pk, "ver": user.tokenVersion}, salt=REFRESH_SALT
+        ),
+        "token_type": "Bearer",
+        "expires_in": settings.ACCESS_TOKEN_TTL,
+    }
+
+
+def _load(token, salt, max_age):
+    try:
+        return signing.loads(token, salt=salt, max_age=max_age)
+    except signing.BadSignature:
+        raise InvalidToken(token)
+
+
+def verify_access(token):
+    """Return the payload of a valid, unrevoked access token."""
+    payload = _load(token, ACCESS_SALT, settings.ACCESS_TOKEN_TTL)
+    if payload["ver"] != current_version(payload["uid"]):
+        raise InvalidToken(token)
+    return payload
+
+
+def refresh(token):
+    """Return a new token pair for a valid refresh token."""
+    payload = _load(token, REFRESH_SALT, settings.REFRESH_TOKEN_TTL)
+    user = get_user_model().objects.filter(
+        pk=payload["uid"], is_active=True
+    ).first()
+    if user is None or user.tokenVersion != payload["ver"]:
+        raise InvalidToken(token)
+    return issue(user)
+
+
+def lazy_user(payload):
+    """Return a User built from the token; other fields load on access."""
+    User = get_user_model()
+    loaded = {
+        "id": payload["uid"],
+        "role": payload["role"],
+        "is_staff": payload["staff"],
+        "is_active": True,
+        "tokenVersion": payload["ver"],
+    }
+    names = [
+        field.attname
+        for field in User._meta.concrete_fields
+        if field.attname in loaded
+    ]
+    return User.from_db("default", names, [loaded[name] for name in names])
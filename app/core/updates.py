@@ -0,0 +1,92 @@
+"""
+Change-only updates for the profile serializers.
+
+Incoming values are compared with the instance and only the columns that
+differ are written, with update_fields, so an unchanged PATCH issues no
+UPDATE, leaves updatedAt (and with it the ETag and cached payloads) alone
+and a location is only re-geocoded when its address changed. A password
+change ends the user's sessions, as on change-password/.
+"""
+
+from django.conf import settings
+
+from core import accounts, geocoding
+from core.models import Location
+
+
+ADDRESS_FIELDS = ["street", "city", "state", "country"]
+USER_FIELDS = ["email"]
+
+
+def assign_changed(instance, data, fields):
+    """Copy the fields of data that differ onto instance; return their names.
+    """
+    changed = []
+    for name in fields:
+        if name in data and getattr(instance, name) != data[name]:
+            setattr(instance, name, data[name])
+            changed.append(name)
+    return changed
+
+
+def save_changed(instance, changed):
+    """Save the changed columns and updatedAt; return whether it saved."""
+    if not changed:
+        return False
+    instance.save(update_fields=[*changed, "updatedAt"])
+    return True
+
+
+def update_location(location, data):
+    """Update the address, geocoding it again only if it changed."""
+    changed = assign_changed(location, data, ADDRESS_FIELDS)
+    if not changed:
+        return False
+    if settings.GEOCODE_ASYNC:
+        # The geocode_worker command replaces the coordinates.
+        location.geocodeStatus = Location.PENDING
+        changed.append("geocodeStatus")
+    else:
+        latitude, longitude = geocoding.geocode(
+            geocoding.location_address(location)
+        )
+        location.latitude = latitude
+        location.longitude = longitude
+        location.geocodeStatus = geocoding.geocode_status(latitude)
+        changed += ["latitude", "longitude", "geocodeStatus"]
+    return save_changed(location, changed)
+
+
+def update_user(user, data):
+    changed = assign_changed(user, data, USER_FIELDS)
+    if data.get("password"):
+        user.set_password(data["password"])
+        changed.append("password")
+    saved = save_changed(user, changed)
+    if "password" in changed:
+        accounts.end_sessions(user.pk)
+    return saved
+
+
+class ChangeOnlyUpdateMixin:
+    """Profile serializer update() writing only the columns that changed.
+
+    Serializers list the profile fields an update may change in
+    updatable_fields; the nested user and location are updated through
+    update_user() and update_location().
+    """
+
+    updatable_fields = []
+
+    def update(self, instance, validated_data):
+        location_data = validated_data.pop("location", None)
+        user_data = validated_data.pop("user", None)
+        if location_data:
+            update_location(instance.location, location_data)
+        if user_data:
+            update_user(instance.user, user_data)
+        save_changed(
+            instance,
+            assign_changed(instance, validated_data, self.updatable_fields),
+        )
+        return instance
@@ -0,0 +1,31 @@
+""""
+Serializers for the location APIs.
+"""
+
+from rest_framework import serializers
+from django.utils.translation import gettext as _
+
+from core.clusters import MAX_ZOOM, PROFILE_RELATIONS
+
+
+class ClusterQuerySerializer(serializers.Serializer):
+    """Serializer for the query parameters of the cluster endpoint."""
+    min_lat = serializers.FloatField(min_value=-90, max_value=90)
+    min_lon = serializers.FloatField(min_value=-180, max_value=180)
+    max_lat = serializers.FloatField(min_value=-90, max_value=90)
+    max_lon = serializers.FloatField(min_value=-180, max_value=180)
+    zoom = serializers.IntegerField(min_value=0, max_value=MAX_ZOOM)
+    profile = serializers.ChoiceField(choices=list(PROFILE_RELATIONS), required=False)
+
+    def validate(self, attrs):
+        if attrs['min_lat'] > attrs['max_lat']:
+            msg = _("min_lat must not be greater than max_lat.")
+            raise serializers.ValidationError(msg, code="invalid")
+        return attrs
+
+
+class ClusterSerializer(serializers.Serializer):
+    geohash = serializers.CharField()
+    count = serializers.IntegerField()
+    latitude = serializers.FloatField()
+    longitude = serializers.FloatField()
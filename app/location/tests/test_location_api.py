@@ -0,0 +1,119 @@
+"""
+Test for the location APIs.
+"""
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core import clusters, geo
+from core.models import Location
+
+CLUSTERS_URL = reverse("location:clusters")
+
+bbox = {
+    "min_lat": 23.0,
+    "min_lon": 90.0,
+    "max_lat": 24.5,
+    "max_lon": 91.0,
+}
+
+
+class LocationClusterApiTests(TestCase):
+    """Test the map cluster endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=get_user_model().objects.create_user(
+            email="user@example.com", username="user", password="test12345"
+        ))
+        for latitude in (23.7104, 23.7110, 23.7120):
+            Location.objects.create(city="Dhaka", latitude=latitude, longitude=90.4074)
+        Location.objects.create(city="Mymensingh", latitude=24.7471, longitude=90.4203)
+        self.moving = Location.objects.create(city="Gazipur", latitude=24.0, longitude=90.42)
+        Location.objects.create(city="Unknown")
+
+    def test_unauthenticated_request_rejected(self):
+        """Test authentication is required for clusters."""
+        res = APIClient().get(CLUSTERS_URL, {**bbox, "zoom": 8})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_clusters_aggregate_locations_in_box(self):
+        """Test locations are grouped per cell with count and centroid."""
+        res = self.client.get(CLUSTERS_URL, {**bbox, "zoom": 8})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["precision"], clusters.precision_for_zoom(8))
+        counts = sorted(cluster["count"] for cluster in res.data["clusters"])
+        self.assertEqual(counts, [1, 3])
+        dhaka = max(res.data["clusters"], key=lambda cluster: cluster["count"])
+        self.assertAlmostEqual(dhaka["latitude"], 23.7111, places=4)
+
+    def test_clusters_are_cached_per_tile(self):
+        """Test a repeated tile request does not hit the database."""
+        self.client.get(CLUSTERS_URL, {**bbox, "zoom": 8})
+
+        with self.assertNumQueries(0):
+            res = self.client.get(CLUSTERS_URL, {**bbox, "zoom": 8})
+
+        self.assertEqual(len(res.data["clusters"]), 2)
+
+    def test_moving_location_invalidates_cache(self):
+        """Test changing coordinates refreshes cached tiles."""
+        self.client.get(CLUSTERS_URL, {**bbox, "zoom": 8})
+
+        self.moving.latitude = 30.0
+        with self.captureOnCommitCallbacks(execute=True):
+            self.moving.save()
+        res = self.client.get(CLUSTERS_URL, {**bbox, "zoom": 8})
+
+        self.assertEqual(len(res.data["clusters"]), 1)
+
+    def test_nearby_boxes_share_tiles(self):
+        """Test boxes snapping to the same tiles share the cached tiles."""
+        self.client.get(CLUSTERS_URL, {**bbox, "zoom": 8})
+
+        with self.assertNumQueries(0):
+            res = self.client.get(
+                CLUSTERS_URL, {**bbox, "min_lon": 90.01, "zoom": 8}
+            )
+
+        self.assertEqual(len(res.data["clusters"]), 2)
+
+    def test_moving_location_keeps_other_tiles(self):
+        """Test a moved location only expires the tiles it left and entered."""
+        far = {"min_lat": -34.0, "min_lon": 151.0, "max_lat": -33.5, "max_lon": 151.5}
+        Location.objects.create(city="Sydney", latitude=-33.87, longitude=151.21)
+        self.client.get(CLUSTERS_URL, {**far, "zoom": 8})
+
+        self.moving.latitude = 30.0
+        self.moving.save()
+
+        with self.assertNumQueries(0):
+            res = self.client.get(CLUSTERS_URL, {**far, "zoom": 8})
+        self.assertEqual(len(res.data["clusters"]), 1)
+
+    def test_tile_bits_match_geohash(self):
+        """Test a tile's geohash prefixes contain the points inside it."""
+        geohash = geo.encode(23.7104, 90.4074)
+        zoom, tiles = clusters.covering_tiles((23.7, 90.4, 23.72, 90.41), 8)
+        bits = clusters.tile_bits(zoom, *tiles[0])
+
+        self.assertEqual(len(tiles), 1)
+        self.assertEqual(clusters.geohash_bits(geohash)[:16], bits)
+        self.assertTrue(any(
+            geohash.startswith(prefix)
+            for prefix in clusters.geohash_prefixes(bits)
+        ))
+
+    def test_invalid_bounding_box(self):
+        """Test an inverted bounding box is rejected."""
+        res = self.client.get(
+            CLUSTERS_URL, {**bbox, "min_lat": 25.0, "zoom": 8}
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,13 @@
+"""
+URL mapping for location API.
+"""
+
+from django.urls import path
+
+from location import views
+
+app_name = "location"
+
+urlpatterns = [
+	path('clusters/', views.LocationClusterView.as_view(), name='clusters'),
+]
@@ -0,0 +1,28 @@
+"""
+Views for the location APIs.
+"""
+
+from rest_framework import generics, permissions
+from rest_framework.response import Response
+
+from core import clusters
+from location.serializers import ClusterQuerySerializer, ClusterSerializer
+
+
+class LocationClusterView(generics.GenericAPIView):
+    """Location counts and centroids per geohash cell of a map tile."""
+
+    serializer_class = ClusterSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = ClusterQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        data = query.validated_data
+        bbox = (data['min_lat'], data['min_lon'], data['max_lat'], data['max_lon'])
+
+        precision, cells = clusters.get_clusters(bbox, data['zoom'], data.get('profile'))
+        return Response({
+            "precision": precision,
+            "clusters": self.get_serializer(cells, many=True).data,
+        })
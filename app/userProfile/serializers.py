@@ -1,6 +1,7 @@
 """"
 Serializers for the user profile APIs.
 """
+from django.conf import settings
 from django.contrib.auth import get_user_model
 
 from rest_framework import serializers
@@ -8,8 +9,9 @@ from django.utils.translation import gettext as _
 
 from core.models import UserProfile, Location
 
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut
+from core import geocoding
+from core.fieldsets import SparseFieldsetsMixin
+from core.updates import ChangeOnlyUpdateMixin
 
 
 class UserActiveStatusSerializer(serializers.ModelSerializer):
@@ -22,41 +24,30 @@ class UserActiveStatusSerializer(serializers.ModelSerializer):
 class LocationSerializer(serializers.ModelSerializer):
     latitude = serializers.FloatField(read_only=True)
     longitude = serializers.FloatField(read_only=True)
+    geocodeStatus = serializers.CharField(read_only=True)
 
     class Meta:
         model = Location
-        fields = ['street','city', 'state', 'country', 'latitude', 'longitude']
+        fields = ['street','city', 'state', 'country', 'latitude', 'longitude', 'geocodeStatus']
 
     def create(self, validated_data):
+        if settings.GEOCODE_ASYNC:
+            # Coordinates are filled in later by the geocode_worker command.
+            validated_data['geocodeStatus'] = Location.PENDING
+            return super().create(validated_data)
+
         address = self._get_full_address(validated_data)
         latitude, longitude = self._get_latitude_longitude(address)
-
         validated_data['latitude'] = latitude
         validated_data['longitude'] = longitude
+        validated_data['geocodeStatus'] = geocoding.geocode_status(latitude)
         return super().create(validated_data)
 
-    def update(self, instance, validated_data):
-        location_data = validated_data.get('location', {})
-        address = self._get_full_address(location_data)
-        latitude, longitude = self._get_latitude_longitude(address)
-
-        instance.location.latitude = latitude
-        instance.location.longitude = longitude
-        instance.location.save()
-        return super().update(instance, validated_data)
-
     def _get_full_address(self, validated_data):
         return f"{validated_data['street']}, {validated_data['city']}, {validated_data['state']}, {validated_data['country']}"
 
     def _get_latitude_longitude(self, address):
-        geolocator = Nominatim(user_agent="geopy/1.0")
-        try:
-            location = geolocator.geocode(address)
-            if location:
-                return location.latitude, location.longitude
-        except GeocoderTimedOut:
-            pass
-        return None, None
+        return geocoding.geocode(address)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -66,13 +57,15 @@ class UserSerializer(serializers.ModelSerializer):
         extra_kwargs = {"password": {"write_only": True, "min_length": 6}}
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsetsMixin, ChangeOnlyUpdateMixin, serializers.ModelSerializer):
     location = LocationSerializer()
     user = UserSerializer()
 
     class Meta:
         model = UserProfile
-        exclude = ['createdAt', 'updatedAt']
+        exclude = ['createdAt', 'updatedAt', 'userRole', 'userIsActive', 'locationCountry', 'locationCity']
+
+    updatable_fields = ['firstName', 'middleName', 'lastName', 'gender', 'dob', 'contactNo', 'profileImg', 'interests']
 
     def create(self, validated_data):
         """Create and return a user profile with encrypted password."""
@@ -89,36 +82,37 @@ class UserProfileSerializer(serializers.ModelSerializer):
             # Handle serializer validation errors
             raise serializers.ValidationError(_("Invalid location data"), code='Invalid')
 
-    def update(self, instance, validated_data):
-        """Update and return user profile"""
-        location_data = validated_data.pop('location', None)
-        user_data = validated_data.pop('user', None)
-
-        # Update UserProfile instance
-        instance.firstName = validated_data.get('firstName', instance.firstName)
-        instance.middleName = validated_data.get('middleName', instance.middleName)
-        instance.lastName = validated_data.get('lastName', instance.lastName)
-        instance.gender = validated_data.get('gender', instance.gender)
-        instance.dob = validated_data.get('dob', instance.dob)
-        instance.contactNo = validated_data.get('contactNo', instance.contactNo)
-        instance.profileImg = validated_data.get('profileImg', instance.profileImg)
-        instance.interests = validated_data.get('interests', instance.interests)
-
-        # Update Location instance
-        if location_data:
-            location_serializer = LocationSerializer(instance.location, data=location_data)
-            if location_serializer.is_valid():
-                location_serializer.save()
-
-        # Update User instance
-        if (user_data):
-            user = instance.user
-            password = user_data.pop('password', None)
-            user.email = user_data.get('email', user.email)
-            if (password):
-                user.set_password(password)
-            user.save()
-
-        # Save UserProfile instance
-        instance.save()
-        return instance
+
+class InterestSearchQuerySerializer(serializers.Serializer):
+    """Serializer for the query parameters of the interest search."""
+    MAX_TERMS = 20
+
+    interests = serializers.CharField()
+    match = serializers.ChoiceField(choices=['any', 'all'], default='any')
+
+    def validate_interests(self, value):
+        """Split a comma-separated list into unique, non-empty terms."""
+        terms = list(dict.fromkeys(
+            term.strip() for term in value.split(',') if term.strip()
+        ))
+        if not terms:
+            raise serializers.ValidationError(_("Give at least one interest."))
+        if len(terms) > self.MAX_TERMS:
+            raise serializers.ValidationError(
+                _("Give at most %(count)d interests.") % {"count": self.MAX_TERMS}
+            )
+        return terms
+
+
+class InterestSearchUserProfileSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    """Public part of a user profile with the number of searched interests it shares.
+
+    Any authenticated user may search, so contact details, the address and
+    the account are left out.
+    """
+    sharedInterests = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = UserProfile
+        fields = ['id', 'firstName', 'middleName', 'lastName', 'profileImg', 'interests', 'sharedInterests']
+        read_only_fields = fields
@@ -2,17 +2,35 @@
 Test for the user profile APIs.
 """
 
-from django.test import TestCase
+import csv
+import io
+import json
+import threading
+import time
+from unittest.mock import patch
+
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils import timezone
 
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core import tokens
 from core.models import UserProfile, Location
+from core.tests.helpers import create_profile
+from userProfile.serializers import UserProfileSerializer
 
 CREATE_USERPROFILE_URL = reverse("userProfile:create")
+BULK_CREATE_URL = reverse("userProfile:bulk-create")
+LIST_URL = reverse("userProfile:get")
+EXPORT_URL = reverse("userProfile:export")
 ME_URL = reverse("userProfile:me")
+SEARCH_URL = reverse("userProfile:search")
 
 payload = {
 	"location": {
@@ -78,6 +96,16 @@ class PublicUserApiTests(TestCase):
         self.assertEqual(userProfile.firstName, payload["firstName"])
         self.assertNotIn("password", res.data)
 
+    @patch("core.geocoding.geocode")
+    def test_create_user_profile_defers_geocoding(self, patched_geocode):
+        """Test creating a profile queues its location for geocoding."""
+        res = self.client.post(CREATE_USERPROFILE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['location']['geocodeStatus'], Location.PENDING)
+        self.assertIsNone(res.data['location']['latitude'])
+        patched_geocode.assert_not_called()
+
     def test_user_with_email_exists_error(self):
         """Test error returns if user with email exists"""
         payload_copy = payload.copy()
@@ -143,3 +171,693 @@ class PrivateUserApiTests(TestCase):
         self.assertTrue(user.check_password(update_payload["user"]["password"]))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+
+class ListPaginationTests(TestCase):
+    """Test the list endpoint's cursor pagination."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=get_user_model().objects.create_user(
+            email="staff@example.com", username="staff", password="test12345", is_staff=True
+        ))
+
+    def test_list_is_cursor_paginated(self):
+        """Test pages follow (createdAt, id) and ignore concurrent inserts."""
+        created = [create_profile(UserProfile, f"user{index}").id for index in range(5)]
+
+        res = self.client.get(LIST_URL, {"page_size": 2})
+        seen = [item["id"] for item in res.data["results"]]
+        self.assertIsNone(res.data["previous"])
+
+        create_profile(UserProfile, "late")
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            seen.extend(item["id"] for item in res.data["results"])
+
+        self.assertEqual(seen[:5], created)
+        self.assertEqual(len(seen), 6)
+
+    def test_rows_sharing_created_at_are_paged_by_id(self):
+        """Test ties on createdAt are paged by id, both ways."""
+        created = [create_profile(UserProfile, f"user{index}").id for index in range(7)]
+        UserProfile.objects.update(createdAt=timezone.now())
+
+        res = self.client.get(LIST_URL, {"page_size": 2})
+        pages = [[item["id"] for item in res.data["results"]]]
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            pages.append([item["id"] for item in res.data["results"]])
+        self.assertEqual(sum(pages, []), created)
+
+        res = self.client.get(res.data["previous"])
+        self.assertEqual([item["id"] for item in res.data["results"]], pages[-2])
+
+        res = self.client.get(LIST_URL, {"page_size": 2, "ordering": "-createdAt"})
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]], created[::-1][:2]
+        )
+        res = self.client.get(res.data["next"])
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]], created[::-1][2:4]
+        )
+
+    def test_invalid_cursor_is_not_found(self):
+        res = self.client.get(LIST_URL, {"cursor": "cD1ub3Rqc29u"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @patch("core.pagination.ProfileCursorPagination.max_page_size", 3)
+    def test_page_size_is_capped(self):
+        """Test clients cannot request pages above the maximum size."""
+        for index in range(5):
+            create_profile(UserProfile, f"user{index}")
+
+        res = self.client.get(LIST_URL, {"page_size": 100000})
+
+        self.assertEqual(len(res.data["results"]), 3)
+        self.assertIsNotNone(res.data["next"])
+
+
+class ExportApiTests(TestCase):
+    """Test the streaming user profile export."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=get_user_model().objects.create_user(
+            email="staff@example.com", username="staff", password="test12345", is_staff=True
+        ))
+        self.profiles = [create_profile(UserProfile, f"user{index}") for index in range(3)]
+
+    def test_export_ndjson(self):
+        """Test profiles are streamed as one JSON object per line."""
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in b"".join(res.streaming_content).splitlines()]
+        self.assertEqual([row["id"] for row in rows], [p.id for p in self.profiles])
+        self.assertEqual(rows[0]["user"]["username"], "user0")
+        self.assertNotIn("password", rows[0]["user"])
+
+    def test_export_csv(self):
+        """Test profiles are streamed as CSV with flattened nested fields."""
+        res = self.client.get(EXPORT_URL, {"output": "csv"})
+
+        self.assertEqual(res["Content-Type"], "text/csv")
+        content = b"".join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1]["user.email"], "user1@example.com")
+        self.assertEqual(rows[1]["location.city"], "test")
+        self.assertEqual(json.loads(rows[1]["interests"]), ["fishing"])
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_export_reads_keyset_chunks(self):
+        """Test rows are read in id chunks of EXPORT_CHUNK_SIZE."""
+        res = self.client.get(EXPORT_URL)
+
+        with self.assertNumQueries(2):
+            content = b"".join(res.streaming_content)
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row["id"] for row in rows], [p.id for p in self.profiles])
+
+    def test_export_invalid_output(self):
+        """Test an unsupported output format is rejected."""
+        res = self.client.get(EXPORT_URL, {"output": "xml"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_requires_admin(self):
+        """Test regular users cannot export profiles."""
+        self.client.force_authenticate(user=self.profiles[0].user)
+        res = self.client.get(EXPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class SparseFieldsetApiTests(TestCase):
+    """Test ?fields= and ?omit= on the user profile endpoints."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=get_user_model().objects.create_user(
+            email="staff@example.com", username="staff", password="test12345", is_staff=True
+        ))
+        self.profile = create_profile(UserProfile, "user0")
+
+    def test_fields_limits_payload_and_query(self):
+        """Test only requested fields are returned and no joins are made."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(LIST_URL, {"fields": "id,firstName,profileImg"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data["results"][0]), {"id", "firstName", "profileImg"})
+        sql = queries[0]["sql"]
+        self.assertNotIn("JOIN", sql)
+        self.assertNotIn('"interests"', sql)
+
+    def test_nested_fields(self):
+        """Test dotted names select fields of nested objects."""
+        res = self.client.get(LIST_URL, {"fields": "firstName,location.city"})
+
+        self.assertEqual(res.data["results"][0]["location"], {"city": "test"})
+
+    def test_omit_fields(self):
+        """Test omitted fields and relations are left out."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(LIST_URL, {"omit": "user,interests"})
+
+        row = res.data["results"][0]
+        self.assertNotIn("user", row)
+        self.assertNotIn("interests", row)
+        self.assertIn("location", row)
+        self.assertNotIn('JOIN "core_user"', queries[0]["sql"])
+
+    def test_unknown_field_rejected(self):
+        """Test an error is returned for fields the serializer lacks."""
+        res = self.client.get(LIST_URL, {"fields": "firstName,password"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_me_fields(self):
+        """Test the me endpoint honours sparse fieldsets."""
+        self.client.force_authenticate(user=self.profile.user)
+
+        # One query for the ETag validators, one for the profile.
+        with self.assertNumQueries(2):
+            res = self.client.get(ME_URL, {"fields": "firstName,lastName"})
+
+        self.assertEqual(res.data, {"firstName": "user0", "lastName": "test"})
+
+
+class ConditionalRequestApiTests(TestCase):
+    """Test ETag / Last-Modified handling on the me endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.profile = create_profile(UserProfile, "user0")
+        self.client.force_authenticate(user=self.profile.user)
+
+    def test_get_sets_validators(self):
+        """Test a full response carries an ETag and Last-Modified."""
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.headers["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", res.headers)
+        self.assertIn("private", res.headers["Cache-Control"])
+
+    def test_unchanged_profile_not_modified(self):
+        """Test a matching If-None-Match costs one query and no body."""
+        etag = self.client.get(ME_URL).headers["ETag"]
+
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b"")
+        self.assertEqual(res.headers["ETag"], etag)
+
+    def test_if_modified_since(self):
+        """Test Last-Modified round-trips through If-Modified-Since."""
+        last_modified = self.client.get(ME_URL).headers["Last-Modified"]
+
+        res = self.client.get(ME_URL, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_changes_with_related_rows(self):
+        """Test updating the location or the fieldset changes the ETag."""
+        etag = self.client.get(ME_URL).headers["ETag"]
+        sparse = self.client.get(ME_URL, {"fields": "firstName"})
+        self.assertNotEqual(sparse.headers["ETag"], etag)
+
+        self.profile.location.city = "elsewhere"
+        self.profile.location.save()
+        res = self.client.get(ME_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.headers["ETag"], etag)
+
+    def test_update_with_stale_if_match(self):
+        """Test a PATCH against an outdated ETag is rejected."""
+        etag = self.client.get(ME_URL).headers["ETag"]
+        UserProfile.objects.filter(pk=self.profile.pk).update(firstName="other")
+        self.profile.save()
+
+        res = self.client.patch(
+            ME_URL, {"lastName": "changed"}, format="json", HTTP_IF_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.lastName, "test")
+
+    def test_update_with_current_if_match(self):
+        """Test a PATCH with the current ETag succeeds and gets a new one."""
+        etag = self.client.get(ME_URL).headers["ETag"]
+
+        res = self.client.patch(
+            ME_URL, {"lastName": "changed"}, format="json", HTTP_IF_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.headers["ETag"], etag)
+        self.assertEqual(
+            self.client.get(ME_URL, HTTP_IF_NONE_MATCH=res.headers["ETag"]).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+
+class ConcurrentUpdateApiTests(TransactionTestCase):
+    """Test If-Match against concurrent writers."""
+
+    def test_concurrent_updates_with_same_if_match(self):
+        """Test only one of two PATCHes sent with the same ETag applies."""
+        profile = create_profile(UserProfile, "user0")
+        client = APIClient()
+        client.force_authenticate(user=profile.user)
+        etag = client.get(ME_URL).headers["ETag"]
+        update = UserProfileSerializer.update
+        statuses = []
+
+        def slow_update(serializer, instance, validated_data):
+            # Hold the write open so both requests overlap.
+            time.sleep(0.3)
+            return update(serializer, instance, validated_data)
+
+        def send(last_name):
+            client = APIClient()
+            client.force_authenticate(user=profile.user)
+            res = client.patch(
+                ME_URL, {"lastName": last_name}, format="json", HTTP_IF_MATCH=etag
+            )
+            statuses.append(res.status_code)
+            connections.close_all()
+
+        with patch.object(UserProfileSerializer, "update", slow_update):
+            threads = [
+                threading.Thread(target=send, args=(name,))
+                for name in ("first", "second")
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(
+            sorted(statuses),
+            [status.HTTP_200_OK, status.HTTP_412_PRECONDITION_FAILED],
+        )
+
+
+class ProfileCacheApiTests(TestCase):
+    """Test the me endpoint serves cached payloads until they change."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.profile = create_profile(UserProfile, "user0")
+        self.client.force_authenticate(user=self.profile.user)
+
+    def test_cached_payload_reflects_updates(self):
+        """Test repeat reads skip the profile query and see updates."""
+        self.client.get(ME_URL)
+        # Only the ETag validators query runs on a cache hit.
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.data["lastName"], "test")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(ME_URL, {"lastName": "changed"}, format="json")
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data["lastName"], "changed")
+
+
+class InterestSearchApiTests(TestCase):
+    """Test searching user profiles by shared interests."""
+
+    def setUp(self):
+        self.profile = create_profile(UserProfile, "searcher")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.profile.user)
+
+    def create_with_interests(self, name, interests):
+        profile = create_profile(UserProfile, name)
+        profile.interests = interests
+        profile.save()
+        return profile
+
+    def names(self, res):
+        return [row["firstName"] for row in res.data["results"]]
+
+    def test_any_ranks_by_shared_interests(self):
+        """Test matches share any interest and the best matches come first."""
+        self.create_with_interests("one", ["fishing"])
+        self.create_with_interests("three", ["fishing", "hiking", "chess"])
+        self.create_with_interests("none", ["painting"])
+        self.create_with_interests("two", ["chess", "hiking"])
+
+        res = self.client.get(SEARCH_URL, {"interests": "fishing,hiking,chess"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.names(res), ["three", "two", "one"])
+        self.assertEqual(
+            [row["sharedInterests"] for row in res.data["results"]], [3, 2, 1]
+        )
+
+    def test_all_requires_every_interest(self):
+        self.create_with_interests("both", ["fishing", "hiking"])
+        self.create_with_interests("one", ["fishing"])
+
+        res = self.client.get(
+            SEARCH_URL, {"interests": "fishing,hiking", "match": "all"}
+        )
+
+        self.assertEqual(self.names(res), ["both"])
+
+    def test_search_excludes_requester_and_paginates(self):
+        """Test the caller is left out and results are paginated."""
+        for index in range(3):
+            self.create_with_interests(f"user{index}", ["fishing"])
+
+        res = self.client.get(SEARCH_URL, {"interests": "fishing", "page_size": 2})
+
+        self.assertEqual(res.data["count"], 3)
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertNotIn("searcher", self.names(res))
+
+    def test_search_hides_private_fields(self):
+        """Test other users' contact details and address are not returned."""
+        self.create_with_interests("other", ["fishing"])
+
+        res = self.client.get(SEARCH_URL, {"interests": "fishing"})
+
+        row, = res.data["results"]
+        self.assertEqual(
+            set(row),
+            {"id", "firstName", "middleName", "lastName", "profileImg",
+             "interests", "sharedInterests"},
+        )
+
+    def test_search_requires_interests(self):
+        res = self.client.get(SEARCH_URL, {"interests": " , "})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_uses_gin_index(self):
+        """Test the containment filter can be answered by the GIN index."""
+        queryset = UserProfile.objects.filter(interests__overlap=["fishing"])
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = queryset.explain()
+
+        self.assertIn("userprofile_interests_gin_idx", plan)
+
+
+class ProfileFilterApiTests(TestCase):
+    """Test filtering and ordering the user profile list."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=get_user_model().objects.create_user(
+            email="staff@example.com", username="staff", password="test12345", is_staff=True
+        ))
+        self.profiles = [create_profile(UserProfile, f"user{index}") for index in range(3)]
+
+    def names(self, res):
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        return [row["firstName"] for row in res.data["results"]]
+
+    def test_filter_by_gender_newest_first(self):
+        """Test an equality filter combined with its index's ordering."""
+        self.profiles[1].gender = "female"
+        self.profiles[1].save()
+
+        res = self.client.get(LIST_URL, {"gender": "male", "ordering": "-createdAt"})
+
+        self.assertEqual(self.names(res), ["user2", "user0"])
+
+    def test_filter_by_location_and_user(self):
+        """Test the copied user and location columns follow their updates."""
+        self.profiles[0].location.country = "Bangladesh"
+        self.profiles[0].location.city = "Dhaka"
+        self.profiles[0].location.save()
+        self.profiles[2].user.is_active = False
+        self.profiles[2].user.save()
+
+        res = self.client.get(LIST_URL, {"country": "Bangladesh", "city": "Dhaka"})
+        self.assertEqual(self.names(res), ["user0"])
+
+        res = self.client.get(LIST_URL, {"role": "user", "is_active": "false", "ordering": "-createdAt"})
+        self.assertEqual(self.names(res), ["user2"])
+
+    def test_role_filter_uses_profile_index(self):
+        queryset = UserProfile.objects.filter(userRole="user", userIsActive=True).order_by("createdAt", "id")
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = queryset.explain()
+
+        self.assertIn("userprofile_role_active_idx", plan)
+        self.assertNotIn("Sort", plan)
+
+    def test_filter_by_created_range(self):
+        UserProfile.objects.filter(pk=self.profiles[0].pk).update(
+            createdAt="2020-01-01T00:00:00Z"
+        )
+
+        res = self.client.get(LIST_URL, {"created_before": "2021-01-01T00:00:00Z"})
+
+        self.assertEqual(self.names(res), ["user0"])
+
+    def test_descending_cursor_pages(self):
+        """Test the cursor paginates in the requested direction."""
+        res = self.client.get(LIST_URL, {"ordering": "-createdAt", "page_size": 2})
+        names = self.names(res)
+        names += self.names(self.client.get(res.data["next"]))
+
+        self.assertEqual(names, ["user2", "user1", "user0"])
+
+    def test_unsupported_combination_rejected(self):
+        """Test filters no single index answers are rejected."""
+        for params in (
+            {"city": "Dhaka"},
+            {"is_active": "true"},
+            {"gender": "male", "country": "Bangladesh"},
+            {"role": "user", "ordering": "firstName"},
+            {"ordering": "firstName"},
+        ):
+            res = self.client.get(LIST_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_invalid_value_rejected(self):
+        res = self.client.get(LIST_URL, {"gender": "unknown"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("gender", res.data)
+
+
+def bulk_item(name, **extra):
+    """Return a create/ payload for a user with a unique name."""
+    item = json.loads(json.dumps(payload))
+    item["user"].update(username=name, email=f"{name}@example.com")
+    item["email"] = f"{name}@example.com"
+    item.update(extra)
+    return item
+
+
+class BulkCreateApiTests(TestCase):
+    """Test creating user profiles in bulk."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=get_user_model().objects.create_user(
+            email="staff@example.com", username="staff", password="test12345", is_staff=True
+        ))
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(user=get_user_model().objects.create_user(
+            email="user@example.com", username="user", password="test12345"
+        ))
+
+        res = self.client.post(BULK_CREATE_URL, [bulk_item("bulk0")], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_bulk_create_batches_queries(self):
+        """Test the query count does not grow with the number of profiles."""
+        items = [bulk_item(f"bulk{index}") for index in range(20)]
+
+        # 3 unique checks, a savepoint pair and 3 inserts.
+        with self.assertNumQueries(8):
+            res = self.client.post(BULK_CREATE_URL, items, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["errors"], [])
+        ids = [row["id"] for row in res.data["created"]]
+        profiles = UserProfile.objects.select_related("user", "location").in_bulk(ids)
+        profile = profiles[ids[3]]
+        self.assertEqual(profile.user.username, "bulk3")
+        self.assertTrue(profile.user.check_password("test12345"))
+        self.assertEqual(profile.location.geocodeStatus, Location.PENDING)
+        self.assertEqual(profile.interests, ["fishing"])
+
+    def test_per_item_errors(self):
+        """Test invalid and duplicate items are reported by index."""
+        create_profile(UserProfile, "taken")
+        items = [
+            bulk_item("ok"),
+            bulk_item("taken"),
+            bulk_item("ok", email="other@example.com"),
+            bulk_item("bad", gender="unknown"),
+        ]
+
+        res = self.client.post(BULK_CREATE_URL, items, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([row["index"] for row in res.data["created"]], [0])
+        errors = {row["index"]: row["errors"] for row in res.data["errors"]}
+        self.assertEqual(set(errors), {1, 2, 3})
+        self.assertEqual(set(errors[1]), {"user", "email"})
+        self.assertEqual(set(errors[1]["user"]), {"username", "email"})
+        self.assertEqual(set(errors[2]["user"]), {"username", "email"})
+        self.assertIn("gender", errors[3])
+        self.assertEqual(UserProfile.objects.count(), 2)
+
+    def test_email_checked_as_stored(self):
+        """Test emails differing only in the domain's case clash."""
+        create_profile(UserProfile, "taken")
+        items = [
+            bulk_item("first", user={"username": "first", "email": "Dup@EXAMPLE.com", "password": "test12345"}),
+            bulk_item("second", user={"username": "second", "email": "Dup@example.com", "password": "test12345"}),
+            bulk_item("third", user={"username": "third", "email": "taken@Example.COM", "password": "test12345"}),
+        ]
+
+        res = self.client.post(BULK_CREATE_URL, items, format="json")
+
+        self.assertEqual([row["index"] for row in res.data["created"]], [0])
+        errors = {row["index"]: row["errors"] for row in res.data["errors"]}
+        self.assertEqual(set(errors), {1, 2})
+        self.assertIn("email", errors[1]["user"])
+        self.assertIn("email", errors[2]["user"])
+
+    @override_settings(GEOCODE_ASYNC=False)
+    def test_locations_queued_without_async_geocoding(self):
+        """Test a batch never geocodes inline."""
+        items = [bulk_item(f"sync{index}") for index in range(3)]
+
+        with patch("core.geocoding.resolve") as resolve:
+            res = self.client.post(BULK_CREATE_URL, items, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        resolve.assert_not_called()
+        self.assertEqual(
+            set(Location.objects.values_list("geocodeStatus", flat=True)), {Location.PENDING}
+        )
+
+    def test_all_invalid(self):
+        res = self.client.post(BULK_CREATE_URL, [{"firstName": "x"}], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["created"], [])
+
+    def test_rejects_non_list_and_too_many(self):
+        res = self.client.post(BULK_CREATE_URL, bulk_item("single"), format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.settings(BULK_CREATE_MAX_ITEMS=1):
+            res = self.client.post(
+                BULK_CREATE_URL, [bulk_item("a"), bulk_item("b")], format="json"
+            )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(UserProfile.objects.exists())
+
+    @override_settings(PASSWORD_HASH_WORKERS=2, PASSWORD_HASH_MIN_PER_WORKER=1)
+    def test_passwords_hashed_in_pool(self):
+        items = [bulk_item(f"pool{index}") for index in range(3)]
+
+        res = self.client.post(BULK_CREATE_URL, items, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        users = get_user_model().objects.filter(username__startswith="pool")
+        self.assertEqual(len({user.password for user in users}), 3)
+        self.assertTrue(all(user.check_password("test12345") for user in users))
+
+
+class ChangeOnlyUpdateApiTests(TestCase):
+    """Test updates write only the columns that changed."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.profile = create_profile(UserProfile, "user0")
+        self.client.force_authenticate(user=self.profile.user)
+
+    def patch_updates(self, data):
+        """PATCH me/ and return the UPDATE statements it ran."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(ME_URL, data, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [q["sql"] for q in queries if q["sql"].startswith("UPDATE")]
+
+    def test_unchanged_patch_writes_nothing(self):
+        updatedAt = self.profile.updatedAt
+
+        updates = self.patch_updates({
+            "firstName": "user0",
+            "interests": ["fishing"],
+            "location": {"city": "test"},
+        })
+
+        self.assertEqual(updates, [])
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.updatedAt, updatedAt)
+
+    def test_patch_writes_changed_columns(self):
+        updates = self.patch_updates({"lastName": "changed", "firstName": "user0"})
+
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"lastName"', updates[0])
+        self.assertNotIn('"firstName"', updates[0])
+        self.assertIn('"updatedAt"', updates[0])
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.lastName, "changed")
+
+    def test_password_change_revokes_tokens(self):
+        """Test a password set through me/ ends the existing sessions."""
+        Token.objects.create(user=self.profile.user)
+        issued = tokens.issue(self.profile.user)
+        # Cache the current version, as a verified request would.
+        tokens.verify_access(issued["access"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.patch_updates({"user": {"password": "changed123"}})
+
+        self.assertFalse(Token.objects.filter(user=self.profile.user).exists())
+        with self.assertRaises(tokens.InvalidToken):
+            tokens.verify_access(issued["access"])
+        with self.assertRaises(tokens.InvalidToken):
+            tokens.refresh(issued["refresh"])
+
+    @override_settings(GEOCODE_ASYNC=False)
+    @patch("core.geocoding.geocode", return_value=(10.5, 20.25))
+    def test_geocodes_only_changed_address(self, patched_geocode):
+        self.patch_updates({"location": {"city": "test", "state": "test"}})
+        patched_geocode.assert_not_called()
+
+        updates = self.patch_updates({"location": {"city": "other"}})
+
+        patched_geocode.assert_called_once_with("None, other, test, test")
+        self.assertEqual(len(updates), 1)
+        location = Location.objects.get(pk=self.profile.location_id)
+        self.assertEqual(location.city, "other")
+        self.assertEqual(float(location.latitude), 10.5)
+        self.assertEqual(location.geohash, location.compute_geohash())
+        self.assertEqual(location.geocodeStatus, Location.DONE)
+
+    @patch("core.geocoding.geocode")
+    def test_changed_address_queued_for_geocoding(self, patched_geocode):
+        Location.objects.filter(pk=self.profile.location_id).update(geocodeStatus=Location.DONE)
+
+        self.patch_updates({"location": {"country": "other"}})
+
+        patched_geocode.assert_not_called()
+        location = Location.objects.get(pk=self.profile.location_id)
+        self.assertEqual(location.country, "other")
+        self.assertEqual(location.geocodeStatus, Location.PENDING)
@@ -11,6 +11,9 @@ app_name = "userProfile"
 urlpatterns = [
 	path('update-user-active-status/<int:pk>/', views.UpdateUserActiveStatusView.as_view(), name='update_user_active_status'),
 	path('create/', views.UserProfileCreateView.as_view(), name="create"),
+	path('bulk-create/', views.UserProfileBulkCreateView.as_view(), name="bulk-create"),
 	path('get-all-users/', views.UserProfileGetView.as_view(), name="get"),
-	path('me/', views.ManageUserProfileView.as_view(), name='me')
+	path('export-users/', views.UserProfileExportView.as_view(), name='export'),
+	path('me/', views.ManageUserProfileView.as_view(), name='me'),
+	path('search/', views.UserProfileInterestSearchView.as_view(), name='search'),
 ]
@@ -2,16 +2,38 @@
 Views for the user profile APIs.
 """
 
-from rest_framework import generics, permissions, authentication
+from rest_framework import generics, permissions, serializers
 
 from django.contrib.auth import get_user_model
+from django.db.models import IntegerField
+from django.db.models.expressions import RawSQL
+from django.shortcuts import get_object_or_404
 
 from userProfile.serializers import (
+	InterestSearchQuerySerializer,
+	InterestSearchUserProfileSerializer,
 	UserActiveStatusSerializer,
 	UserProfileSerializer
 )
 
 from core.models import UserProfile
+from core.authentication import CachedTokenAuthentication, SignedTokenAuthentication
+from core.bulk import BulkProfileCreateMixin
+from core.conditional import ConditionalProfileMixin
+from core.exports import ProfileExportMixin
+from core.fastpath import FastListMixin
+from core.filters import (
+	CREATED_ORDERING,
+	CREATED_RANGES,
+	PROFILE_FILTERS,
+	Filter,
+	IndexedFilterBackend,
+	IndexPlan,
+	profile_plans,
+)
+from core.fieldsets import SparseFieldsetsViewMixin
+from core.pagination import ProfileCursorPagination, SearchPagination
+from core.profile_cache import CachedProfileMixin
 
 class UpdateUserActiveStatusView(generics.UpdateAPIView):
     """API endpoint to update the is_active field of a user."""
@@ -26,20 +48,78 @@ class UpdateUserActiveStatusView(generics.UpdateAPIView):
 class UserProfileCreateView(generics.CreateAPIView):
     serializer_class = UserProfileSerializer
 
-class UserProfileGetView(generics.ListAPIView):
+class UserProfileBulkCreateView(BulkProfileCreateMixin, generics.GenericAPIView):
+    """Only admin can create profiles in bulk."""
+    serializer_class = UserProfileSerializer
+
+class UserProfileGetView(FastListMixin, SparseFieldsetsViewMixin, generics.ListAPIView):
     """Only admin can see the list of users."""
-    queryset = UserProfile.objects.all()
+    queryset = UserProfile.objects.select_related('user', 'location')
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = ProfileCursorPagination
+    filter_backends = [IndexedFilterBackend]
+    profile_filters = {
+        **PROFILE_FILTERS,
+        'gender': Filter('gender', serializers.ChoiceField(choices=UserProfile.gender_choices)),
+    }
+    index_plans = profile_plans(
+        'userprofile_created_id_idx', 'userprofile_role_active_idx', 'userprofile_country_city_idx'
+    ) + [
+        IndexPlan(
+            'userprofile_gender_idx',
+            filters=['gender'],
+            ranges=CREATED_RANGES,
+            ordering=CREATED_ORDERING,
+        ),
+    ]
 
-class ManageUserProfileView(generics.RetrieveUpdateDestroyAPIView):
+class UserProfileExportView(SparseFieldsetsViewMixin, ProfileExportMixin, generics.GenericAPIView):
+    """Only admin can export user profiles."""
+    queryset = UserProfile.objects.select_related('user', 'location')
+    serializer_class = UserProfileSerializer
+    export_name = 'user-profiles'
+
+class ManageUserProfileView(ConditionalProfileMixin, CachedProfileMixin, SparseFieldsetsViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """Manage the authenticated user."""
 
-    queryset = UserProfile.objects.all()
+    queryset = UserProfile.objects.select_related('user', 'location')
     serializer_class = UserProfileSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SignedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
         """Retrieve and return the authenticated user"""
-        return self.request.user.user_profile
\ No newline at end of file
+        return get_object_or_404(self.get_queryset(), user=self.request.user)
+
+
+class UserProfileInterestSearchView(SparseFieldsetsViewMixin, generics.ListAPIView):
+    """List users sharing any (or all) of the given interests, best match first."""
+
+    queryset = UserProfile.objects.all()
+    serializer_class = InterestSearchUserProfileSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = SearchPagination
+
+    def get_queryset(self):
+        query = InterestSearchQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        terms = query.validated_data['interests']
+
+        # Both operators are answered by the GIN index on interests.
+        if query.validated_data['match'] == 'all':
+            match = {'interests__contains': terms}
+        else:
+            match = {'interests__overlap': terms}
+
+        return super().get_queryset().filter(
+            user__is_active=True, **match
+        ).exclude(user=self.request.user).annotate(
+            sharedInterests=RawSQL(
+                'SELECT COUNT(DISTINCT interest) '
+                'FROM unnest("core_userprofile"."interests") AS interest '
+                'WHERE interest = ANY(%s)',
+                (terms,),
+                output_field=IntegerField(),
+            ),
+        ).order_by('-sharedInterests', 'id')